@@ -5,10 +5,19 @@ Flask Web Server - 用于通过 HTTP 触发新闻摘要任务
 
 from flask import Flask, jsonify, request
 import os
+import config
+from feed_poller import start_poller_once
 from main import run_once
 
 app = Flask(__name__)
 
+# 常驻进程：可选开启后台轮询，/trigger 时直接使用内存快照。
+# 快照只在启动轮询器的进程内可用：gunicorn 多个 worker 时只有一个 worker 轮询，
+# 落到其他 worker 的 /trigger 即时抓取；希望每次都用快照时以单个 worker 运行（gunicorn 默认即为 1 个，
+# 且不要使用 --preload，轮询线程不会随 fork 进入 worker）
+if config.POLLER_ENABLED:
+    start_poller_once()
+
 # 从环境变量获取密钥，用于验证请求
 SECRET_KEY = os.getenv("TRIGGER_SECRET_KEY", "").strip()
 
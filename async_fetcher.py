@@ -0,0 +1,206 @@
+"""
+异步抓取后端 - 基于 asyncio + aiohttp 的 RSS 抓取
+
+与线程池后端并列（config.RSS_FETCH_BACKEND = "async" 时启用）：
+- 同一 host 的 keep-alive 连接在 TCPConnector 中复用，避免每次重新 TLS 握手
+- 全局并发与单 host 并发分别限流
+- 重试退避使用 asyncio.sleep，不占用线程
+- 支持整体截止时间与慢请求对冲（与线程池后端语义一致）
+- 事件循环在后台线程中运行，结果经队列按完成顺序产出，流水线模式下先抓完的分类可以先开始摘要
+
+aiohttp 是可选依赖（pip install aiohttp）；未安装时回退到线程池后端。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple
+
+try:
+    import aiohttp  # type: ignore
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+import config
+import source_health
+from feed_body import BodyReader
+from feed_cache import get_feed_cache
+from feed_replay import replay_url
+from feed_stream import StreamingFeedParser
+from news_fetcher import (
+    FeedResult,
+    FetchTask,
+    ParsedFeed,
+    _finish_stream_parse,
+    _not_modified_items,
+    _parse_truncated,
+    _refresh_after,
+    _request_headers,
+)
+
+
+def is_available() -> bool:
+    return aiohttp is not None
+
+
+async def _read_and_parse_async(resp: "aiohttp.ClientResponse", source_name: str, limit: int) -> ParsedFeed:
+    # aiohttp 已按 Content-Encoding 解压，这里只限制解压后的大小
+    body = BodyReader(None)
+    parser = StreamingFeedParser(limit) if config.RSS_STREAM_PARSE else None
+    chunks: List[bytes] = []
+    async for chunk in resp.content.iter_chunked(config.RSS_READ_CHUNK_SIZE):
+        data = body.decode(chunk)
+        if parser is None:
+            chunks.append(data)
+        elif parser.feed(data):
+            break
+        if body.done:
+            break
+
+    if parser is not None:
+        return _finish_stream_parse(parser, source_name, limit, body.truncated)
+    return _parse_truncated(b"".join(chunks), source_name, limit, body.truncated)
+
+
+async def fetch_feed_async(session: "aiohttp.ClientSession", url: str, source_name: str, limit: int = 3) -> FeedResult:
+    """fetch_feed 的异步版本（同样的缓存、熔断、重试与解析逻辑，返回同样的 FeedResult）"""
+    plan = source_health.plan_fetch(url)
+    if plan.skip:
+        print(f"跳过 {source_name}：连续失败 {plan.failure_streak} 次，熔断中")
+        return FeedResult([], ok=False)
+
+    cache = get_feed_cache()
+    timeout = aiohttp.ClientTimeout(total=plan.timeout)
+    loop = asyncio.get_running_loop()
+    for attempt in range(plan.max_retries + 1):
+        started = loop.time()
+        try:
+            async with session.get(replay_url(url), headers=_request_headers(cache, url, limit), timeout=timeout) as resp:
+                if resp.status == 304:
+                    cached = _not_modified_items(cache, url, source_name, limit)
+                    if cached is None:
+                        # 与线程池后端一致：没有缓存可用的 304 按失败处理
+                        raise RuntimeError("HTTP 304 但本地没有缓存的条目")
+                    source_health.record_success(url, None)
+                    return FeedResult(cached, refresh_after=_refresh_after(resp.headers, None))
+                resp.raise_for_status()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                parsed = await _read_and_parse_async(resp, source_name, limit)
+                refresh_after = _refresh_after(resp.headers, parsed.ttl)
+
+            if cache is not None:
+                cache.store(url, etag, last_modified, parsed.items, limit)
+            source_health.record_success(url, loop.time() - started)
+            return FeedResult(parsed.items, refresh_after=refresh_after)
+
+        except Exception as e:
+            if attempt < plan.max_retries:
+                await asyncio.sleep(config.RSS_BACKOFF_SECONDS * (attempt + 1))
+                continue
+            source_health.record_failure(url, e)
+            print(f"获取 {source_name} 新闻失败: {e}")
+            return FeedResult([], ok=False)
+    return FeedResult([], ok=False)
+
+
+async def fetch_news_from_rss_async(session: "aiohttp.ClientSession", url: str, source_name: str, limit: int = 3) -> List[Dict]:
+    """fetch_news_from_rss 的异步版本（fetch_feed_async 的简化版本）"""
+    return (await fetch_feed_async(session, url, source_name, limit)).items
+
+
+async def _fetch_tasks(
+    tasks: List[FetchTask],
+    deadline: float | None,
+    on_result: Callable[[Tuple[FetchTask, List[Dict]]], None],
+) -> None:
+    """并发抓取，每个任务首次完成时调用 on_result((任务, 条目))；deadline 秒后不再等待其余任务"""
+    connector = aiohttp.TCPConnector(
+        limit=config.RSS_ASYNC_MAX_CONNECTIONS,
+        limit_per_host=config.RSS_ASYNC_MAX_PER_HOST,
+        keepalive_timeout=config.RSS_ASYNC_KEEPALIVE,
+        ttl_dns_cache=300,
+    )
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline_at = started + deadline if deadline else None
+    hedge_at = started + config.RSS_HEDGE_AFTER if config.RSS_HEDGE_AFTER > 0 else None
+    finished: set[FetchTask] = set()
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        def _spawn(task: FetchTask) -> asyncio.Task:
+            url, source_name, limit = task
+            return asyncio.create_task(fetch_news_from_rss_async(session, url, source_name, limit))
+
+        task_map: Dict[asyncio.Task, FetchTask] = {_spawn(t): t for t in tasks}
+        pending = set(task_map)
+        hedges = 0
+        try:
+            while pending and len(finished) < len(tasks):
+                wake_at = min(t for t in (deadline_at, hedge_at, float("inf")) if t is not None)
+                timeout = None if wake_at == float("inf") else max(0.0, wake_at - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for fut in done:
+                    task = task_map[fut]
+                    if task in finished:
+                        continue
+                    finished.add(task)
+                    try:
+                        news = fut.result()
+                    except Exception as e:
+                        print(f"获取 {task[1]} 新闻失败: {e}")
+                        news = []
+                    on_result((task, news))
+
+                now = loop.time()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    for fut in list(pending):
+                        task = task_map[fut]
+                        if task in finished or hedges >= config.RSS_HEDGE_MAX_WORKERS:
+                            continue
+                        print(f"{task[1]} 响应较慢，发起对冲请求")
+                        hedged = _spawn(task)
+                        task_map[hedged] = task
+                        pending.add(hedged)
+                        hedges += 1
+                if deadline_at is not None and now >= deadline_at:
+                    break
+        finally:
+            for fut in pending:
+                fut.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+def fetch_tasks(tasks: List[FetchTask], deadline: float | None = None) -> Iterator[Tuple[FetchTask, List[Dict] | None]]:
+    """同步入口：在后台线程的新事件循环中并发抓取，按完成顺序产出 (任务, 条目)；
+    deadline 秒后未完成的任务产出 None（与线程池后端相同）"""
+    if not tasks:
+        return
+    results: queue.Queue = queue.Queue()
+    end = object()
+
+    def _run() -> None:
+        try:
+            asyncio.run(_fetch_tasks(tasks, deadline, results.put))
+        except Exception as e:
+            print(f"异步抓取失败: {e}")
+        finally:
+            results.put(end)
+
+    threading.Thread(target=_run, name="async-fetch", daemon=True).start()
+    finished: set[FetchTask] = set()
+    while True:
+        result = results.get()
+        if result is end:
+            break
+        finished.add(result[0])
+        yield result
+    for task in tasks:
+        if task not in finished:
+            yield task, None
@@ -0,0 +1,3 @@
+"""
+离线基准测试脚本（在仓库根目录以 python -m benchmarks.<name> 运行）
+"""
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+抓取基准 - 用回放服务离线测量 fetch_all_news（两种后端）与跨分类去重
+
+用法：
+    python -m benchmarks.bench_fetch --dir fixtures/feeds [--latency 0.2 --jitter 0.1 --fail-rate 0.05] [--repeat 3] [--gzip]
+
+夹具目录由 python feed_replay.py record --dir ... 生成。
+注意回放时所有源都落在同一个 host 上，async 后端的 RSS_ASYNC_MAX_PER_HOST 此时相当于全局并发上限。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import config
+import dedup
+import news_fetcher
+from feed_replay import ReplayServer
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="离线抓取基准")
+    ap.add_argument("--dir", required=True)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--backends", default="thread,async")
+    ap.add_argument("--gzip", action="store_true", help="回放服务以 gzip 压缩响应")
+    args = ap.parse_args()
+
+    server = ReplayServer(args.dir, latency=args.latency, jitter=args.jitter, fail_rate=args.fail_rate, seed=0, compress=args.gzip).start()
+    config.RSS_REPLAY_URL = server.url
+    config.RSS_MAX_RETRIES = 0
+    # 每次都完整下载与解析；健康度/条目库写到临时目录，不污染本地状态
+    config.RSS_CACHE_ENABLED = False
+    tmp = tempfile.mkdtemp(prefix="bench_fetch_")
+    config.SOURCE_HEALTH_PATH = os.path.join(tmp, "source_health.json")
+    config.ITEM_STORE_PATH = os.path.join(tmp, "items.sqlite3")
+
+    try:
+        for backend in args.backends.split(","):
+            config.RSS_FETCH_BACKEND = backend
+            samples = []
+            news = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                news = news_fetcher.fetch_all_news()
+                samples.append(time.perf_counter() - start)
+            print(
+                f"[{backend}] fetch_all_news: 中位 {statistics.median(samples):.3f}s, "
+                f"最快 {min(samples):.3f}s, {news_fetcher.count_total_news(news)} 条"
+            )
+
+        items = [it for regions in news.values() for lst in regions.values() for it in lst]
+        start = time.perf_counter()
+        clusters = dedup.find_duplicate_clusters(items)
+        print(f"dedup: {len(items)} 条, {len(clusters)} 个重复簇, {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+解析基准 - 对比 feedparser 全量解析与流式限量解析
+
+用法：
+    python -m benchmarks.bench_parser FEED_DIR_OR_FILE [...] [--limit 3] [--repeat 20]
+
+传入目录时读取其中所有非 .json 文件作为原始 feed 字节。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+import config
+from feed_stream import StreamingFeedParser
+from news_fetcher import _finish_stream_parse, _parse_feed
+
+
+def _collect(paths: List[str]) -> List[Tuple[str, bytes]]:
+    feeds: List[Tuple[str, bytes]] = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if not n.endswith(".json"))
+            files = [os.path.join(path, n) for n in names]
+        else:
+            files = [path]
+        for file_path in files:
+            with open(file_path, "rb") as file:
+                feeds.append((os.path.basename(file_path), file.read()))
+    return feeds
+
+
+def _full(raw: bytes, limit: int) -> List:
+    return _parse_feed(raw, "bench", limit).items
+
+
+def _streaming(raw: bytes, limit: int) -> List:
+    parser = StreamingFeedParser(limit)
+    size = config.RSS_READ_CHUNK_SIZE
+    for offset in range(0, len(raw), size):
+        if parser.feed(raw[offset : offset + size]):
+            break
+    return _finish_stream_parse(parser, "bench", limit).items
+
+
+def _time(fn: Callable[[bytes, int], List], raw: bytes, limit: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw, limit)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="feedparser vs 流式解析")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--limit", type=int, default=config.NEWS_PER_SOURCE)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    feeds = _collect(args.paths)
+    if not feeds:
+        raise SystemExit("没有找到 feed 文件")
+
+    print(f"{'feed':<44} {'KB':>8} {'feedparser ms':>14} {'stream ms':>10} {'加速':>7} {'一致':>4}")
+    total_full = total_stream = 0.0
+    for name, raw in feeds:
+        full_ms = _time(_full, raw, args.limit, args.repeat)
+        stream_ms = _time(_streaming, raw, args.limit, args.repeat)
+        same = [it["link"] for it in _full(raw, args.limit)] == [it["link"] for it in _streaming(raw, args.limit)]
+        total_full += full_ms
+        total_stream += stream_ms
+        speedup = full_ms / stream_ms if stream_ms else float("inf")
+        print(f"{name[:44]:<44} {len(raw) / 1024:>8.1f} {full_ms:>14.2f} {stream_ms:>10.2f} {speedup:>6.1f}x {'是' if same else '否':>4}")
+
+    print(f"\n合计: feedparser {total_full:.1f} ms, 流式 {total_stream:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+端到端流水线基准 - 在本地替身上运行 main.run_once 与 morning_main.run_once
+
+- RSS：按规模合成夹具，由 ReplayServer 回放（可注入延迟）
+- LLM：OpenAI 兼容的假服务，按 基础延迟 + prompt/prefill 速率 + completion/decode 速率 模拟耗时
+- 邮件：本地 SMTP 收件箱（跳过 STARTTLS）
+
+每个规模在独立临时目录中运行（缓存、健康度、条目库互不影响），输出各阶段耗时、
+峰值内存（tracemalloc）、吞吐（条/秒）以及 LLM 请求数与 token 数。
+tracemalloc 会显著拖慢分配密集的阶段（如流式输出逐块解析），只看耗时时加 --no-tracemalloc。
+
+用法：
+    python -m benchmarks.bench_pipeline [--scales 10,100,1000,5000] [--pipelines main,morning]
+        [--llm-latency 0.3 --decode-tps 80 --prefill-tps 4000 --completion-tokens 600]
+        [--feed-latency 0.05] [--backend thread] [--no-pipeline] [--no-tracemalloc] [--verbose]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import inspect
+import io
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import config
+import email_sender
+import main as digest_main
+import morning_main
+from benchmarks.fakes import FakeLLMServer, SmtpSink, plain_smtp_module, synthesize_feeds
+from feed_replay import ReplayServer
+
+# 各流水线中需要计时的阶段：(模块, 属性名, 阶段名)
+_STAGES = {
+    "main": [
+        (digest_main, "latest_news", "fetch"),
+        (digest_main, "latest_news_by_category", "fetch"),
+        (digest_main, "_collect_pipelined", "fetch+summarize"),
+        (digest_main, "format_news_for_summary", "format"),
+        (digest_main, "generate_summary", "summarize"),
+        (digest_main, "send_news_digest", "email"),
+    ],
+    "morning": [
+        (morning_main, "latest_news", "fetch"),
+        (morning_main, "generate_morning_article", "article"),
+        (morning_main, "send_email", "email"),
+    ],
+}
+
+_RUNNERS: Dict[str, Callable[[], bool]] = {
+    "main": lambda: digest_main.run_once(),
+    "morning": lambda: morning_main.run_once(),
+}
+
+
+@contextlib.contextmanager
+def _timed_stages(pipeline: str, timings: Dict[str, float], counts: Dict[str, int]):
+    """临时替换模块函数，记录每个阶段的耗时；fetch 阶段顺便记录条目数（排序截断之前）
+
+    生成器（流水线逐分类抓取）记录从开始到最后一个分类产出的耗时。
+    """
+    originals = []
+    for module, attr, stage in _STAGES[pipeline]:
+        fn = getattr(module, attr)
+        originals.append((module, attr, fn))
+
+        def wrapper(*args, _fn=fn, _stage=stage, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = _fn(*args, **kwargs)
+            finally:
+                timings[_stage] = timings.get(_stage, 0.0) + time.perf_counter() - start
+            if _stage == "fetch":
+                counts["items"] = sum(len(lst) for regions in result.values() for lst in regions.values())
+            return result
+
+        def gen_wrapper(*args, _fn=fn, _stage=stage, **kwargs):
+            start = time.perf_counter()
+            for category_key, news in _fn(*args, **kwargs):
+                counts["items"] += sum(len(lst) for lst in news[category_key].values())
+                timings[_stage] = time.perf_counter() - start
+                yield category_key, news
+
+        setattr(module, attr, gen_wrapper if inspect.isgeneratorfunction(fn) else wrapper)
+    try:
+        yield
+    finally:
+        for module, attr, fn in originals:
+            setattr(module, attr, fn)
+
+
+def _isolate_state(tmp: str) -> None:
+    config.CACHE_DIR = tmp
+    config.RSS_CACHE_PATH = os.path.join(tmp, "rss_cache.json")
+    config.SOURCE_HEALTH_PATH = os.path.join(tmp, "source_health.json")
+    config.ITEM_STORE_PATH = os.path.join(tmp, "items.sqlite3")
+    config.LLM_CACHE_DIR = os.path.join(tmp, "llm")
+    config.TRANSLATION_MEMORY_PATH = os.path.join(tmp, "translations.sqlite3")
+
+
+def run_scale(scale: int, args, llm: FakeLLMServer, sink: SmtpSink) -> List[Dict]:
+    tmp = tempfile.mkdtemp(prefix=f"bench_pipeline_{scale}_")
+    fixtures = os.path.join(tmp, "feeds")
+    per_feed = synthesize_feeds(fixtures, scale, dup_rate=args.dup_rate)
+    replay = ReplayServer(fixtures, latency=args.feed_latency, seed=0).start()
+    config.RSS_REPLAY_URL = replay.url
+    config.NEWS_PER_SOURCE = per_feed
+
+    rows = []
+    try:
+        for pipeline in args.pipelines.split(","):
+            _isolate_state(os.path.join(tmp, pipeline))
+            llm_before = dict(llm.stats)
+            mails_before = len(sink.messages)
+            timings: Dict[str, float] = {}
+            counts: Dict[str, int] = {"items": 0}
+
+            if args.tracemalloc:
+                tracemalloc.start()
+            start = time.perf_counter()
+            out = io.StringIO()
+            with _timed_stages(pipeline, timings, counts):
+                with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(out):
+                    ok = _RUNNERS[pipeline]()
+            total = time.perf_counter() - start
+            peak = 0
+            if args.tracemalloc:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            rows.append({
+                "pipeline": pipeline,
+                "scale": scale,
+                "ok": ok,
+                "items": counts["items"],
+                "total": total,
+                "stages": timings,
+                "peak_mb": peak / 1024 / 1024,
+                "llm_calls": llm.stats["requests"] - llm_before["requests"],
+                "prompt_tokens": llm.stats["prompt_tokens"] - llm_before["prompt_tokens"],
+                "completion_tokens": llm.stats["completion_tokens"] - llm_before["completion_tokens"],
+                "mails": len(sink.messages) - mails_before,
+            })
+            if not ok and not args.verbose:
+                print(out.getvalue()[-2000:])
+    finally:
+        replay.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return rows
+
+
+def print_row(row: Dict) -> None:
+    stages = ", ".join(f"{k} {v:.2f}s" for k, v in row["stages"].items())
+    throughput = row["items"] / row["total"] if row["total"] else 0.0
+    print(
+        f"[{row['pipeline']:<7}] 规模 {row['scale']:>5} | {'成功' if row['ok'] else '失败'} | "
+        f"{row['items']:>5} 条 | 总计 {row['total']:.2f}s ({stages}) | "
+        f"峰值 {row['peak_mb']:.1f} MB | {throughput:.0f} 条/s | "
+        f"LLM {row['llm_calls']} 次, prompt {row['prompt_tokens']} / completion {row['completion_tokens']} tokens | "
+        f"邮件 {row['mails']} 封"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="端到端流水线基准")
+    ap.add_argument("--scales", default="10,100,1000,5000")
+    ap.add_argument("--pipelines", default="main,morning")
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--decode-tps", type=float, default=80.0)
+    ap.add_argument("--prefill-tps", type=float, default=4000.0)
+    ap.add_argument("--completion-tokens", type=int, default=600)
+    ap.add_argument("--llm-fail-rate", type=float, default=0.0)
+    ap.add_argument("--feed-latency", type=float, default=0.05)
+    ap.add_argument("--dup-rate", type=float, default=0.1)
+    ap.add_argument("--backend", default=config.RSS_FETCH_BACKEND)
+    ap.add_argument("--no-pipeline", dest="pipeline", action="store_false", help="先抓取全部新闻再生成摘要（对比流水线）")
+    ap.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false", help="不统计峰值内存（避免其开销影响耗时）")
+    ap.add_argument("--verbose", action="store_true", help="显示流水线自身输出")
+    args = ap.parse_args()
+
+    llm = FakeLLMServer(
+        latency=args.llm_latency,
+        decode_tps=args.decode_tps,
+        prefill_tps=args.prefill_tps,
+        completion_tokens=args.completion_tokens,
+        fail_rate=args.llm_fail_rate,
+        seed=0,
+    ).start()
+    sink = SmtpSink().start()
+
+    config.DEEPSEEK_API_KEY = "bench"
+    config.DEEPSEEK_BASE_URL = llm.url
+    config.SMTP_SERVER = "127.0.0.1"
+    config.SMTP_PORT = sink.port
+    config.SENDER_EMAIL = "bench@example.com"
+    config.SENDER_PASSWORD = "bench"
+    config.RECEIVER_EMAIL = "inbox@example.com"
+    config.RSS_FETCH_BACKEND = args.backend
+    config.RSS_MAX_RETRIES = 0
+    config.POLLER_ENABLED = False
+    digest_main.PIPELINE_ENABLED = args.pipeline
+    email_sender.smtplib = plain_smtp_module(email_sender.smtplib)
+
+    try:
+        for scale in (int(s) for s in args.scales.split(",")):
+            for row in run_scale(scale, args, llm, sink):
+                print_row(row)
+    finally:
+        llm.stop()
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
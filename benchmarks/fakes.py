@@ -0,0 +1,389 @@
+"""
+基准测试用的本地替身：OpenAI 兼容的假 LLM 服务、SMTP 收件箱、合成 RSS 夹具
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List
+
+import config
+from feed_replay import _QuietHTTPServer, save_fixture
+
+_FILLER = "市场关注政策变化与企业盈利前景，分析人士认为短期波动仍将持续，投资者需要留意后续数据发布。"
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：ASCII 约 4 字符 1 token，非 ASCII 约 0.6 token/字符"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) * 0.6) + 1
+
+
+def _filler(chars: int) -> str:
+    return (_FILLER * (chars // len(_FILLER) + 1))[:chars]
+
+
+def _digest_reply(user: str, completion_tokens: int) -> str:
+    headers = re.findall(r"^(## .+)$", user, flags=re.MULTILINE) or ["## 📰 其他要闻"]
+    headers = list(dict.fromkeys(headers))
+    if "只输出今日要点" in user:
+        headers = [h for h in headers if "今日要点" in h] or ["## 📌 今日要点"]
+    per_section = max(40, int(completion_tokens / 0.6 / len(headers)))
+    parts = []
+    for header in headers:
+        if "今日要点" in header:
+            parts.append(f"{header}\n\n" + "\n".join(f"- **{name}**：{_filler(30)}" for name in ("金融", "政治", "科技", "币圈")))
+            continue
+        parts.append(f"{header}\n\n1. **新闻标题** - {_filler(per_section)}")
+    return "\n\n".join(parts)
+
+
+def _translation_reply(user: str) -> str:
+    ids = re.findall(r"^\[(\d+)\]", user, flags=re.MULTILINE)
+    return "\n".join(f"[{i}] 新闻标题{i} | {_filler(60)}" for i in ids)
+
+
+def _json_digest_reply(user: str) -> str:
+    """JSON 模式的摘要：整篇、单个分类（地区对象或 items 数组）或今日要点"""
+    def items(n: int) -> list:
+        return [{"title": f"新闻标题{i}", "summary": _filler(60)} for i in range(1, n + 1)]
+
+    regions = {r: items(2) for r in ("usa", "europe", "japan_korea", "aunz")}
+    points = {name: _filler(30) for name in ("金融", "政治", "科技", "币圈")}
+    if '"key_points"' in user:
+        reply = {key: regions for key in ("finance", "politics", "tech", "other")}
+        reply.update(crypto=items(3), key_points=points)
+    elif '"items"' in user:
+        reply = {"items": items(3)}
+    elif '"usa"' in user:
+        reply = regions
+    else:
+        reply = points
+    return json.dumps(reply, ensure_ascii=False)
+
+
+def _plan_reply(user: str) -> str:
+    ids = list(dict.fromkeys(re.findall(r"\bN\d{3}\b", user)))[:3] or ["N001"]
+    plan = {
+        "theme_title": "AI 算力投资与市场预期",
+        "thesis": _filler(30),
+        "supporting_ids": ids,
+        "outline": {
+            "hook_3_sentences": [_filler(20)] * 3,
+            "fact_cards": [{"id": i, "point": _filler(20)} for i in ids],
+            "causal_chain": ["需求→资本开支", "资本开支→供应链", "供应链→盈利", "盈利→估值"],
+            "second_order": [_filler(20)] * 2,
+            "risks_counterpoints": [_filler(20)] * 2,
+            "conclusion_3_sentences": [_filler(20)] * 3,
+            "watchlist": [_filler(10)] * 3,
+        },
+    }
+    return json.dumps(plan, ensure_ascii=False)
+
+
+def _article_reply() -> str:
+    target = (config.MORNING_ARTICLE_MIN_CHARS + config.MORNING_ARTICLE_MAX_CHARS) // 2
+    sections = ["30秒导语", "事实卡片", "分析主干", "结论", "观察清单", "参考链接"]
+    per = target // len(sections)
+    body = "\n\n".join(f"## {s}\n{_filler(per)}" for s in sections)
+    return f"# AI 算力投资与市场预期\n\n{body}"
+
+
+def fake_completion(system: str, user: str, completion_tokens: int) -> str:
+    """按提示词类型生成结构上可用的回复"""
+    if "JSON schema" in user:
+        return _plan_reply(user)
+    if "以 JSON 输出" in user:
+        return _json_digest_reply(user)
+    if "逐条翻译" in user:
+        return _translation_reply(user)
+    if "选题与大纲" in user or "请把下面文章调整" in user:
+        return _article_reply()
+    return _digest_reply(user, completion_tokens)
+
+
+class FakeLLMServer:
+    """OpenAI 兼容的 /chat/completions 假服务
+
+    延迟模型：latency + 未命中缓存的 prompt_tokens / prefill_tps + completion_tokens / decode_tps；
+    stream=True 时按块输出 SSE。fail_rate 概率返回 429（带 Retry-After）。
+
+    前缀缓存（prefix_cache=True）：与此前请求相同的提示词前缀（system + user，按 cache_unit 个字符对齐）
+    视为命中，usage 中按 DeepSeek 的格式返回 prompt_cache_hit_tokens / prompt_cache_miss_tokens。
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.3,
+        decode_tps: float = 80.0,
+        prefill_tps: float = 4000.0,
+        completion_tokens: int = 600,
+        fail_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int | None = None,
+        prefix_cache: bool = True,
+        cache_unit: int = 128,
+    ):
+        self.latency = latency
+        self.decode_tps = decode_tps
+        self.prefill_tps = prefill_tps
+        self.completion_tokens = completion_tokens
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.prefix_cache = prefix_cache
+        self.cache_unit = max(1, cache_unit)
+        self._prefixes: set = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0, "failures": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+        }
+        self._httpd = _QuietHTTPServer(("127.0.0.1", 0), self._handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+
+    def _cache_hit_tokens(self, prompt: str) -> int:
+        """最长的已缓存前缀折算的 token 数，并把本次提示词的各级前缀加入缓存"""
+        if not self.prefix_cache:
+            return 0
+        ends = range(self.cache_unit, len(prompt) + 1, self.cache_unit)
+        keys = [hashlib.sha1(prompt[:end].encode("utf-8")).digest() for end in ends]
+        with self._lock:
+            hit = 0
+            for n, key in enumerate(keys, 1):
+                if key not in self._prefixes:
+                    break
+                hit = n
+            self._prefixes.update(keys)
+        return estimate_tokens(prompt[: hit * self.cache_unit]) if hit else 0
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.fail_rate
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # SSE 小块写入时避免 Nagle + 延迟 ACK 带来的额外等待
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, payload: Dict, headers: Dict[str, str] | None = None) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                req = json.loads(self.rfile.read(length) or b"{}")
+                server._record(requests=1)
+                if server._should_fail():
+                    server._record(failures=1)
+                    self._json(
+                        429,
+                        {"error": {"message": "rate limited (injected)", "type": "rate_limit_error"}},
+                        {"Retry-After": f"{server.retry_after:g}"},
+                    )
+                    return
+
+                messages = req.get("messages", [])
+                system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+                user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+                prompt_tokens = estimate_tokens(system + user)
+                cached_tokens = min(prompt_tokens, server._cache_hit_tokens(system + user))
+                budget = min(int(req.get("max_tokens") or server.completion_tokens), server.completion_tokens)
+                content = fake_completion(system, user, budget)
+                completion_tokens = estimate_tokens(content)
+                server._record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached_tokens)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_cache_hit_tokens": cached_tokens,
+                    "prompt_cache_miss_tokens": prompt_tokens - cached_tokens,
+                }
+
+                time.sleep(server.latency + (prompt_tokens - cached_tokens) / server.prefill_tps)
+                if req.get("stream"):
+                    self._stream(req, content, completion_tokens, usage)
+                    return
+                time.sleep(completion_tokens / server.decode_tps)
+                self._json(200, {
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": req.get("model", "deepseek-chat"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+
+            def _stream(self, req: Dict, content: str, completion_tokens: int, usage: Dict) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [content[i : i + 24] for i in range(0, len(content), 24)] or [""]
+                per_piece = completion_tokens / server.decode_tps / len(pieces)
+
+                def _event(payload: Dict | str) -> None:
+                    data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+                    raw = f"data: {data}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(raw):X}\r\n".encode() + raw + b"\r\n")
+                    self.wfile.flush()
+
+                base = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": req.get("model", "deepseek-chat")}
+                for piece in pieces:
+                    time.sleep(per_piece)
+                    _event(dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+                _event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                if (req.get("stream_options") or {}).get("include_usage"):
+                    _event(dict(base, choices=[], usage=usage))
+                _event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class SmtpSink:
+    """最小 SMTP 收件箱：接受 EHLO / AUTH / MAIL / RCPT / DATA，把邮件存入 messages（不支持 TLS）"""
+
+    def __init__(self):
+        self.messages: List[bytes] = []
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _reply(self, line: str) -> None:
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                self._reply("220 bench-smtp ready")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    cmd = line.decode("ascii", "replace").strip().upper()
+                    if cmd.startswith(("EHLO", "HELO")):
+                        self._reply("250-bench-smtp")
+                        self._reply("250 AUTH PLAIN LOGIN")
+                    elif cmd.startswith("AUTH"):
+                        self._reply("235 ok")
+                    elif cmd.startswith("DATA"):
+                        self._reply("354 end with .")
+                        chunks = []
+                        while True:
+                            data = self.rfile.readline()
+                            if not data or data == b".\r\n":
+                                break
+                            chunks.append(data)
+                        sink.messages.append(b"".join(chunks))
+                        self._reply("250 queued")
+                    elif cmd.startswith("QUIT"):
+                        self._reply("221 bye")
+                        return
+                    else:
+                        self._reply("250 ok")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "SmtpSink":
+        threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def synthesize_feeds(directory: str, total_items: int, dup_rate: float = 0.1, seed: int = 0) -> int:
+    """为 config.NEWS_SOURCES 的每个唯一 URL 生成合成 RSS 夹具，总条目约 total_items
+
+    dup_rate 比例的条目复用其他源的标题（模拟通稿转载），用于覆盖去重开销。返回每个源的条目数。
+    """
+    rng = random.Random(seed)
+    urls = list(dict.fromkeys(
+        s["url"] for regions in config.NEWS_SOURCES.values() for sources in regions.values() for s in sources
+    ))
+    per_feed = max(1, math.ceil(total_items / len(urls)))
+    titles: List[str] = []
+    for f, url in enumerate(urls):
+        items = []
+        for i in range(per_feed):
+            if titles and rng.random() < dup_rate:
+                title = rng.choice(titles)
+            else:
+                words = " ".join(f"w{rng.randrange(20000)}" for _ in range(9))
+                title = f"Story {f}-{i} {words}"
+                titles.append(title)
+            summary = " ".join(f"s{rng.randrange(20000)}" for _ in range(45))
+            items.append(
+                f"<item><title>{title}</title><link>https://feed{f}.example.com/{i}</link>"
+                f"<description>{summary}</description><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>"
+            )
+        body = (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>bench</title>'
+            + "".join(items)
+            + "</channel></rss>"
+        ).encode("utf-8")
+        save_fixture(directory, url, 200, {"Content-Type": "application/rss+xml", "ETag": f'"b{f}"'}, body)
+    return per_feed
+
+
+def plain_smtp_module(real_smtplib):
+    """返回一个替代 smtplib 的对象：SMTP 跳过 STARTTLS（本地收件箱不支持 TLS），其余走真实协议"""
+
+    class PlainSMTP(real_smtplib.SMTP):
+        def starttls(self, *args, **kwargs):
+            return (220, b"bench: TLS skipped")
+
+    class _Module:
+        SMTP = PlainSMTP
+        SMTP_SSL = PlainSMTP
+
+    return _Module
+
+
+__all__ = [
+    "FakeLLMServer",
+    "SmtpSink",
+    "estimate_tokens",
+    "plain_smtp_module",
+    "synthesize_feeds",
+]
@@ -18,6 +18,14 @@ def _load_dotenv(path: str) -> None:
 
 _load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
 # DeepSeek API 配置
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
 DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
@@ -34,7 +42,37 @@ SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", "180"))
 SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "2000"))
 SUMMARY_TEMPERATURE = float(os.getenv("SUMMARY_TEMPERATURE", "0.7"))
 SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "3"))
-SUMMARY_MAX_INPUT_CHARS = int(os.getenv("SUMMARY_MAX_INPUT_CHARS", "8000"))
+# 单次请求的输入 token 预算：整篇请求超出时改为按分类分块，单个分类超出时按地区截掉排名靠后的条目
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "12000"))
+# 每条新闻摘要的预计输出 token 数（用于分配 max_tokens 与估算耗时）
+SUMMARY_TOKENS_PER_ITEM = int(os.getenv("SUMMARY_TOKENS_PER_ITEM", "70"))
+# 规划时 1 美分费用折算的秒数：越大越倾向于少发请求，越小越倾向于并发分块
+SUMMARY_PLAN_SECONDS_PER_CENT = float(os.getenv("SUMMARY_PLAN_SECONDS_PER_CENT", "10"))
+# 流式输出：按 "## " 段落逐段交付；中途超时/断开时保留已完成的段落
+SUMMARY_STREAM = _env_flag("SUMMARY_STREAM", "1")
+# 输出格式：json 为模型返回紧凑 JSON、本地校验并渲染成 Markdown（不合格的分类单独重问，最多 SUMMARY_JSON_REASKS 次）；
+# markdown（默认）为模型直接按模板输出
+SUMMARY_FORMAT = os.getenv("SUMMARY_FORMAT", "markdown").strip().lower()
+SUMMARY_JSON_REASKS = int(os.getenv("SUMMARY_JSON_REASKS", "1"))
+
+# 分段失败隔离：某个分类（或翻译批次）的请求重试用尽后单独再试，最多 SUMMARY_SECTION_RETRIES 次；
+# SUMMARY_RETRY_BUDGET 为摘要开始（流水线模式为抓取开始）后的时限：单独重试只尝试一次且不超过剩余时间，
+# 流水线模式等待各分类与今日要点也以此为限。仍失败或到时未完成的分类改用本地抽取的重要标题
+# （每个地区前 SUMMARY_FALLBACK_ITEMS 条），今日要点改用各分类的首条新闻，其余分类照常发送
+SUMMARY_SECTION_RETRIES = int(os.getenv("SUMMARY_SECTION_RETRIES", "1"))
+SUMMARY_RETRY_BUDGET = float(os.getenv("SUMMARY_RETRY_BUDGET", "300"))
+SUMMARY_FALLBACK_ITEMS = int(os.getenv("SUMMARY_FALLBACK_ITEMS", "3"))
+
+# 今日要点预生成：与各分类摘要并发，直接根据排名靠前的新闻标题生成，分类摘要完成后在本地核对
+# （某领域的要点在对应分类摘要中找不到时改用该分类的首条新闻）；关闭（默认）时等分类摘要全部完成后再生成
+KEY_POINTS_SPECULATIVE = _env_flag("KEY_POINTS_SPECULATIVE", "0")
+# 核对时要点与对应分类摘要的字词覆盖率（见 key_points.match_score）达到该值即视为一致；
+# 0.25 按转述样例校准：正确的转述约 0.33-0.9，其他事件多在 0.15 以下（“澳洲联储/美联储”这类同名机构仍会误判为一致）
+KEY_POINTS_MATCH_THRESHOLD = float(os.getenv("KEY_POINTS_MATCH_THRESHOLD", "0.25"))
+
+# 流水线：每个分类的源全部返回（或超时）即开始生成该分类的摘要，抓取与 LLM 请求重叠；
+# 关闭时先抓取全部新闻，再整体规划摘要（可能合并为一次请求）
+PIPELINE_ENABLED = _env_flag("PIPELINE_ENABLED", "1")
 
 # 晨读分析短文配置（单主题、可朗读）
 MORNING_ARTICLE_TIMEOUT = float(os.getenv("MORNING_ARTICLE_TIMEOUT", "180"))
@@ -44,6 +82,47 @@ MORNING_ARTICLE_MAX_RETRIES = int(os.getenv("MORNING_ARTICLE_MAX_RETRIES", "3"))
 MORNING_ARTICLE_MIN_CHARS = int(os.getenv("MORNING_ARTICLE_MIN_CHARS", "650"))
 MORNING_ARTICLE_MAX_CHARS = int(os.getenv("MORNING_ARTICLE_MAX_CHARS", "1200"))
 
+# DeepSeek 连接池（进程内共享）：分块总结会同时发出 5 个分类请求，晨读短文可能与之并行
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "8"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "120"))
+
+# LLM 调度：每分钟请求数 / token 数上限（0 表示不限）、全局并发、失败重试的退避（秒）
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", str(LLM_MAX_CONNECTIONS)))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "2"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+# LLM 耗时/费用模型（token 预算规划用）：基础延迟（秒）、预填充/解码速率（token/秒）、每百万 token 单价（美元）
+LLM_EST_LATENCY = float(os.getenv("LLM_EST_LATENCY", "1.0"))
+LLM_EST_PREFILL_TPS = float(os.getenv("LLM_EST_PREFILL_TPS", "2000"))
+LLM_EST_DECODE_TPS = float(os.getenv("LLM_EST_DECODE_TPS", "40"))
+# 每个请求额外折算的秒数（排队、失败与限流配额）：避免为了并发切出过多的小请求；设置 LLM_RPM 时另加 60 / LLM_RPM
+LLM_EST_REQUEST_OVERHEAD = float(os.getenv("LLM_EST_REQUEST_OVERHEAD", "1.0"))
+LLM_PRICE_INPUT = float(os.getenv("LLM_PRICE_INPUT", "0.27"))
+# 命中服务端上下文缓存（相同提示词前缀）的输入单价
+LLM_PRICE_INPUT_CACHED = float(os.getenv("LLM_PRICE_INPUT_CACHED", "0.07"))
+LLM_PRICE_OUTPUT = float(os.getenv("LLM_PRICE_OUTPUT", "1.10"))
+
+# 每次 LLM 调用的记录（提示词、排队/首 token/总耗时、token 用量、重试、估算费用）追加写入的 JSONL，空字符串表示不写入
+LLM_METRICS_PATH = os.getenv("LLM_METRICS_PATH", os.path.join(CACHE_DIR, "llm_calls.jsonl")).strip()
+
+# LLM 响应缓存：相同 (model, system, user, temperature, max_tokens) 直接复用上次结果
+# LLM_CACHE_BYPASS=1 时不读缓存（仍写入新结果），用于强制重新生成
+LLM_CACHE_ENABLED = _env_flag("LLM_CACHE_ENABLED", "1")
+LLM_CACHE_BYPASS = _env_flag("LLM_CACHE_BYPASS", "0")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(CACHE_DIR, "llm"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# 译文记忆（SQLite）：按条目（规范化链接 + 内容哈希）保存中文标题与摘要，只把新条目发给 LLM 翻译
+TRANSLATION_MEMORY_ENABLED = _env_flag("TRANSLATION_MEMORY_ENABLED", "1")
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join(CACHE_DIR, "translations.sqlite3"))
+TRANSLATION_MEMORY_RETENTION_DAYS = int(os.getenv("TRANSLATION_MEMORY_RETENTION_DAYS", "30"))
+# 每次翻译请求最多 / 最少包含的条目数（条目不足最少条数时一批发完）
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "20"))
+TRANSLATION_MIN_BATCH_SIZE = int(os.getenv("TRANSLATION_MIN_BATCH_SIZE", "5"))
+
 # RSS 抓取超时（秒）
 RSS_TIMEOUT = int(os.getenv("RSS_TIMEOUT", "15"))
 RSS_MAX_WORKERS = int(os.getenv("RSS_MAX_WORKERS", "8"))
@@ -53,6 +132,69 @@ RSS_USER_AGENT = os.getenv(
     "RSS_USER_AGENT",
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
 )
+# 整体抓取时限（秒，0 表示等待全部源）；到时返回已完成的部分
+RSS_FETCH_DEADLINE = float(os.getenv("RSS_FETCH_DEADLINE", "0"))
+# 对冲请求：超过该秒数仍未返回的源再发一次请求，先完成者生效（0 表示关闭）
+RSS_HEDGE_AFTER = float(os.getenv("RSS_HEDGE_AFTER", "0"))
+RSS_HEDGE_MAX_WORKERS = int(os.getenv("RSS_HEDGE_MAX_WORKERS", "4"))
+# 抓取后端："thread"（线程池 + urlopen）或 "async"（asyncio + aiohttp 连接池）
+RSS_FETCH_BACKEND = os.getenv("RSS_FETCH_BACKEND", "thread").strip().lower()
+RSS_ASYNC_MAX_CONNECTIONS = int(os.getenv("RSS_ASYNC_MAX_CONNECTIONS", "64"))
+RSS_ASYNC_MAX_PER_HOST = int(os.getenv("RSS_ASYNC_MAX_PER_HOST", "4"))
+RSS_ASYNC_KEEPALIVE = float(os.getenv("RSS_ASYNC_KEEPALIVE", "30"))
+# 流式解析：边下载边解析，取够 NEWS_PER_SOURCE 条即停止读取（XML 不规范时回退 feedparser）
+RSS_STREAM_PARSE = _env_flag("RSS_STREAM_PARSE", "1")
+RSS_READ_CHUNK_SIZE = int(os.getenv("RSS_READ_CHUNK_SIZE", "16384"))
+# 压缩传输（gzip / deflate，装有 brotli 时含 br）；单个 feed 解压后的字节上限（0 表示不限），
+# 超限时截断到最后一个完整条目
+RSS_COMPRESSION = _env_flag("RSS_COMPRESSION", "1")
+RSS_MAX_BODY_BYTES = int(os.getenv("RSS_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+# 回放服务地址（见 feed_replay.py）；设置后所有源请求都改发到本地回放服务
+RSS_REPLAY_URL = os.getenv("RSS_REPLAY_URL", "").strip()
+# RSS 条件请求缓存（ETag / Last-Modified），命中 304 时复用上次解析结果
+RSS_CACHE_ENABLED = _env_flag("RSS_CACHE_ENABLED", "1")
+RSS_CACHE_PATH = os.getenv("RSS_CACHE_PATH", os.path.join(CACHE_DIR, "feed_cache.json"))
+
+# 新闻源健康度：连续失败熔断 + 按历史延迟自适应超时
+SOURCE_HEALTH_ENABLED = _env_flag("SOURCE_HEALTH_ENABLED", "1")
+SOURCE_HEALTH_PATH = os.getenv("SOURCE_HEALTH_PATH", os.path.join(CACHE_DIR, "source_health.json"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "1800"))
+CIRCUIT_MAX_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_MAX_COOLDOWN_SECONDS", "21600"))
+RSS_TIMEOUT_MIN = float(os.getenv("RSS_TIMEOUT_MIN", "3"))
+RSS_TIMEOUT_FACTOR = float(os.getenv("RSS_TIMEOUT_FACTOR", "3"))
+
+# 后台轮询：常驻进程内按各源刷新间隔持续抓取，触发时直接使用内存快照
+POLLER_ENABLED = _env_flag("POLLER_ENABLED", "0")
+POLLER_DEFAULT_INTERVAL = float(os.getenv("POLLER_DEFAULT_INTERVAL", "900"))
+POLLER_MIN_INTERVAL = float(os.getenv("POLLER_MIN_INTERVAL", "120"))
+POLLER_MAX_INTERVAL = float(os.getenv("POLLER_MAX_INTERVAL", "3600"))
+
+# 跨分类近似去重（同一通稿出现在多个分类/地区时只保留一条）
+DEDUP_GLOBAL = _env_flag("DEDUP_GLOBAL", "1")
+DEDUP_TITLE_THRESHOLD = float(os.getenv("DEDUP_TITLE_THRESHOLD", "0.6"))
+DEDUP_SUMMARY_THRESHOLD = float(os.getenv("DEDUP_SUMMARY_THRESHOLD", "0.6"))
+
+# 本地重要性排序：摘要前每个地区只保留分数最高的 K 条（0 表示不截断）
+RANK_ENABLED = _env_flag("RANK_ENABLED", "1")
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "4"))
+RANK_TOP_K_CRYPTO = int(os.getenv("RANK_TOP_K_CRYPTO", "5"))
+RANK_HALF_LIFE_HOURS = float(os.getenv("RANK_HALF_LIFE_HOURS", "12"))
+# 标题词集合的 Jaccard 相似度达到该值即视为同一事件的其他来源报道
+RANK_COVERAGE_THRESHOLD = float(os.getenv("RANK_COVERAGE_THRESHOLD", "0.35"))
+RANK_WEIGHT_RECENCY = float(os.getenv("RANK_WEIGHT_RECENCY", "1"))
+RANK_WEIGHT_SOURCE = float(os.getenv("RANK_WEIGHT_SOURCE", "0.5"))
+RANK_WEIGHT_COVERAGE = float(os.getenv("RANK_WEIGHT_COVERAGE", "1.5"))
+RANK_WEIGHT_KEYWORD = float(os.getenv("RANK_WEIGHT_KEYWORD", "1"))
+# 每次排序的统计追加到该 JSONL 文件（为空则不写）
+RANK_STATS_PATH = os.getenv("RANK_STATS_PATH", "").strip()
+
+# 新闻条目库（SQLite）：记录首次/最近出现时间与发送状态
+ITEM_STORE_ENABLED = _env_flag("ITEM_STORE_ENABLED", "1")
+ITEM_STORE_PATH = os.getenv("ITEM_STORE_PATH", os.path.join(CACHE_DIR, "items.sqlite3"))
+ITEM_STORE_RETENTION_DAYS = int(os.getenv("ITEM_STORE_RETENTION_DAYS", "30"))
+# 只推送此前未发送过的新闻（适合一天多次运行；只作用于新闻摘要，晚读短文不受影响）
+ONLY_NEW_ITEMS = _env_flag("ONLY_NEW_ITEMS", "0")
 
 # 定时任务配置
 # 24小时制 "HH:MM"，为空则不启用内部定时
@@ -160,3 +302,34 @@ NEWS_SOURCES = {
 
 # 每个来源获取的新闻数量
 NEWS_PER_SOURCE = 3
+
+# 重要性排序的来源权重（未列出的来源为 1.0）
+RANK_SOURCE_WEIGHTS = {
+    "Bloomberg": 1.3,
+    "Wall Street Journal": 1.3,
+    "Financial Times": 1.3,
+    "Reuters Business": 1.3,
+    "Nikkei Asia": 1.2,
+    "AP News": 1.2,
+    "BBC World": 1.2,
+    "CoinDesk": 1.2,
+    "The Block": 1.1,
+    "Politico": 1.1,
+    "Ars Technica": 1.1,
+}
+
+# 重要性排序的关键词权重（小写单词，匹配标题与摘要）
+RANK_KEYWORDS = {
+    # 宏观与市场
+    "fed": 1.0, "ecb": 1.0, "boj": 1.0, "rba": 0.8, "inflation": 1.0, "rate": 0.6, "rates": 0.6,
+    "gdp": 0.8, "recession": 1.0, "tariff": 1.0, "tariffs": 1.0, "earnings": 0.6, "stocks": 0.4,
+    "bond": 0.5, "yields": 0.6, "oil": 0.5, "default": 0.8, "merger": 0.7, "acquisition": 0.7, "ipo": 0.6,
+    # 政治与安全
+    "election": 1.0, "sanctions": 0.9, "war": 1.0, "ceasefire": 1.0, "summit": 0.7, "president": 0.4,
+    "minister": 0.3, "parliament": 0.4, "missile": 0.9, "treaty": 0.7,
+    # 科技
+    "ai": 0.8, "chip": 0.8, "chips": 0.8, "semiconductor": 0.8, "antitrust": 0.8, "regulation": 0.6,
+    "breach": 0.8, "outage": 0.6, "launch": 0.4,
+    # 加密货币
+    "bitcoin": 0.6, "ethereum": 0.5, "etf": 0.9, "sec": 0.8, "stablecoin": 0.7, "hack": 0.9, "exploit": 0.9,
+}
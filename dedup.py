@@ -0,0 +1,215 @@
+"""
+跨分类去重模块 - 识别不同分类/地区中的同一条新闻
+
+- URL 归一化：去掉跟踪参数（utm_* 等）、AMP 变体、www 前缀、片段与末尾斜杠
+- 近似重复：标题/摘要分别按词 shingle 计算 Jaccard 相似度；用倒排索引统计共享 shingle 数，
+  只比较有交集的候选，数千条新闻可在一秒内完成
+- 每个重复簇只保留信息量最大的一条（摘要更长者优先，其次是先出现者），并保留它原来的分类与地区
+"""
+
+from __future__ import annotations
+
+import re
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import config
+
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid",
+    "cmpid", "ncid", "ocid", "smid", "taid", "ref", "ref_src",
+    "outputtype", "amp", "guccounter", "guce_referrer", "guce_referrer_sig",
+}
+_TRACKING_PREFIXES = ("utm_", "at_", "itm_", "pk_")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "says", "said", "that", "the", "to", "was", "will", "with",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]")
+
+# 摘要 shingle 太少时（过短），摘要相似度不可靠，不参与判断
+_MIN_SUMMARY_SHINGLES = 6
+# 标题同理：占位标题与过短的标题（如 "Live updates"）不参与标题匹配，只能靠链接或摘要判重
+_MIN_TITLE_TOKENS = 4
+_PLACEHOLDER_TITLES = {"无标题", "untitled", "no title"}
+# 摘要只取导语部分比较（通稿转载的差异多在结尾）
+_SUMMARY_TOKENS = 40
+# 出现在过多条目里的 shingle 不具区分度，不作为候选依据
+_MAX_POSTING = 50
+
+# (category_key, region_key, index)
+Placement = Tuple[str, str, int]
+
+
+def normalize_url(url: str) -> str:
+    """归一化新闻链接，用于识别同一篇文章的不同 URL 变体"""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    host = parts.netloc.lower()
+    for prefix in ("www.", "amp.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+
+    path = re.sub(r"/amp(/|$)", "/", parts.path)
+    path = re.sub(r"(\.amp|-amp)(\.html?)?$", r"\2", path)
+    path = path.rstrip("/") or "/"
+
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+
+def tokenize(text: str) -> List[str]:
+    text = (text or "").lower()
+    if text.isascii():
+        return [tok for tok in _WORD_RE.findall(text) if tok not in _STOPWORDS]
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(text):
+        if _CJK_RE.match(tok):
+            # 中日韩文本没有空格分词，用字符二元组代替
+            out.extend(tok[i : i + 2] for i in range(max(1, len(tok) - 1)))
+        elif tok not in _STOPWORDS:
+            out.append(tok)
+    return out
+
+
+def shingles(text: str, max_tokens: int | None = None) -> Set[Tuple[str, ...]]:
+    """词二元组 shingle；不足两个词时退化为单词"""
+    toks = tokenize(text)[:max_tokens]
+    if len(toks) < 2:
+        return {(t,) for t in toks}
+    return set(zip(toks, toks[1:]))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 以较小下标为根，保证簇代表的先后顺序稳定
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+def similar_pairs(features: List[Set[Tuple[str, ...]]], threshold: float) -> Iterable[Tuple[int, int]]:
+    """用倒排索引统计共享 shingle 数，产出 Jaccard >= threshold 的 (i, j)，i < j"""
+    index: Dict[Tuple[str, ...], List[int]] = {}
+    for i, feats in enumerate(features):
+        for f in feats:
+            index.setdefault(f, []).append(i)
+
+    shared: Dict[Tuple[int, int], int] = {}
+    for posting in index.values():
+        if len(posting) < 2 or len(posting) > _MAX_POSTING:
+            continue
+        for pair in combinations(posting, 2):
+            shared[pair] = shared.get(pair, 0) + 1
+
+    for (i, j), inter in shared.items():
+        if inter / (len(features[i]) + len(features[j]) - inter) >= threshold:
+            yield i, j
+
+
+def _title_shingles(title: str) -> Set[Tuple[str, ...]]:
+    if " ".join(title.lower().split()) in _PLACEHOLDER_TITLES or len(tokenize(title)) < _MIN_TITLE_TOKENS:
+        return set()
+    return shingles(title)
+
+
+def find_duplicate_clusters(items: List[Dict]) -> List[List[int]]:
+    """返回重复簇（每簇为 items 下标列表，长度 >= 2）"""
+    n = len(items)
+    uf = _UnionFind(n)
+
+    by_url: Dict[str, int] = {}
+    for i, it in enumerate(items):
+        key = normalize_url(it.get("link", ""))
+        if not key:
+            continue
+        if key in by_url:
+            uf.union(by_url[key], i)
+        else:
+            by_url[key] = i
+
+    title_sh = [_title_shingles(it.get("title", "")) for it in items]
+    summary_sh = [shingles(it.get("summary", ""), _SUMMARY_TOKENS) for it in items]
+    for i in range(n):
+        if len(summary_sh[i]) < _MIN_SUMMARY_SHINGLES:
+            summary_sh[i] = set()
+
+    for i, j in similar_pairs(title_sh, config.DEDUP_TITLE_THRESHOLD):
+        uf.union(i, j)
+    for i, j in similar_pairs(summary_sh, config.DEDUP_SUMMARY_THRESHOLD):
+        uf.union(i, j)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+def _best(items: List[Dict], cluster: List[int]) -> int:
+    return max(cluster, key=lambda i: (len(items[i].get("summary", "")), -i))
+
+
+def dedup_across_categories(all_news: Dict[str, Dict[str, List[Dict]]], frozen: Iterable[str] = ()) -> int:
+    """跨全部分类/地区去除近似重复新闻（原地修改），返回删除条数
+
+    frozen: 已经交付（不能再改动）的分类；重复簇中有这些分类的条目时保留它，只删除其余分类的副本
+    """
+    frozen = set(frozen)
+    placements: List[Placement] = []
+    items: List[Dict] = []
+    for category_key, regions in all_news.items():
+        for region_key, news_list in regions.items():
+            for idx, it in enumerate(news_list):
+                placements.append((category_key, region_key, idx))
+                items.append(it)
+
+    drop: Set[Placement] = set()
+    for cluster in find_duplicate_clusters(items):
+        fixed = [i for i in cluster if placements[i][0] in frozen]
+        if fixed:
+            drop.update(placements[i] for i in cluster if i not in fixed)
+            continue
+        keep = _best(items, cluster)
+        drop.update(placements[i] for i in cluster if i != keep)
+        # 保留条目记下被多少个不同来源报道（供 ranking 计算覆盖度）
+        sources = {items[i].get("source", "") for i in cluster}
+        items[keep]["coverage"] = max(len(sources), items[keep].get("coverage", 1))
+
+    if not drop:
+        return 0
+    for category_key, regions in all_news.items():
+        for region_key, news_list in regions.items():
+            regions[region_key] = [
+                it for idx, it in enumerate(news_list) if (category_key, region_key, idx) not in drop
+            ]
+    return len(drop)
@@ -5,14 +5,16 @@
 import smtplib
 import ssl
 import html
+import re
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import config
 
 
-def send_email(subject: str, content: str) -> bool:
-    """发送邮件"""
+def send_email(subject: str, content: str, html_content: str | None = None) -> bool:
+    """发送邮件（html_content 为空时由 content 转换）"""
     if not config.SENDER_EMAIL or not config.SENDER_PASSWORD or not config.RECEIVER_EMAIL:
         print("错误: 请在 config.py 中配置邮件信息")
         return False
@@ -25,7 +27,8 @@ def send_email(subject: str, content: str) -> bool:
         msg["To"] = config.RECEIVER_EMAIL
 
         # 将 Markdown 转换为简单 HTML
-        html_content = markdown_to_html(content)
+        if html_content is None:
+            html_content = markdown_to_html(content)
 
         # 添加纯文本和 HTML 版本
         text_part = MIMEText(content, "plain", "utf-8")
@@ -57,8 +60,16 @@ def send_email(subject: str, content: str) -> bool:
         return False
 
 
-def markdown_to_html(md_text: str) -> str:
-    """轻量 Markdown 转 HTML（优先使用 python-markdown；否则退回简化转换）"""
+def _has_markdown() -> bool:
+    try:
+        import markdown  # type: ignore  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def _render_fragment(md_text: str) -> str:
+    """Markdown 片段转 HTML 片段（不含页面包装）"""
     # 1) Prefer a real Markdown parser if available.
     try:
         import markdown  # type: ignore
@@ -72,8 +83,6 @@ def markdown_to_html(md_text: str) -> str:
         pass
 
     # 2) Fallback: escape then re-introduce a small subset of formatting.
-    import re
-
     src = md_text or ""
     out = html.escape(src)
 
@@ -93,8 +102,49 @@ def markdown_to_html(md_text: str) -> str:
     out = re.sub(r"(?:^- .+(?:\n|$))+", _ul, out, flags=re.MULTILINE)
 
     # Line breaks
-    out = out.replace("\n", "<br>\n")
+    return out.replace("\n", "<br>\n")
+
+
+def _assemble_html(fragments: list) -> str:
+    """python-markdown 的输出直接拼接；简化转换需要包装成完整页面"""
+    if _has_markdown():
+        return "\n".join(fragments)
+    return _wrap_page("<br>\n<br>\n".join(fragments))
+
+
+def markdown_to_html(md_text: str) -> str:
+    """轻量 Markdown 转 HTML（优先使用 python-markdown；否则退回简化转换）"""
+    return _assemble_html([_render_fragment(md_text)])
+
+
+def split_sections(md_text: str) -> list:
+    """按行首 "## " 标题切分 Markdown"""
+    parts = re.split(r"\n(?=## )", (md_text or "").strip())
+    return [p.strip() for p in parts if p.strip()]
+
+
+class SectionRenderer:
+    """摘要流式生成时逐段预渲染 HTML；render() 时复用已渲染的段落，其余段落当场转换"""
+
+    def __init__(self):
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+    def add(self, section: str) -> None:
+        fragment = _render_fragment(section)
+        with self._lock:
+            self._fragments[section.strip()] = fragment
+
+    def render(self, md_text: str) -> str:
+        fragments = []
+        for section in split_sections(md_text):
+            with self._lock:
+                fragment = self._fragments.get(section)
+            fragments.append(fragment if fragment is not None else _render_fragment(section))
+        return _assemble_html(fragments)
+
 
+def _wrap_page(out: str) -> str:
     # 包装
     page = f"""<!DOCTYPE html>
 <html>
@@ -137,11 +187,11 @@ def markdown_to_html(md_text: str) -> str:
     return page
 
 
-def send_news_digest(summary: str) -> bool:
+def send_news_digest(summary: str, html_content: str | None = None) -> bool:
     """发送新闻摘要邮件"""
     today = datetime.now().strftime("%Y年%m月%d日")
     subject = f"📰 全球新闻日报 - {today}"
-    return send_email(subject, summary)
+    return send_email(subject, summary, html_content)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+"""
+RSS 响应体读取 - 压缩协商、流式解压与大小上限
+
+- Accept-Encoding：gzip / deflate，安装的 brotli 支持限制解压输出（brotli >= 1.2）时附加 br
+- 按块解压，每块的解压输出不超过剩余额度，解压后的字节数达到 RSS_MAX_BODY_BYTES 即停止读取
+  （同时防止压缩炸弹；不支持限制输出的 brotli / brotlicffi 只在服务端未经协商返回 br 时使用，此时无此保护）
+- 超限的 feed 不丢弃：流式解析只保留已完整读到的条目；回退到 feedparser 时先截断到最后一个
+  完整的 </item> / </entry>
+"""
+
+from __future__ import annotations
+
+import zlib
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - 可选依赖
+    try:
+        import brotlicffi as brotli  # type: ignore
+    except ImportError:
+        brotli = None
+
+import config
+
+_ENTRY_END_TAGS = (b"</item>", b"</entry>")
+
+
+def _brotli_bounded() -> bool:
+    """brotli 的 Decompressor.process 是否支持 output_buffer_limit（brotli >= 1.2）"""
+    if brotli is None:
+        return False
+    try:
+        brotli.Decompressor().process(b"", output_buffer_limit=1)
+        return True
+    except (AttributeError, TypeError):
+        return False
+
+
+_BROTLI_BOUNDED = _brotli_bounded()
+
+
+def accept_encoding() -> str:
+    if not config.RSS_COMPRESSION:
+        return "identity"
+    return "gzip, deflate, br" if _BROTLI_BOUNDED else "gzip, deflate"
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int):
+        self._obj = zlib.decompressobj(wbits)
+        self._deflate = wbits == zlib.MAX_WBITS
+        self._started = False
+
+    def decode(self, chunk: bytes, max_length: int) -> tuple[bytes, bool]:
+        try:
+            out = self._obj.decompress(chunk, max_length)
+        except zlib.error:
+            # 部分服务端的 deflate 实际是不带 zlib 头的原始流
+            if not self._deflate or self._started:
+                raise
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            self._deflate = False
+            out = self._obj.decompress(chunk, max_length)
+        self._started = True
+        return out, bool(self._obj.unconsumed_tail)
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+        self._process = getattr(self._obj, "process", None) or self._obj.decompress
+
+    def decode(self, chunk: bytes, max_length: int) -> tuple[bytes, bool]:
+        if max_length <= 0:
+            return self._process(chunk), False
+        if _BROTLI_BOUNDED:
+            # 输出达到上限后其余输入留在解压器内部，不再继续解压
+            out = self._obj.process(chunk, output_buffer_limit=max_length)
+            return out[:max_length], len(out) >= max_length and not self._obj.is_finished()
+        out = self._process(chunk)
+        return out[:max_length], len(out) > max_length
+
+
+class _IdentityDecoder:
+    def decode(self, chunk: bytes, max_length: int) -> tuple[bytes, bool]:
+        if max_length <= 0:
+            return chunk, False
+        return chunk[:max_length], len(chunk) > max_length
+
+
+def _decoder_for(content_encoding: str | None):
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("identity", ""):
+        return _IdentityDecoder()
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    raise ValueError(f"不支持的 Content-Encoding: {content_encoding}")
+
+
+class BodyReader:
+    """按块解压响应体并限制解压后的总大小
+
+    content_encoding 为 None 表示数据已由 HTTP 客户端解压（如 aiohttp）。
+    decode() 返回可交给解析器的字节；达到上限后 done 与 truncated 均为 True，调用方应停止读取。
+    """
+
+    def __init__(self, content_encoding: str | None = None, max_bytes: int | None = None):
+        self.max_bytes = config.RSS_MAX_BODY_BYTES if max_bytes is None else max_bytes
+        self.body_bytes = 0
+        self.truncated = False
+        self._decoder = _decoder_for(content_encoding)
+
+    @property
+    def done(self) -> bool:
+        return self.max_bytes > 0 and self.body_bytes >= self.max_bytes
+
+    def decode(self, chunk: bytes) -> bytes:
+        if self.done:
+            return b""
+        remaining = self.max_bytes - self.body_bytes if self.max_bytes > 0 else 0
+        out, overflow = self._decoder.decode(chunk, remaining)
+        self.body_bytes += len(out)
+        self.truncated = overflow or self.done
+        return out
+
+
+def truncate_at_entry_boundary(raw: bytes) -> bytes:
+    """截断到最后一个完整条目之后；没有完整条目时原样返回"""
+    ends = [raw.rfind(tag) + len(tag) for tag in _ENTRY_END_TAGS if tag in raw]
+    return raw[: max(ends)] if ends else raw
@@ -0,0 +1,99 @@
+"""
+RSS 条件请求缓存 - 按 URL 持久化 ETag / Last-Modified 与上次解析出的新闻条目
+
+下次抓取时携带 If-None-Match / If-Modified-Since，服务端返回 304 时直接复用缓存条目，
+省去下载与解析。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+
+class FeedCache:
+    """线程安全的磁盘缓存（单个 JSON 文件，写入时原子替换）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"读取 RSS 缓存失败，将重新建立: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_locked(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._entries, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"写入 RSS 缓存失败: {e}")
+
+    def validator_headers(self, url: str, limit: int) -> Dict[str, str]:
+        """返回条件请求头；缓存条目不足 limit 条时不发送（304 无法补齐）"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry or entry.get("limit", 0) < limit:
+                return {}
+            headers: Dict[str, str] = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def cached_items(self, url: str) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            return [dict(it) for it in entry.get("items", [])]
+
+    def store(self, url: str, etag: str | None, last_modified: str | None, items: List[Dict], limit: int) -> None:
+        with self._lock:
+            if not etag and not last_modified:
+                # 服务端不支持条件请求，缓存无意义
+                if self._entries.pop(url, None) is not None:
+                    self._save_locked()
+                return
+            self._entries[url] = {
+                "etag": etag or "",
+                "last_modified": last_modified or "",
+                "items": items,
+                "limit": limit,
+                "fetched_at": time.time(),
+            }
+            self._save_locked()
+
+
+_cache: FeedCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_feed_cache() -> FeedCache | None:
+    """返回进程内共享的缓存实例；未启用时返回 None"""
+    global _cache
+    if not config.RSS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != config.RSS_CACHE_PATH:
+            _cache = FeedCache(config.RSS_CACHE_PATH)
+        return _cache
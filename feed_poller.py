@@ -0,0 +1,194 @@
+"""
+后台轮询模块 - 常驻线程按各源自己的刷新间隔持续抓取，维护一份内存快照
+
+刷新间隔优先取源给出的 RSS <ttl> / Cache-Control max-age，否则使用 POLLER_DEFAULT_INTERVAL，
+并限制在 [POLLER_MIN_INTERVAL, POLLER_MAX_INTERVAL] 之间。snapshot() 直接用内存结果
+拼出与 fetch_all_news 相同结构的数据，无需等待网络。
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+import config
+from news_fetcher import (
+    CATEGORIES,
+    FeedSlot,
+    NewsData,
+    _build_feed_registry,
+    _distribute,
+    _finalize_news,
+    fetch_all_news,
+    fetch_feed,
+    iter_news_by_category,
+)
+
+
+class FeedPoller:
+    """线程安全的轮询器：start() 后在后台运行，snapshot() 可在任意线程调用"""
+
+    def __init__(self, categories: List[str] | None = None):
+        self._registry: Dict[str, List[FeedSlot]] = _build_feed_registry(
+            categories or list(CATEGORIES.keys()), NewsData()
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._results: Dict[str, List[Dict]] = {}
+        self._polled_at: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._inflight: set[str] = set()
+        self._due: List[Tuple[float, str]] = [(0.0, url) for url in self._registry]
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_warm(self) -> bool:
+        """所有源都至少轮询过一次"""
+        with self._lock:
+            return len(self._polled_at) >= len(self._registry)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=config.RSS_MAX_WORKERS, thread_name_prefix="feed-poller")
+        self._thread = threading.Thread(target=self._run, name="feed-poller", daemon=True)
+        self._thread.start()
+        print(f"🔄 后台轮询已启动，共 {len(self._registry)} 个源")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def wait_until_warm(self, timeout: float) -> bool:
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if self.is_warm:
+                return True
+            time.sleep(0.2)
+        return self.is_warm
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                while self._due and self._due[0][0] <= now:
+                    _due_at, url = heapq.heappop(self._due)
+                    if url in self._inflight:
+                        continue
+                    self._inflight.add(url)
+                    self._executor.submit(self._poll, url)
+                next_due = self._due[0][0] if self._due else now + config.POLLER_DEFAULT_INTERVAL
+            self._wakeup.wait(timeout=max(0.05, next_due - now))
+            self._wakeup.clear()
+
+    def _interval(self, url: str, refresh_after: float | None) -> float:
+        if refresh_after:
+            self._intervals[url] = refresh_after
+        interval = self._intervals.get(url, config.POLLER_DEFAULT_INTERVAL)
+        return max(config.POLLER_MIN_INTERVAL, min(config.POLLER_MAX_INTERVAL, interval))
+
+    def _poll(self, url: str) -> None:
+        slots = self._registry[url]
+        try:
+            result = fetch_feed(url, slots[0][2], max(slot[3] for slot in slots))
+        except Exception as e:
+            print(f"轮询 {slots[0][2]} 失败: {e}")
+            result = None
+
+        with self._lock:
+            self._inflight.discard(url)
+            # 失败时保留上一次的结果，宁可稍旧也不要空
+            if result is not None and (result.ok or url not in self._results):
+                self._results[url] = result.items
+            self._polled_at[url] = time.time()
+            interval = self._interval(url, result.refresh_after if result is not None else None)
+            heapq.heappush(self._due, (time.monotonic() + interval, url))
+        self._wakeup.set()
+
+    def snapshot(self, categories: List[str] | None = None, only_new: bool | None = None) -> NewsData:
+        """按 fetch_all_news 的结构返回当前内存中的新闻；尚未轮询到的源记入 report.late"""
+        started = time.monotonic()
+        all_news = NewsData()
+        registry = _build_feed_registry(categories or list(CATEGORIES.keys()), all_news)
+        with self._lock:
+            results = {url: self._results.get(url) for url in registry}
+        for url, slots in registry.items():
+            _distribute(all_news, slots, results[url], log=False)
+        all_news.report.elapsed = time.monotonic() - started
+        return _finalize_news(all_news, only_new)
+
+
+_poller: FeedPoller | None = None
+_poller_lock = threading.Lock()
+
+
+def start_poller() -> FeedPoller:
+    """启动（或返回已在运行的）进程内共享轮询器"""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = FeedPoller()
+            _poller.start()
+        return _poller
+
+
+_lock_file = None
+
+
+def start_poller_once() -> FeedPoller | None:
+    """多进程部署（如 gunicorn 多个 worker）时只在一个进程里启动轮询器：拿到 CACHE_DIR/poller.lock
+    文件锁的进程启动并一直持有锁，其他进程返回 None（它们的 latest_news 即时抓取）"""
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - 非 POSIX 平台没有文件锁，按单进程处理
+        return start_poller()
+    if _lock_file is None:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        lock_file = open(os.path.join(config.CACHE_DIR, "poller.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            print("后台轮询已由其他进程运行，本进程即时抓取")
+            return None
+        _lock_file = lock_file
+    return start_poller()
+
+
+def get_poller() -> FeedPoller | None:
+    return _poller
+
+
+def latest_news(categories: List[str] | None = None, only_new: bool | None = None) -> NewsData:
+    """轮询器已预热时直接返回快照，否则即时抓取；only_new 同 fetch_all_news"""
+    poller = get_poller()
+    if poller is not None and poller.is_warm:
+        print("使用后台轮询快照")
+        return poller.snapshot(categories, only_new)
+    return fetch_all_news(categories, only_new=only_new)
+
+
+def latest_news_by_category(
+    categories: List[str] | None = None,
+    only_new: bool | None = None,
+) -> Iterator[Tuple[str, NewsData]]:
+    """latest_news 的逐分类版本：轮询器已预热时一次产出快照中的全部分类，否则边抓取边产出"""
+    poller = get_poller()
+    if poller is not None and poller.is_warm:
+        print("使用后台轮询快照")
+        news = poller.snapshot(categories, only_new)
+        for category_key in list(news):
+            yield category_key, news
+        return
+    yield from iter_news_by_category(categories, only_new=only_new)
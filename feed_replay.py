@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+RSS 录制 / 回放 - 离线复现抓取与解析性能
+
+录制：把 config.NEWS_SOURCES 中每个 URL 的原始字节和响应头保存到夹具目录
+    python feed_replay.py record --dir fixtures/feeds
+
+回放：启动本地 HTTP 服务提供夹具内容，可注入延迟与故障
+    python feed_replay.py serve --dir fixtures/feeds --port 8765 --latency 0.2 --fail-rate 0.05
+
+设置 RSS_REPLAY_URL=http://127.0.0.1:8765 后，抓取层会把每个源 URL 改写为
+{RSS_REPLAY_URL}/{fixture_key(url)}，缓存、熔断等仍以原始 URL 记录。
+
+夹具格式：每个 URL 一对文件 <key>.body（原始字节）与 <key>.json（url / status / headers），
+另有 index.json 记录 key → url / 源名称。
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import config
+
+# 回放时保留的响应头（小写，比较时不区分大小写）
+_KEEP_HEADERS = {"content-type", "etag", "last-modified", "cache-control"}
+
+
+def fixture_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def replay_url(url: str) -> str:
+    """RSS_REPLAY_URL 已设置时把源 URL 改写为回放服务地址"""
+    base = config.RSS_REPLAY_URL
+    if not base:
+        return url
+    return f"{base.rstrip('/')}/{fixture_key(url)}"
+
+
+def save_fixture(directory: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> str:
+    os.makedirs(directory, exist_ok=True)
+    key = fixture_key(url)
+    with open(os.path.join(directory, f"{key}.body"), "wb") as file:
+        file.write(body)
+    meta = {"url": url, "status": status, "headers": {k: v for k, v in headers.items() if k.lower() in _KEEP_HEADERS}}
+    with open(os.path.join(directory, f"{key}.json"), "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False, indent=2)
+    return key
+
+
+def load_fixture(directory: str, key: str) -> Tuple[Dict, bytes] | None:
+    meta_path = os.path.join(directory, f"{key}.json")
+    body_path = os.path.join(directory, f"{key}.body")
+    if not os.path.isfile(meta_path) or not os.path.isfile(body_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as file:
+        meta = json.load(file)
+    with open(body_path, "rb") as file:
+        return meta, file.read()
+
+
+def _unique_sources() -> List[Tuple[str, str]]:
+    seen: Dict[str, str] = {}
+    for regions in config.NEWS_SOURCES.values():
+        for sources in regions.values():
+            for source in sources:
+                seen.setdefault(source["url"], source["name"])
+    return list(seen.items())
+
+
+def record(directory: str) -> int:
+    """抓取全部源的完整响应写入夹具目录，返回成功数"""
+    index: Dict[str, Dict] = {}
+    ok = 0
+    for url, name in _unique_sources():
+        req = Request(url, headers={"User-Agent": config.RSS_USER_AGENT})
+        started = time.monotonic()
+        try:
+            with urlopen(req, timeout=config.RSS_TIMEOUT) as resp:
+                body = resp.read()
+                key = save_fixture(directory, url, resp.status, dict(resp.headers), body)
+        except (HTTPError, OSError) as e:
+            print(f"录制 {name} 失败: {e}")
+            continue
+        elapsed = time.monotonic() - started
+        index[key] = {"url": url, "name": name, "bytes": len(body), "elapsed": round(elapsed, 3)}
+        ok += 1
+        print(f"已录制 {name}: {len(body) / 1024:.1f} KB, {elapsed:.2f}s")
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False, indent=2)
+    return ok
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端读够条目后提前断开是正常现象，不打印堆栈
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class ReplayServer:
+    """本地回放服务（线程运行）
+
+    Args:
+        directory: 夹具目录
+        latency: 每个请求的基础延迟（秒）
+        jitter: 在基础延迟上叠加的随机延迟上限（秒）
+        fail_rate: 返回 503 的概率
+        hang_rate: 挂起 hang_seconds 后才响应的概率（模拟超时）
+        compress: 客户端接受 gzip 时压缩响应体（模拟支持压缩的源站）
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fail_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        seed: int | None = None,
+        compress: bool = False,
+    ):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.compress = compress
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = _QuietHTTPServer((host, port), self._handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _roll(self) -> Tuple[float, bool, bool]:
+        with self._rng_lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            return delay, self._rng.random() < self.fail_rate, self._rng.random() < self.hang_rate
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, headers: Dict[str, str], body: bytes = b"") -> None:
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                delay, fail, hang = server._roll()
+                time.sleep(server.hang_seconds if hang else delay)
+                if fail:
+                    self._send(503, {"Content-Type": "text/plain"}, b"injected failure")
+                    return
+
+                fixture = load_fixture(server.directory, self.path.strip("/").split("?", 1)[0])
+                if fixture is None:
+                    self._send(404, {"Content-Type": "text/plain"}, b"no fixture")
+                    return
+                meta, body = fixture
+                headers = dict(meta.get("headers", {}))
+                etag = next((v for k, v in headers.items() if k.lower() == "etag"), None)
+                if etag and self.headers.get("If-None-Match") == etag:
+                    self._send(304, {k: v for k, v in headers.items() if k.lower() != "content-type"})
+                    return
+                if server.compress and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    headers["Content-Encoding"] = "gzip"
+                self._send(int(meta.get("status", 200)), headers, body)
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="feed-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="RSS 录制 / 回放")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="录制全部新闻源")
+    rec.add_argument("--dir", required=True)
+
+    srv = sub.add_parser("serve", help="启动回放服务")
+    srv.add_argument("--dir", required=True)
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency", type=float, default=0.0)
+    srv.add_argument("--jitter", type=float, default=0.0)
+    srv.add_argument("--fail-rate", type=float, default=0.0)
+    srv.add_argument("--hang-rate", type=float, default=0.0)
+    srv.add_argument("--hang-seconds", type=float, default=30.0)
+    srv.add_argument("--seed", type=int, default=None)
+    srv.add_argument("--gzip", action="store_true", help="客户端接受时以 gzip 压缩响应")
+
+    args = ap.parse_args()
+    if args.cmd == "record":
+        ok = record(args.dir)
+        print(f"共录制 {ok} 个源 → {args.dir}")
+        return
+
+    server = ReplayServer(
+        args.dir,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+        compress=args.gzip,
+    ).start()
+    print(f"回放服务已启动: {server.url}（设置 RSS_REPLAY_URL={server.url} 使用）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
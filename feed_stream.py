@@ -0,0 +1,106 @@
+"""
+流式 RSS / Atom 解析 - 边读边解析，取够 limit 条后立即停止
+
+只处理结构良好的 XML（RSS 2.0 / RSS 1.0 (RDF) / Atom）。遇到 XML 错误（如未声明的 HTML 实体）
+时标记 failed，由调用方用已读取的原始字节回退到 feedparser。
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List
+
+# 条目元素（RSS 的 <item>，Atom 的 <entry>）
+_ENTRY_TAGS = {"item", "entry"}
+# 发布时间字段，按优先级排列
+_PUBLISHED_TAGS = ("pubDate", "published", "issued")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if "}" in tag else tag
+
+
+def _text(elem: ET.Element) -> str:
+    return "".join(elem.itertext()).strip()
+
+
+def _entry_to_dict(elem: ET.Element) -> Dict[str, str]:
+    """把 <item>/<entry> 元素转为与 feedparser entry 相同 key 的字典"""
+    fields: Dict[str, str] = {}
+    for child in elem:
+        name = _local(child.tag)
+        if name == "title" and "title" not in fields:
+            fields["title"] = _text(child)
+        elif name == "link":
+            href = child.get("href")
+            if href is None:
+                fields.setdefault("link", _text(child))
+            elif child.get("rel", "alternate") == "alternate":
+                fields.setdefault("link", href.strip())
+        elif name in ("description", "summary"):
+            fields.setdefault("summary", _text(child))
+        elif name in ("content", "encoded"):
+            fields.setdefault("_content", _text(child))
+        elif name in _PUBLISHED_TAGS:
+            fields.setdefault(f"_{name}", _text(child))
+
+    entry: Dict[str, str] = {"title": fields.get("title", "无标题"), "link": fields.get("link", "")}
+    summary = fields.get("summary") or fields.get("_content")
+    if summary:
+        entry["summary"] = summary
+    for name in _PUBLISHED_TAGS:
+        if fields.get(f"_{name}"):
+            entry["published"] = fields[f"_{name}"]
+            break
+    return entry
+
+
+class StreamingFeedParser:
+    """增量解析器：feed() 喂入字节块，返回 True 表示已取够 limit 条，可以停止读取"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.entries: List[Dict[str, str]] = []
+        self.ttl: int | None = None  # RSS <ttl>（分钟）
+        self.failed = False
+        self._chunks: List[bytes] = []
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    @property
+    def done(self) -> bool:
+        return len(self.entries) >= self.limit
+
+    @property
+    def raw(self) -> bytes:
+        """目前已读取的原始字节（用于回退解析）"""
+        return b"".join(self._chunks)
+
+    def feed(self, chunk: bytes) -> bool:
+        self._chunks.append(chunk)
+        if self.failed or self.done:
+            return self.done
+        try:
+            self._parser.feed(chunk)
+            self._drain()
+        except ET.ParseError:
+            self.failed = True
+        return self.done
+
+    def close(self) -> None:
+        if self.failed or self.done:
+            return
+        try:
+            self._parser.close()
+            self._drain()
+        except ET.ParseError:
+            self.failed = True
+
+    def _drain(self) -> None:
+        for _event, elem in self._parser.read_events():
+            name = _local(elem.tag)
+            if name == "ttl" and self.ttl is None and (elem.text or "").strip().isdigit():
+                self.ttl = int(elem.text.strip())
+            if self.done or name not in _ENTRY_TAGS:
+                continue
+            self.entries.append(_entry_to_dict(elem))
+            elem.clear()
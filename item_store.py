@@ -0,0 +1,132 @@
+"""
+新闻条目存储 - 本地 SQLite 记录每条新闻的首次/最近出现时间以及是否已摘要、已发送
+
+key 与 news_fetcher._normalize_key 一致（优先链接，其次标题）。多次运行时可据此只保留
+尚未发送过的新闻，避免 feed 没有更新时重复推送相同内容。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Set, Tuple
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    link TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    region TEXT NOT NULL DEFAULT '',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    summarized_at REAL,
+    emailed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_items_last_seen ON items(last_seen);
+"""
+
+# SQLite 单条语句的参数上限较低，IN 查询分批执行
+_BATCH = 500
+
+# (key, category_key, region_key, item)
+ObservedItem = Tuple[str, str, str, Dict]
+
+
+class ItemStore:
+    """线程安全的 SQLite 条目库"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def observe(self, observed: Iterable[ObservedItem]) -> None:
+        """记录本次抓取到的条目（新条目写入 first_seen，已有条目更新 last_seen）"""
+        now = time.time()
+        rows = [
+            (key, it.get("title", ""), it.get("link", ""), it.get("source", ""), category_key, region_key, now, now)
+            for key, category_key, region_key, it in observed
+        ]
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO items (key, title, link, source, category, region, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    last_seen = excluded.last_seen,
+                    seen_count = seen_count + 1
+                """,
+                rows,
+            )
+            if config.ITEM_STORE_RETENTION_DAYS > 0:
+                cutoff = now - config.ITEM_STORE_RETENTION_DAYS * 86400
+                self._conn.execute("DELETE FROM items WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+
+    def emailed_keys(self, keys: Iterable[str]) -> Set[str]:
+        """返回 keys 中已经发送过的那部分"""
+        keys = list(dict.fromkeys(keys))
+        found: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i : i + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                cur = self._conn.execute(
+                    f"SELECT key FROM items WHERE emailed_at IS NOT NULL AND key IN ({placeholders})",
+                    batch,
+                )
+                found.update(row[0] for row in cur)
+        return found
+
+    def _mark(self, column: str, keys: Iterable[str]) -> int:
+        now = time.time()
+        rows = [(now, k) for k in dict.fromkeys(keys)]
+        with self._lock:
+            cur = self._conn.executemany(f"UPDATE items SET {column} = ? WHERE key = ?", rows)
+            self._conn.commit()
+            return cur.rowcount
+
+    def mark_summarized(self, keys: Iterable[str]) -> int:
+        return self._mark("summarized_at", keys)
+
+    def mark_emailed(self, keys: Iterable[str]) -> int:
+        return self._mark("emailed_at", keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            total, summarized, emailed = self._conn.execute(
+                "SELECT COUNT(*), COUNT(summarized_at), COUNT(emailed_at) FROM items"
+            ).fetchone()
+        return {"total": total, "summarized": summarized, "emailed": emailed}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: ItemStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_item_store() -> ItemStore | None:
+    """返回进程内共享的条目库；未启用时返回 None"""
+    global _store
+    if not config.ITEM_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != config.ITEM_STORE_PATH:
+            _store = ItemStore(config.ITEM_STORE_PATH)
+        return _store
+
@@ -0,0 +1,96 @@
+"""
+今日要点预生成的本地核对 - 预生成的要点直接来自新闻标题，分类摘要完成后逐个领域核对
+
+某领域的要点与对应分类的摘要对不上（字词在整个分类摘要中的覆盖率低于 KEY_POINTS_MATCH_THRESHOLD）时，
+说明预生成选中的事件没有进入摘要，改用该分类摘要的首条新闻，不再发起新的请求。
+
+要点是对事件的转述，与摘要的措辞往往不同：与整个分类（而不是单条新闻）比较，允许要点综合多条新闻；
+要点首句（主语 + 事件）另与各条标题比较；英文词与数字（公司、产品名与金额、涨幅）转述时基本不变，按双倍权重计算。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Set, Tuple
+
+import config
+from dedup import tokenize
+
+# 今日要点的领域 → 对应的分类
+POINT_CATEGORIES = {"金融": "finance", "政治": "politics", "科技": "tech", "币圈": "crypto"}
+
+# Markdown 的一条要点：- **领域**：一句话总结
+_POINT_LINE = re.compile(r"^\s*[-*]\s*\*\*(.+?)\*\*\s*[:：]\s*(.+?)\s*$", re.MULTILINE)
+# 分类摘要中的一条新闻：1. **标题** - 摘要
+_ITEM_LINE = re.compile(r"^\s*\d+\.\s*\*\*(.+?)\*\*\s*[-—–]\s*(.+?)\s*$", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[。！？；])")
+# 要点的首句：到第一个逗号或句末为止
+_POINT_HEAD = re.compile(r"[，,。！？；;]")
+
+NO_NEWS = "暂无重要新闻。"
+
+# (领域, 一句话总结)
+Point = Tuple[str, str]
+
+
+def parse_points(markdown: str) -> List[Point] | None:
+    """解析 Markdown 格式的今日要点（缺少的领域在核对时补上）；一条都没有时返回 None"""
+    found = {m.group(1).strip(): m.group(2).strip() for m in _POINT_LINE.finditer(markdown or "")}
+    points = [(name, found[name]) for name in POINT_CATEGORIES if found.get(name)]
+    return points or None
+
+
+def section_items(section: str) -> List[Tuple[str, str]]:
+    """分类摘要段落中的 (标题, 摘要)"""
+    return [(m.group(1).strip(), m.group(2).strip()) for m in _ITEM_LINE.finditer(section or "")]
+
+
+# 英文词与数字的权重（中日韩文本按字符二元组计 1）
+_ANCHOR_WEIGHT = 2.0
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def _features(text: str) -> Set[str]:
+    return set(tokenize(text))
+
+
+def _weight(feature: str) -> float:
+    return 1.0 if _CJK_RE.match(feature) else _ANCHOR_WEIGHT
+
+
+def _coverage(feats: Set[str], other: Set[str]) -> float:
+    return sum(_weight(f) for f in feats & other) / sum(_weight(f) for f in feats) if feats else 0.0
+
+
+def match_score(point: str, items: List[Tuple[str, str]]) -> float:
+    """要点的字词（加权）在该分类全部新闻（标题 + 摘要）中出现的比例，
+    与要点首句（主语 + 事件）在单条标题中出现的最大比例，取较大者"""
+    section: Set[str] = set()
+    for title, summary in items:
+        section |= _features(f"{title} {summary}")
+    head = _features(_POINT_HEAD.split(point, 1)[0])
+    return max([_coverage(_features(point), section)] + [_coverage(head, _features(title)) for title, _s in items])
+
+
+def _lead_point(items: List[Tuple[str, str]]) -> str:
+    if not items:
+        return NO_NEWS
+    title, summary = items[0]
+    first = next((s for s in _SENTENCE_END.split(summary) if s.strip()), summary).strip()
+    return f"{title}：{first}"
+
+
+def reconcile(points: List[Point], category_outputs: Dict[str, str]) -> Tuple[List[Point], List[str]]:
+    """按分类摘要核对预生成的要点，返回 (核对后的要点, 被替换或补上的领域)"""
+    given = dict(points)
+    result: List[Point] = []
+    replaced: List[str] = []
+    for name, category_key in POINT_CATEGORIES.items():
+        text = given.get(name, "")
+        items = section_items(category_outputs.get(category_key, ""))
+        if text and match_score(text, items) >= config.KEY_POINTS_MATCH_THRESHOLD:
+            result.append((name, text))
+            continue
+        result.append((name, _lead_point(items)))
+        replaced.append(name)
+    return result, replaced
@@ -0,0 +1,166 @@
+"""
+LLM 响应缓存 - 按内容寻址的磁盘缓存
+
+key = sha256(model, system, user, temperature, max_tokens)，每个响应一个 JSON 文件
+（LLM_CACHE_DIR/<key 前两位>/<key>.json）。同样的输入重跑（如邮件发送失败后重试、
+/trigger 被重复触发）时直接返回上次结果，不再消耗时间与 token。
+
+- 过期：写入超过 LLM_CACHE_TTL 秒的条目视为未命中并删除
+- 容量：总大小超过 LLM_CACHE_MAX_BYTES 时按最近使用时间（mtime，命中时刷新）淘汰；
+  淘汰要遍历整个目录，写入时每 _EVICT_EVERY 次或每 _EVICT_INTERVAL 秒才做一次（进程内首次写入时必做）
+- 只缓存成功且非空的响应；输出需要校验（JSON、结构）的调用方在校验通过后才写入
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import List, Tuple
+
+import config
+
+# 两次淘汰之间最多的写入次数 / 最长间隔（秒）
+_EVICT_EVERY = 50
+_EVICT_INTERVAL = 600.0
+
+
+def cache_key(model: str, system: str, user: str, temperature: float, max_tokens: int) -> str:
+    payload = json.dumps([model, system, user, float(temperature), int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """线程安全的内容寻址缓存"""
+
+    def __init__(self, directory: str, ttl: float, max_bytes: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._evicted_at: float | None = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"读取 LLM 缓存失败，忽略: {e}")
+            return None
+
+        if self.ttl > 0 and time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("content")
+
+    def put(self, key: str, content: str, model: str = "") -> None:
+        if not content:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"created": time.time(), "model": model, "content": content}, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入 LLM 缓存失败: {e}")
+            return
+        if self._evict_due():
+            self.evict()
+
+    def _evict_due(self) -> bool:
+        with self._lock:
+            self._writes += 1
+            now = time.monotonic()
+            if (
+                self._evicted_at is not None
+                and self._writes < _EVICT_EVERY
+                and now - self._evicted_at < _EVICT_INTERVAL
+            ):
+                return False
+            self._writes = 0
+            self._evicted_at = now
+            return True
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """删除过期条目，并按最近使用时间淘汰到容量以内，返回删除数"""
+        if self.max_bytes <= 0 and self.ttl <= 0:
+            return 0
+        with self._lock:
+            entries = sorted(self._entries())
+            now = time.time()
+            removed = 0
+            total = sum(size for _m, size, _p in entries)
+            for mtime, size, path in entries:
+                expired = self.ttl > 0 and now - mtime > self.ttl
+                if not expired and (self.max_bytes <= 0 or total <= self.max_bytes):
+                    continue
+                if self._remove(path):
+                    removed += 1
+                    total -= size
+            return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+_cache: LLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache | None:
+    """返回进程内共享的缓存；未启用时返回 None"""
+    global _cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.directory != config.LLM_CACHE_DIR:
+            _cache = LLMCache(config.LLM_CACHE_DIR, config.LLM_CACHE_TTL, config.LLM_CACHE_MAX_BYTES)
+        return _cache
+
+
+def lookup(key: str) -> str | None:
+    """读取缓存；LLM_CACHE_BYPASS 时总是未命中"""
+    cache = get_llm_cache()
+    if cache is None or config.LLM_CACHE_BYPASS:
+        return None
+    return cache.get(key)
+
+
+def store(key: str, content: str, model: str = "") -> None:
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.put(key, content, model)
@@ -0,0 +1,68 @@
+"""
+DeepSeek 客户端注册表 - 进程内共享一个带连接池的 OpenAI 客户端
+
+Flask / 定时任务进程常驻时，各次运行复用同一个 HTTP 连接池（keep-alive 连接与 TLS 会话），
+不再每次 generate_* 都新建客户端。池大小按摘要并发（分块总结 5 个分类同时请求）设置。
+
+不同调用方的超时不同（SUMMARY_TIMEOUT / MORNING_ARTICLE_TIMEOUT），通过 with_options 得到
+共享同一连接池、但超时独立的客户端副本。
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Tuple
+
+from openai import DefaultHttpxClient, OpenAI
+
+try:
+    import httpx  # openai 的依赖，正常情况下总是可用
+except ImportError:  # pragma: no cover
+    httpx = None
+
+import config
+
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def _http_client():
+    """按配置显式设置连接池大小；httpx 不可用时交给 OpenAI 使用默认连接池"""
+    if httpx is None:
+        return None
+    return DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+            keepalive_expiry=config.LLM_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+def get_client(timeout: float | None = None, max_retries: int | None = None) -> OpenAI:
+    """返回共享连接池的客户端；timeout / max_retries 只作用于本次返回的副本"""
+    key = (config.DEEPSEEK_BASE_URL, config.DEEPSEEK_API_KEY)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(
+                api_key=config.DEEPSEEK_API_KEY,
+                base_url=config.DEEPSEEK_BASE_URL,
+                http_client=_http_client(),
+            )
+            _clients[key] = client
+    options = {}
+    if timeout is not None:
+        options["timeout"] = timeout
+    if max_retries is not None:
+        options["max_retries"] = max_retries
+    return client.with_options(**options) if options else client
+
+
+def close_clients() -> None:
+    """关闭全部连接池（进程退出或配置变更时调用）"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
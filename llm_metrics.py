@@ -0,0 +1,144 @@
+"""
+LLM 调用记录 - 每次请求的排队时间、首 token 时间、总耗时、token 用量、重试次数与估算费用
+
+- 记录由 llm_scheduler 在请求最终完成（或重试用尽）时写入；命中本地响应缓存的调用由调用方记录
+- 每条记录追加到 LLM_METRICS_PATH（JSONL，空字符串表示不写入）
+- collect() 收集一次运行期间的全部记录，结束时按提示词汇总打印
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List
+
+import config
+import token_budget
+
+
+@dataclass
+class CallRecord:
+    """一次 LLM 调用（含全部重试）"""
+    name: str  # 提示词名称，如 full、category:finance、key_points、plan、write、enforce_length
+    label: str = ""
+    ok: bool = True
+    complete: bool = True  # False 表示流式输出中途中断，只保留了部分内容
+    local_cache: bool = False  # 命中本地响应缓存，没有发出请求
+    queue_s: float = 0.0  # 提交到首次发出（优先级、并发与限流等待）
+    ttft_s: float | None = None  # 最后一次尝试发出到首个 token（非流式请求为 None）
+    latency_s: float = 0.0  # 提交到完成（含排队、重试与退避）
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cached_tokens: int | None = None  # 命中服务端上下文缓存的 prompt tokens
+    retries: int = 0
+    cost: float | None = None  # 美元，按 usage 估算
+    error: str = ""
+    run: str = ""
+    time: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def usage_record(name: str, usage, **kwargs) -> CallRecord:
+    """按 API 返回的 usage 生成记录（usage 为 None 时不含 token 与费用）"""
+    record = CallRecord(name, **kwargs)
+    if usage is not None:
+        record.prompt_tokens = getattr(usage, "prompt_tokens", None)
+        record.completion_tokens = getattr(usage, "completion_tokens", None)
+        record.cached_tokens = token_budget.cache_hit_tokens(usage)
+        if record.prompt_tokens is not None:
+            record.cost = round(token_budget.call_cost(
+                record.prompt_tokens, record.completion_tokens or 0, record.cached_tokens or 0
+            ), 8)
+    return record
+
+
+class RunMetrics:
+    """一次运行期间的调用记录"""
+
+    def __init__(self, run: str):
+        self.run = run
+        self.started = time.monotonic()
+        self.records: List[CallRecord] = []
+
+    def report(self) -> None:
+        records = list(self.records)
+        if not records:
+            return
+        sent = [r for r in records if not r.local_cache]
+        failed = sum(1 for r in sent if not r.ok)
+        retries = sum(r.retries for r in sent)
+        cost = sum(r.cost or 0 for r in sent)
+        prompt = sum(r.prompt_tokens or 0 for r in sent)
+        cached = sum(r.cached_tokens or 0 for r in sent)
+        completion = sum(r.completion_tokens or 0 for r in sent)
+        print(
+            f"📊 LLM 调用统计（{self.run}，{time.monotonic() - self.started:.1f}s）："
+            f"{len(sent)} 次请求，失败 {failed}，重试 {retries}，本地缓存命中 {len(records) - len(sent)}；"
+            f"prompt {prompt}（上下文缓存 {cached}）/ completion {completion}，费用约 ${cost:.4f}"
+        )
+        groups: Dict[str, List[CallRecord]] = {}
+        for r in sent:
+            # 同一提示词的多个批次（translate:finance#1、#2…）合并显示
+            groups.setdefault(r.name.split("#", 1)[0], []).append(r)
+        for name, group in sorted(groups.items(), key=lambda kv: -max(r.latency_s for r in kv[1])):
+            ttfts = [r.ttft_s for r in group if r.ttft_s is not None]
+            ttft = f"，首 token {max(ttfts):.1f}s" if ttfts else ""
+            print(
+                f"   {name}: {len(group)} 次，最长 {max(r.latency_s for r in group):.1f}s"
+                f"（排队 {max(r.queue_s for r in group):.1f}s{ttft}），"
+                f"prompt {sum(r.prompt_tokens or 0 for r in group)} / completion {sum(r.completion_tokens or 0 for r in group)}，"
+                f"重试 {sum(r.retries for r in group)}，${sum(r.cost or 0 for r in group):.4f}"
+                + ("，失败" if any(not r.ok for r in group) else "")
+            )
+
+
+_active: List[RunMetrics] = []
+_lock = threading.Lock()
+
+
+def record(call: CallRecord) -> None:
+    """记录一次调用：计入进行中的运行，并追加到 LLM_METRICS_PATH"""
+    with _lock:
+        runs = list(_active)
+        call.run = ",".join(run.run for run in runs)
+        for run in runs:
+            run.records.append(call)
+        _write(call)
+
+
+def record_cache_hit(name: str, label: str = "") -> None:
+    record(CallRecord(name, label=label, local_cache=True))
+
+
+def _write(call: CallRecord) -> None:
+    path = config.LLM_METRICS_PATH
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(call.as_dict(), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"写入 LLM 调用记录失败: {e}")
+
+
+@contextmanager
+def collect(run: str) -> Iterator[RunMetrics]:
+    """收集 with 块内的 LLM 调用，结束时打印汇总"""
+    metrics = RunMetrics(run)
+    with _lock:
+        _active.append(metrics)
+    try:
+        yield metrics
+    finally:
+        with _lock:
+            _active.remove(metrics)
+        metrics.report()
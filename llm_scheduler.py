@@ -0,0 +1,277 @@
+"""
+DeepSeek 调用调度器 - 所有 LLM 请求经由一个后台 asyncio 事件循环统一排队
+
+- 令牌桶限流：每分钟请求数（LLM_RPM）与每分钟 token 数（LLM_TPM），0 表示不限
+- 全局并发上限 LLM_MAX_CONCURRENCY（不再由各调用方各自决定并发）
+- 优先级：数字越小越先发出（日报摘要先于晨读短文，篇幅调整最后）
+- 重试：指数退避 + 抖动，服务端给出 Retry-After / retry-after-ms 时以其为准，并暂停全部请求到该时刻；
+  退避等待在事件循环中进行，不占用线程
+- 记录：每个请求最终完成或失败时写入 llm_metrics（排队时间、首 token 时间、总耗时、用量、重试次数）
+
+请求本身（同步的 OpenAI 调用）在线程池中执行；调用方通过 call() 阻塞等待，或 submit() 拿到 Future。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+import config
+import llm_metrics
+
+# 优先级（越小越先）
+PRIORITY_DIGEST = 0
+PRIORITY_ARTICLE = 10
+PRIORITY_REVISE = 20
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """从 API 错误的响应头中读取服务端建议的等待时间"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, hint: float | None = None) -> float:
+    """第 attempt 次失败后的等待时间：有服务端提示时取提示值（加少量抖动），否则为带抖动的指数退避"""
+    if hint is not None:
+        return hint + random.uniform(0, min(1.0, hint * 0.1 + 0.1))
+    ceiling = min(config.LLM_BACKOFF_MAX, config.LLM_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class TokenBucket:
+    """每分钟 rate 个令牌的令牌桶（容量 = rate）；rate <= 0 表示不限"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        if self.capacity > 0 and amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass
+class LLMResult:
+    """一次请求尝试的结果"""
+    content: str
+    usage: Any = None  # OpenAI usage 对象；服务端未返回时为 None
+    complete: bool = True  # False 表示流式输出中途中断，content 只含已完成的部分
+    first_token_at: float | None = None  # 收到首个 token 的时刻（time.monotonic()，流式请求才有）
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    priority: int
+    tokens: int
+    attempts: int
+    label: str
+    name: str = ""
+    future: Future = field(default_factory=Future)
+    attempt: int = 0
+    submitted: float = field(default_factory=time.monotonic)
+    dispatched: float | None = None  # 首次发出的时刻
+    attempt_started: float = 0.0  # 最近一次尝试开始执行的时刻
+
+    def run(self) -> Any:
+        self.attempt_started = time.monotonic()
+        return self.fn()
+
+    def metrics(self, result: Any = None, error: BaseException | None = None) -> llm_metrics.CallRecord:
+        now = time.monotonic()
+        first_token = getattr(result, "first_token_at", None)
+        return llm_metrics.usage_record(
+            self.name or self.label,
+            getattr(result, "usage", None),
+            label=self.label,
+            ok=error is None,
+            complete=getattr(result, "complete", True),
+            queue_s=round((self.dispatched or now) - self.submitted, 3),
+            ttft_s=round(first_token - self.attempt_started, 3) if first_token is not None else None,
+            latency_s=round(now - self.submitted, 3),
+            retries=max(0, self.attempt - 1) if error is not None else self.attempt,
+            error=str(error) if error is not None else "",
+        )
+
+
+class LLMScheduler:
+    """后台事件循环 + 优先队列；线程安全的 submit / call"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 4):
+        self.max_concurrency = max(1, max_concurrency)
+        self._rpm = TokenBucket(rpm)
+        self._tpm = TokenBucket(tpm)
+        self._paused_until = 0.0
+        self._seq = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-call")
+        self._ready = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.PriorityQueue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._thread = threading.Thread(target=self._run_loop, name="llm-scheduler", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        loop.create_task(self._dispatch())
+        self._ready.set()
+        loop.run_forever()
+
+    def submit(
+        self,
+        fn: Callable[[], Any],
+        *,
+        priority: int = PRIORITY_DIGEST,
+        tokens: int = 0,
+        attempts: int = 1,
+        label: str = "",
+        name: str = "",
+    ) -> Future:
+        """排队执行 fn（一次请求尝试）；失败时按退避策略重试，最多 attempts 次
+
+        name: 提示词名称（写入 llm_metrics 的调用记录，缺省时用 label）
+        """
+        job = _Job(
+            fn=fn, priority=priority, tokens=max(0, tokens), attempts=max(1, attempts), label=label, name=name
+        )
+        self._loop.call_soon_threadsafe(self._enqueue, job)
+        return job.future
+
+    def call(self, fn: Callable[[], Any], timeout: float | None = None, **kwargs) -> Any:
+        """提交并等待结果；timeout 为最多等待的秒数（含排队与重试），超时抛出 TimeoutError，请求本身仍在后台完成"""
+        return self.submit(fn, **kwargs).result(timeout=timeout)
+
+    def _enqueue(self, job: _Job) -> None:
+        self._seq += 1
+        self._queue.put_nowait((job.priority, self._seq, job))
+
+    def _wait_time(self, job: _Job) -> float:
+        return max(
+            self._paused_until - time.monotonic(),
+            self._rpm.wait_time(1),
+            self._tpm.wait_time(job.tokens),
+        )
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            while True:
+                item = await self._queue.get()
+                wait = self._wait_time(item[2])
+                if wait <= 0:
+                    break
+                # 放回队列再等待；醒来后重新取队首，期间到达的高优先级请求会先发出
+                self._queue.put_nowait(item)
+                await asyncio.sleep(wait)
+            job = item[2]
+            if job.dispatched is None:
+                job.dispatched = time.monotonic()
+            self._rpm.take(1)
+            self._tpm.take(job.tokens)
+            asyncio.get_running_loop().create_task(self._execute(job))
+
+    async def _execute(self, job: _Job) -> None:
+        loop = asyncio.get_running_loop()
+        released = False
+        try:
+            result = await loop.run_in_executor(self._executor, job.run)
+        except Exception as exc:
+            job.attempt += 1
+            self._slots.release()
+            released = True
+            if job.attempt >= job.attempts:
+                llm_metrics.record(job.metrics(error=exc))
+                job.future.set_exception(exc)
+                return
+            hint = retry_after_seconds(exc)
+            delay = backoff_delay(job.attempt, hint)
+            if hint is not None:
+                # 服务端限流：所有请求一起暂停
+                self._paused_until = max(self._paused_until, time.monotonic() + hint)
+            name = f"{job.label} " if job.label else ""
+            print(f"{name}API 调用失败：{exc}，{delay:.1f}s 后重试... ({job.attempt}/{job.attempts})")
+            await asyncio.sleep(delay)
+            self._enqueue(job)
+        else:
+            usage = getattr(result, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None) is not None:
+                # 预扣的是 prompt 估算 + max_tokens，按实际用量退回多扣的部分
+                self._tpm.refund(job.tokens - usage.total_tokens)
+            llm_metrics.record(job.metrics(result))
+            job.future.set_result(result)
+        finally:
+            if not released:
+                self._slots.release()
+
+
+_scheduler: LLMScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """进程内共享的调度器（首次使用时启动）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                rpm=config.LLM_RPM,
+                tpm=config.LLM_TPM,
+                max_concurrency=config.LLM_MAX_CONCURRENCY,
+            )
+        return _scheduler
+
+
+def call(fn: Callable[[], Any], **kwargs) -> Any:
+    """经调度器执行一次 LLM 请求并等待结果（参数见 LLMScheduler.submit / call）"""
+    return get_scheduler().call(fn, **kwargs)
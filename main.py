@@ -8,41 +8,118 @@ import sys
 import time
 from datetime import datetime, timedelta
 
-from news_fetcher import fetch_all_news, format_news_for_summary, count_total_news, print_news_stats
-from summarizer import generate_summary
-from email_sender import send_news_digest
-from config import SCHEDULE_DAILY_TIME
-
+import llm_metrics
+from feed_poller import latest_news, latest_news_by_category, start_poller
+from news_fetcher import (
+    CATEGORIES,
+    NewsData,
+    count_total_news,
+    format_news_for_summary,
+    mark_news_emailed,
+    mark_news_summarized,
+    print_fetch_report,
+    print_news_stats,
+)
+from ranking import merge_ranking_stats, print_ranking_stats, rank_news, record_ranking_stats
+from summarizer import PipelinedSummary, generate_summary
+from email_sender import SectionRenderer, send_news_digest
+from config import PIPELINE_ENABLED, POLLER_ENABLED, RANK_ENABLED, SCHEDULE_DAILY_TIME
+
+
+def _print_news_overview(news_data, total):
+    print(f"\n✅ 共获取 {total} 条新闻")
+    print_news_stats(news_data)
 
-def run_once():
-    print(f"\n{'='*50}")
-    print(f"全球新闻日报 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*50}\n")
 
-    # 1. 获取新闻
+def _collect_sequential(on_section):
+    """先抓取全部新闻，再整体生成摘要；没有新闻时摘要为 None"""
     print("📡 正在获取新闻...")
-    news_data = fetch_all_news()
-
+    news_data = latest_news()
+    print_fetch_report(news_data)
     total_news = count_total_news(news_data)
     if total_news == 0:
-        print("❌ 未获取到任何新闻，程序退出")
-        return False
+        return news_data, None
 
-    print(f"\n✅ 共获取 {total_news} 条新闻")
-    print_news_stats(news_data)
+    _print_news_overview(news_data, total_news)
+    if RANK_ENABLED:
+        # 每个地区只保留最重要的前 K 条，减少发给 LLM 的内容
+        print_ranking_stats(rank_news(news_data))
     print()
 
-    # 2. 格式化新闻
     news_text = format_news_for_summary(news_data)
-
-    # 3. 生成中文摘要
     print("🤖 正在使用 DeepSeek 生成中文摘要...")
-    summary = generate_summary(news_text)
+    return news_data, generate_summary(news_text, on_section=on_section, news_data=news_data)
+
+
+def _collect_pipelined(on_section):
+    """流水线：某分类的源全部返回（或超时）即开始生成该分类的摘要，与其余分类的抓取重叠"""
+    print("📡 正在获取新闻（每个分类抓取完成即开始生成摘要）...")
+    pipeline = PipelinedSummary(on_section)
+    rank_parts = []
+    news_data = NewsData()
+    total_news = 0
+    try:
+        for category_key, news_data in latest_news_by_category():
+            category = {category_key: news_data[category_key]}
+            total_news += count_total_news(category)
+            if RANK_ENABLED:
+                rank_parts.append(rank_news(category, record=False))
+            print(f"  📥 {CATEGORIES[category_key][0]}: {count_total_news(category)} 条，开始生成摘要")
+            pipeline.submit(category_key, news_data[category_key], format_news_for_summary(category))
+    except BaseException:
+        pipeline.cancel()
+        raise
+
+    print_fetch_report(news_data)
+    if total_news == 0:
+        pipeline.cancel()
+        return news_data, None
+
+    # 各地区条数为排序截断后的数量
+    _print_news_overview(news_data, total_news)
+    if rank_parts:
+        stats = merge_ranking_stats(rank_parts)
+        record_ranking_stats(stats)
+        print_ranking_stats(stats)
+    print()
+
+    print("🤖 等待各分类摘要并生成今日要点...")
+    return news_data, pipeline.finish()
+
+
+def run_once():
+    # 结束时汇总本次运行的 LLM 调用（逐条记录见 LLM_METRICS_PATH）
+    with llm_metrics.collect("digest"):
+        return _run_digest()
+
+
+def _run_digest():
+    print(f"\n{'='*50}")
+    print(f"全球新闻日报 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*50}\n")
+
+    # 1-3. 获取新闻并生成中文摘要（流式输出时每完成一个分类就先渲染 HTML）
+    renderer = SectionRenderer()
+
+    def on_section(section):
+        print(f"  ✓ {section.splitlines()[0]}")
+        renderer.add(section)
+
+    collect = _collect_pipelined if PIPELINE_ENABLED else _collect_sequential
+    news_data, summary = collect(on_section)
+
+    if summary is None and news_data.report.already_sent:
+        print("ℹ️ 没有新的新闻（均已发送过），跳过本次发送")
+        return True
+    if summary is None:
+        print("❌ 未获取到任何新闻，程序退出")
+        return False
 
     if summary.startswith("生成摘要失败"):
         print(f"❌ {summary}")
         return False
 
+    mark_news_summarized(news_data)
     print("✅ 摘要生成完成\n")
     print("-" * 50)
     print(summary)
@@ -50,9 +127,10 @@ def run_once():
 
     # 4. 发送邮件
     print("📧 正在发送邮件...")
-    success = send_news_digest(summary)
+    success = send_news_digest(summary, renderer.render(summary))
 
     if success:
+        mark_news_emailed(news_data)
         print("\n✅ 新闻日报发送成功！")
         return True
     else:
@@ -103,6 +181,8 @@ def run_scheduler(daily_time):
 
 if __name__ == "__main__":
     if SCHEDULE_DAILY_TIME:
+        if POLLER_ENABLED:
+            start_poller()
         run_scheduler(SCHEDULE_DAILY_TIME)
     else:
         sys.exit(0 if run_once() else 1)
@@ -8,13 +8,19 @@ from __future__ import annotations
 
 import json
 import re
-import time
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 from openai import OpenAI
 
 import config
+import llm_cache
+import llm_metrics
+import llm_scheduler
+import token_budget
+from llm_client import get_client
+from llm_scheduler import LLMResult
+from token_budget import BudgetPlan, CallBudget
 
 
 @dataclass(frozen=True)
@@ -29,33 +35,77 @@ class NewsItem:
 
 
 def create_client() -> OpenAI:
-    return OpenAI(
-        api_key=config.DEEPSEEK_API_KEY,
-        base_url=config.DEEPSEEK_BASE_URL,
-        timeout=config.MORNING_ARTICLE_TIMEOUT,
+    # 重试由 llm_scheduler 负责
+    return get_client(timeout=config.MORNING_ARTICLE_TIMEOUT, max_retries=0)
+
+
+def _call_llm(
+    client: OpenAI,
+    *,
+    system: str,
+    user: str,
+    max_tokens: int,
+    priority: int = llm_scheduler.PRIORITY_ARTICLE,
+    label: str = "晨读",
+    budget: CallBudget | None = None,
+    validate: Callable[[str], Any] | None = None,
+) -> str:
+    """budget: 记录该请求的实际用量（含上下文缓存命中数），其名称即调用记录中的提示词名称
+    validate: 校验输出，不合格时抛出 ValueError；只有通过校验的输出才写入缓存（缓存中不合格的旧结果视为未命中）"""
+    name = budget.name if budget is not None else label
+    key = llm_cache.cache_key("deepseek-chat", system, user, config.MORNING_ARTICLE_TEMPERATURE, max_tokens)
+    cached = llm_cache.lookup(key)
+    if cached is not None and _passes(validate, cached):
+        llm_metrics.record_cache_hit(name, label)
+        if budget is not None:
+            budget.cached = True
+        return cached
+
+    def _request_once() -> LLMResult:
+        resp = client.chat.completions.create(
+            model="deepseek-chat",
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            temperature=config.MORNING_ARTICLE_TEMPERATURE,
+            max_tokens=max_tokens,
+        )
+        return LLMResult(resp.choices[0].message.content or "", resp.usage)
+
+    # 最终失败时抛出异常，由调用方处理
+    result = llm_scheduler.call(
+        _request_once,
+        priority=priority,
+        tokens=token_budget.estimate_tokens(system + user) + max_tokens,
+        attempts=config.MORNING_ARTICLE_MAX_RETRIES,
+        label=label,
+        name=name,
     )
+    if budget is not None:
+        budget.record(result.usage, token_budget.raw_estimate(system + user))
+    if validate is not None:
+        validate(result.content)
+    llm_cache.store(key, result.content, "deepseek-chat")
+    return result.content
+
+
+def _passes(validate: Callable[[str], Any] | None, content: str) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(content)
+        return True
+    except ValueError:
+        return False
 
 
-def _call_llm(client: OpenAI, *, system: str, user: str, max_tokens: int) -> str:
-    for attempt in range(config.MORNING_ARTICLE_MAX_RETRIES):
-        try:
-            resp = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                temperature=config.MORNING_ARTICLE_TEMPERATURE,
-                max_tokens=max_tokens,
-            )
-            return resp.choices[0].message.content or ""
-        except Exception as exc:
-            if attempt >= config.MORNING_ARTICLE_MAX_RETRIES - 1:
-                raise
-            wait_s = 5 * (attempt + 1)
-            print(f"API 调用失败：{exc}，{wait_s}s 后重试... ({attempt+1}/{config.MORNING_ARTICLE_MAX_RETRIES})")
-            time.sleep(wait_s)
-    return ""
+def _budget(calls: List[CallBudget] | None, name: str, system: str, user: str, max_tokens: int) -> CallBudget | None:
+    if calls is None:
+        return None
+    budget = CallBudget(name, token_budget.estimate_tokens(system + user), max_tokens, max_tokens=max_tokens)
+    calls.append(budget)
+    return budget
 
 
 def _extract_json_object(text: str) -> Dict[str, Any]:
@@ -166,13 +216,15 @@ def _items_to_brief_text(items: List[NewsItem]) -> str:
     return "\n\n".join(lines)
 
 
-def _plan_topic_and_outline(client: OpenAI, items: List[NewsItem]) -> Dict[str, Any]:
-    system = (
-        "你是一位中文写作教练 + 宏观与科技投资分析师。"
-        "你擅长用框架化语言写出“可朗读、逻辑强、可复述”的短文。"
-        "你严禁编造输入中不存在的具体数字与事实；若缺少数据，用定性表述并明确不确定性。"
-    )
-    user = f"""下面是一组新闻条目（包含标题/摘要/链接）。请你完成“选题+大纲”，并严格输出 JSON（不要输出任何非 JSON 内容）。
+# 提示词的固定部分（系统提示、任务说明、输出格式）逐字节不变且放在最前，变化的新闻与大纲放在最后，
+# 可命中 DeepSeek 的上下文缓存
+_PLAN_SYSTEM = (
+    "你是一位中文写作教练 + 宏观与科技投资分析师。"
+    "你擅长用框架化语言写出“可朗读、逻辑强、可复述”的短文。"
+    "你严禁编造输入中不存在的具体数字与事实；若缺少数据，用定性表述并明确不确定性。"
+)
+
+_PLAN_INSTRUCTIONS = """文末是一组新闻条目（包含标题/摘要/链接）。请你完成“选题+大纲”，并严格输出 JSON（不要输出任何非 JSON 内容）。
 
 目标：选择 1 个“AI × 金融/市场”核心主题，生成 3–5 分钟晨读短文。
 
@@ -182,51 +234,69 @@ def _plan_topic_and_outline(client: OpenAI, items: List[NewsItem]) -> Dict[str,
 3) 事实卡片与引用必须来自给定条目，使用条目 id 引用（如 N003）。
 
 输出 JSON schema：
-{{
+{
   "theme_title": "一句话标题",
   "thesis": "一句话核心结论",
   "supporting_ids": ["N001","N002"],
-  "outline": {{
+  "outline": {
      "hook_3_sentences": ["...","...","..."],
-     "fact_cards": [{{"id":"N001","point":"一句话事实"}}, ...],
+     "fact_cards": [{"id":"N001","point":"一句话事实"}, ...],
      "causal_chain": ["环节1→环节2", "..."],
      "second_order": ["二阶影响1", "二阶影响2"],
      "risks_counterpoints": ["风险/反例1", "风险/反例2"],
      "conclusion_3_sentences": ["...","...","..."],
      "watchlist": ["观察点1","观察点2","观察点3"]
-  }}
-}}
+  }
+}
+"""
+
 
+def _plan_topic_and_outline(
+    client: OpenAI,
+    items: List[NewsItem],
+    calls: List[CallBudget] | None = None,
+) -> Dict[str, Any]:
+    user = f"""{_PLAN_INSTRUCTIONS}
 新闻条目：
 {_items_to_brief_text(items)}
 """
-    raw = _call_llm(client, system=system, user=user, max_tokens=900)
-    data = _extract_json_object(raw)
-    if not data.get("supporting_ids"):
+    budget = _budget(calls, "plan", _PLAN_SYSTEM, user, 900)
+    raw = _call_llm(
+        client, system=_PLAN_SYSTEM, user=user, max_tokens=900, label="晨读选题", budget=budget, validate=_parse_plan
+    )
+    return _parse_plan(raw)
+
+
+def _parse_plan(raw: str) -> Dict[str, Any]:
+    try:
+        data = _extract_json_object(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"无法从模型输出解析 JSON: {e}") from e
+    if not isinstance(data, dict) or not data.get("supporting_ids"):
         raise ValueError("选题阶段返回不完整 JSON：缺少 supporting_ids")
     return data
 
 
-def _write_article(client: OpenAI, plan: Dict[str, Any], items_by_id: Dict[str, NewsItem]) -> str:
-    system = (
-        "你是一位中文写作教练 + 投资研究员。"
-        "你写作的文章必须适合朗读，句子不要太长，多用连接词。"
-        "严禁编造输入中不存在的具体数字与事实；不确定之处要说清楚。"
-    )
+def _check_article(article: str) -> str:
+    article = article.strip()
+    if not article or "##" not in article:
+        raise ValueError("生成晨读短文失败：输出为空或结构不完整")
+    return article
+
+
+_WRITE_SYSTEM = (
+    "你是一位中文写作教练 + 投资研究员。"
+    "你写作的文章必须适合朗读，句子不要太长，多用连接词。"
+    "严禁编造输入中不存在的具体数字与事实；不确定之处要说清楚。"
+)
 
-    cited_items = []
-    for nid in plan.get("supporting_ids", []):
-        it = items_by_id.get(nid)
-        if not it:
-            continue
-        cited_items.append(f"{nid}: {it.title} ({it.source}) {it.link}")
 
-    target_min = config.MORNING_ARTICLE_MIN_CHARS
-    target_max = config.MORNING_ARTICLE_MAX_CHARS
-    user = f"""请根据以下“选题与大纲”写成一篇中文晨读短文。
+def _write_instructions() -> str:
+    # 只依赖配置，相同配置下逐字节不变
+    return f"""请根据文末的“选题与大纲”写成一篇中文晨读短文。
 
 硬性要求：
-1) 总长度控制在 {target_min}–{target_max} 个中文字符左右（不含链接 URL 也可以）。
+1) 总长度控制在 {config.MORNING_ARTICLE_MIN_CHARS}–{config.MORNING_ARTICLE_MAX_CHARS} 个中文字符左右（不含链接 URL 也可以）。
 2) 结构必须严格如下，并使用 Markdown 标题：
    - # 标题
    - ## 30秒导语（3句）
@@ -237,17 +307,43 @@ def _write_article(client: OpenAI, plan: Dict[str, Any], items_by_id: Dict[str,
    - ## 参考链接（列出 supporting_ids 对应链接）
 3) “事实卡片”里只写输入中明确提到的事实；如果不确定，用“据报道/可能/尚待确认”并标注不确定性。
 4) 分析要用框架化语言（例如：驱动因素/传导路径/边际变化/情景假设）。
+"""
+
+
+def _write_article(
+    client: OpenAI,
+    plan: Dict[str, Any],
+    items_by_id: Dict[str, NewsItem],
+    calls: List[CallBudget] | None = None,
+) -> str:
+    cited_items = []
+    for nid in plan.get("supporting_ids", []):
+        it = items_by_id.get(nid)
+        if not it:
+            continue
+        cited_items.append(f"{nid}: {it.title} ({it.source}) {it.link}")
 
+    user = f"""{_write_instructions()}
 可引用的新闻（supporting_ids 对应）：
 {chr(10).join(cited_items)}
 
 选题与大纲（JSON）：
 {json.dumps(plan, ensure_ascii=False)}
 """
-    return _call_llm(client, system=system, user=user, max_tokens=config.MORNING_ARTICLE_MAX_TOKENS).strip()
-
-
-def _enforce_length(client: OpenAI, article: str) -> str:
+    max_tokens = config.MORNING_ARTICLE_MAX_TOKENS
+    budget = _budget(calls, "write", _WRITE_SYSTEM, user, max_tokens)
+    return _call_llm(
+        client,
+        system=_WRITE_SYSTEM,
+        user=user,
+        max_tokens=max_tokens,
+        label="晨读写作",
+        budget=budget,
+        validate=_check_article,
+    ).strip()
+
+
+def _enforce_length(client: OpenAI, article: str, calls: List[CallBudget] | None = None) -> str:
     chars = len(re.sub(r"\s+", "", article))
     if config.MORNING_ARTICLE_MIN_CHARS <= chars <= config.MORNING_ARTICLE_MAX_CHARS:
         return article
@@ -262,7 +358,17 @@ def _enforce_length(client: OpenAI, article: str) -> str:
 文章：
 {article}
 """
-    revised = _call_llm(client, system=system, user=user, max_tokens=config.MORNING_ARTICLE_MAX_TOKENS).strip()
+    budget = _budget(calls, "enforce_length", system, user, config.MORNING_ARTICLE_MAX_TOKENS)
+    revised = _call_llm(
+        client,
+        system=system,
+        user=user,
+        max_tokens=config.MORNING_ARTICLE_MAX_TOKENS,
+        priority=llm_scheduler.PRIORITY_REVISE,
+        label="晨读篇幅调整",
+        budget=budget,
+        validate=_check_article,
+    ).strip()
     return revised or article
 
 
@@ -275,11 +381,14 @@ def generate_morning_article(news_data: Dict[str, Dict[str, List[Dict]]]) -> str
         raise ValueError("候选新闻过少，无法生成晨读短文")
 
     items_by_id = {x.id: x for x in candidates}
-    plan = _plan_topic_and_outline(client, candidates)
-    article = _write_article(client, plan, items_by_id)
-    article = _enforce_length(client, article)
-
-    if not article or "##" not in article:
-        raise ValueError("生成晨读短文失败：输出为空或结构不完整")
-    return article
+    calls: List[CallBudget] = []
+    try:
+        plan = _plan_topic_and_outline(client, candidates, calls)
+        article = _write_article(client, plan, items_by_id, calls)
+        article = _enforce_length(client, article, calls)
+    finally:
+        # 三个请求依次执行；报告实际用量与上下文缓存命中
+        BudgetPlan("morning", [[call] for call in calls]).report()
+
+    return _check_article(article)
 
@@ -7,18 +7,28 @@
 
 from datetime import datetime
 
+import llm_metrics
 from email_sender import send_email
-from news_fetcher import fetch_all_news
+from feed_poller import latest_news
+from news_fetcher import print_fetch_report
 from morning_article import generate_morning_article
 
 
 def run_once() -> bool:
+    # 结束时汇总本次运行的 LLM 调用（逐条记录见 LLM_METRICS_PATH）
+    with llm_metrics.collect("morning"):
+        return _run_article()
+
+
+def _run_article() -> bool:
     print(f"\n{'='*50}")
     print(f"晚读分析短文 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*50}\n")
 
     print("📡 正在获取金融 + 科技新闻...")
-    news_data = fetch_all_news(categories=["finance", "tech"])
+    # 晚读每天从当天的新闻中选题，不因早报已发送过而跳过（ONLY_NEW_ITEMS 只用于早报）
+    news_data = latest_news(categories=["finance", "tech"], only_new=False)
+    print_fetch_report(news_data)
 
     print("🤖 正在生成晨读分析短文...")
     try:
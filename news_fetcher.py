@@ -7,12 +7,20 @@ from __future__ import annotations
 import feedparser
 import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Tuple
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
 import config
+import source_health
+from dedup import dedup_across_categories
+from feed_body import BodyReader, accept_encoding, truncate_at_entry_boundary
+from feed_cache import FeedCache, get_feed_cache
+from feed_replay import replay_url
+from feed_stream import StreamingFeedParser
+from item_store import ItemStore, ObservedItem, get_item_store
 
 # 主题分类配置
 CATEGORIES = {
@@ -32,6 +40,42 @@ REGIONS = {
     "global": ("全球", "🌐")
 }
 
+# 抓取任务（每个唯一 URL 一个）：(url, source_name, limit)
+FetchTask = Tuple[str, str, int]
+# 引用某个 URL 的位置：(category_key, region_key, source_name, limit)
+FeedSlot = Tuple[str, str, str, int]
+
+
+@dataclass
+class FetchReport:
+    """一次 fetch_all_news 的抓取情况"""
+    elapsed: float = 0.0
+    deadline: float | None = None
+    late: List[str] = field(default_factory=list)  # 截止时仍未返回的源
+    missing: List[str] = field(default_factory=list)  # 已返回但没有拿到新闻的源（失败/熔断/空 feed）
+    already_sent: int = 0  # only_new 模式下过滤掉的已发送条目数
+
+
+class ParsedFeed(NamedTuple):
+    items: List[Dict]
+    ttl: int | None  # RSS <ttl>（分钟）
+
+
+@dataclass
+class FeedResult:
+    """单个源的抓取结果"""
+    items: List[Dict]
+    ok: bool = True
+    refresh_after: float | None = None  # 源建议的刷新间隔（秒）
+
+
+class NewsData(dict):
+    """fetch_all_news 的返回值：{category: {region: [items]}}，并附带 report 抓取报告"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.report = FetchReport()
+
 
 def _clean_text(s: str) -> str:
     s = re.sub(r"<[^>]+>", "", s or "")
@@ -46,43 +90,183 @@ def _normalize_key(link: str, title: str) -> str:
     return f"title:{(title or '').strip().lower()}"
 
 
-def fetch_news_from_rss(url: str, source_name: str, limit: int = 3) -> List[Dict]:
-    """从单个 RSS 源获取新闻（带超时与轻量重试）"""
+def _entry_to_item(entry, source_name: str) -> Dict:
+    title = entry.get("title", "无标题")
+    link = entry.get("link", "")
+    summary = entry.get("summary", entry.get("description", "")) or ""
+    return {
+        "title": _clean_text(title)[:200],
+        "link": (link or "").strip(),
+        "summary": _clean_text(summary)[:500],
+        "source": source_name,
+        "published": entry.get("published", "") or "",
+    }
+
+
+def _parse_feed(raw: bytes, source_name: str, limit: int) -> ParsedFeed:
+    feed = feedparser.parse(raw)
+    # feedparser 可能会设置 bozo=1 表示解析异常；不强制失败，尽量吃到 entries。
+    ttl = str(feed.feed.get("ttl", "")).strip()
+    return ParsedFeed(
+        [_entry_to_item(entry, source_name) for entry in feed.entries[:limit]],
+        int(ttl) if ttl.isdigit() else None,
+    )
+
+
+def _parse_truncated(raw: bytes, source_name: str, limit: int, truncated: bool) -> ParsedFeed:
+    """整体解析（非流式）；响应体被截断时先切到最后一个完整条目"""
+    if truncated:
+        print(f"{source_name} 响应超过 {config.RSS_MAX_BODY_BYTES} 字节，已截断")
+        raw = truncate_at_entry_boundary(raw)
+    return _parse_feed(raw, source_name, limit)
+
+
+def _finish_stream_parse(parser: StreamingFeedParser, source_name: str, limit: int, truncated: bool = False) -> ParsedFeed:
+    """流式解析收尾：成功则直接使用结果，XML 不规范或没有条目时用 feedparser 解析已读字节。
+    truncated 表示响应体超过上限被截断，此时文档不完整，只保留已完整解析的条目"""
+    if truncated:
+        print(f"{source_name} 响应超过 {config.RSS_MAX_BODY_BYTES} 字节，已截断")
+    else:
+        parser.close()
+    if parser.failed or not parser.entries:
+        raw = truncate_at_entry_boundary(parser.raw) if truncated else parser.raw
+        return _parse_feed(raw, source_name, limit)
+    return ParsedFeed([_entry_to_item(entry, source_name) for entry in parser.entries], parser.ttl)
+
+
+def _read_and_parse(resp, source_name: str, limit: int) -> ParsedFeed:
+    body = BodyReader(resp.headers.get("Content-Encoding"))
+    parser = StreamingFeedParser(limit) if config.RSS_STREAM_PARSE else None
+    chunks: List[bytes] = []
+    while not body.done:
+        chunk = resp.read(config.RSS_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        data = body.decode(chunk)
+        if parser is None:
+            chunks.append(data)
+        elif parser.feed(data):
+            break
+
+    if parser is not None:
+        return _finish_stream_parse(parser, source_name, limit, body.truncated)
+    return _parse_truncated(b"".join(chunks), source_name, limit, body.truncated)
+
+
+def _refresh_after(headers, ttl_minutes: int | None) -> float | None:
+    """源建议的刷新间隔（秒）：RSS <ttl> 与 Cache-Control max-age 取较大者"""
+    candidates: List[float] = []
+    if ttl_minutes:
+        candidates.append(ttl_minutes * 60.0)
+    m = re.search(r"max-age=(\d+)", (headers.get("Cache-Control") or "") if headers is not None else "")
+    if m:
+        candidates.append(float(m.group(1)))
+    return max(candidates) if candidates else None
+
+
+def _request_headers(cache: FeedCache | None, url: str, limit: int) -> Dict[str, str]:
+    headers = {"User-Agent": config.RSS_USER_AGENT, "Accept-Encoding": accept_encoding()}
+    if cache is not None:
+        headers.update(cache.validator_headers(url, limit))
+    return headers
+
+
+def _not_modified_items(cache: FeedCache | None, url: str, source_name: str, limit: int) -> List[Dict] | None:
+    """服务端返回 304 时从缓存取回条目；缓存缺失则返回 None"""
+    if cache is None:
+        return None
+    cached = cache.cached_items(url)
+    if cached is None:
+        return None
+    return [dict(it, source=source_name) for it in cached[:limit]]
+
+
+def fetch_feed(url: str, source_name: str, limit: int = 3) -> FeedResult:
+    """从单个 RSS 源获取新闻（带超时与轻量重试；支持 ETag / Last-Modified 条件请求；
+    连续失败的源会被熔断跳过，超时按历史延迟自适应）"""
+    plan = source_health.plan_fetch(url)
+    if plan.skip:
+        print(f"跳过 {source_name}：连续失败 {plan.failure_streak} 次，熔断中")
+        return FeedResult([], ok=False)
+
+    cache = get_feed_cache()
     last_err: Exception | None = None
-    for attempt in range(config.RSS_MAX_RETRIES + 1):
+    for attempt in range(plan.max_retries + 1):
+        started = time.monotonic()
         try:
-            req = Request(url, headers={"User-Agent": config.RSS_USER_AGENT})
-            with urlopen(req, timeout=config.RSS_TIMEOUT) as resp:
-                raw = resp.read()
-
-            feed = feedparser.parse(raw)
-            # feedparser 可能会设置 bozo=1 表示解析异常；不强制失败，尽量吃到 entries。
-            news_list: List[Dict] = []
-            for entry in feed.entries[:limit]:
-                title = entry.get("title", "无标题")
-                link = entry.get("link", "")
-                summary = entry.get("summary", entry.get("description", "")) or ""
-                news_item = {
-                    "title": _clean_text(title)[:200],
-                    "link": (link or "").strip(),
-                    "summary": _clean_text(summary)[:500],
-                    "source": source_name,
-                    "published": entry.get("published", "") or "",
-                }
-                news_list.append(news_item)
-            return news_list
+            req = Request(replay_url(url), headers=_request_headers(cache, url, limit))
+            try:
+                with urlopen(req, timeout=plan.timeout) as resp:
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+                    parsed = _read_and_parse(resp, source_name, limit)
+                    refresh_after = _refresh_after(resp.headers, parsed.ttl)
+            except HTTPError as e:
+                if e.code == 304:
+                    cached = _not_modified_items(cache, url, source_name, limit)
+                    if cached is not None:
+                        source_health.record_success(url, None)
+                        return FeedResult(cached, refresh_after=_refresh_after(e.headers, None))
+                raise
+
+            if cache is not None:
+                cache.store(url, etag, last_modified, parsed.items, limit)
+            source_health.record_success(url, time.monotonic() - started)
+            return FeedResult(parsed.items, refresh_after=refresh_after)
 
         except (HTTPError, URLError, TimeoutError, Exception) as e:
             last_err = e
-            if attempt < config.RSS_MAX_RETRIES:
+            if attempt < plan.max_retries:
                 time.sleep(config.RSS_BACKOFF_SECONDS * (attempt + 1))
                 continue
+            source_health.record_failure(url, e)
             print(f"获取 {source_name} 新闻失败: {e}")
-            return []
+            return FeedResult([], ok=False)
 
     # 理论上不会到这里
     print(f"获取 {source_name} 新闻失败: {last_err}")
-    return []
+    return FeedResult([], ok=False)
+
+
+def fetch_news_from_rss(url: str, source_name: str, limit: int = 3) -> List[Dict]:
+    """从单个 RSS 源获取新闻条目（fetch_feed 的简化版本）"""
+    return fetch_feed(url, source_name, limit).items
+
+
+def _observed_items(news_data: Dict[str, Dict[str, List[Dict]]]) -> List[ObservedItem]:
+    return [
+        (_normalize_key(it.get("link", ""), it.get("title", "")), category_key, region_key, it)
+        for category_key, regions in news_data.items()
+        for region_key, items in regions.items()
+        for it in items
+    ]
+
+
+def _drop_already_sent(all_news: Dict[str, Dict[str, List[Dict]]], store: ItemStore) -> int:
+    observed = _observed_items(all_news)
+    sent = store.emailed_keys(key for key, _c, _r, _it in observed)
+    if not sent:
+        return 0
+    for category_key, regions in all_news.items():
+        for region_key, items in regions.items():
+            regions[region_key] = [
+                it for it in items if _normalize_key(it.get("link", ""), it.get("title", "")) not in sent
+            ]
+    return sum(1 for key, _c, _r, _it in observed if key in sent)
+
+
+def mark_news_summarized(news_data: Dict[str, Dict[str, List[Dict]]]) -> None:
+    """在条目库中标记这些新闻已进入摘要"""
+    store = get_item_store()
+    if store is not None:
+        store.mark_summarized(key for key, _c, _r, _it in _observed_items(news_data))
+
+
+def mark_news_emailed(news_data: Dict[str, Dict[str, List[Dict]]]) -> None:
+    """在条目库中标记这些新闻已发送；only_new 模式下之后的运行将不再返回它们"""
+    store = get_item_store()
+    if store is not None:
+        store.mark_emailed(key for key, _c, _r, _it in _observed_items(news_data))
 
 
 def _dedup_in_place(all_news: Dict[str, Dict[str, List[Dict]]]) -> None:
@@ -99,19 +283,81 @@ def _dedup_in_place(all_news: Dict[str, Dict[str, List[Dict]]]) -> None:
             all_news[category_key][region_key] = out
 
 
-def fetch_all_news(categories: List[str] | None = None) -> Dict[str, Dict[str, List[Dict]]]:
-    """获取新闻源的新闻，按主题和地区分类
+def _fetch_tasks_threaded(tasks: List[FetchTask], deadline: float | None = None) -> Iterator[Tuple[FetchTask, List[Dict] | None]]:
+    """线程池后端：每个任务独立 urlopen，按完成顺序产出结果
 
-    Args:
-        categories: 需要抓取的分类 key 列表（如 ["finance", "tech"]）。
-            为空则抓取全部分类。
+    deadline 秒后仍未完成的任务产出 None（后台线程不再等待）；开启对冲时，
+    超过 RSS_HEDGE_AFTER 秒仍在运行的请求会在独立线程池里再发一次，先完成者生效。
     """
-    all_news = {}
+    ex = ThreadPoolExecutor(max_workers=config.RSS_MAX_WORKERS)
+    hedge_ex: ThreadPoolExecutor | None = None
+    started = time.monotonic()
+    deadline_at = started + deadline if deadline else None
+    hedge_at = started + config.RSS_HEDGE_AFTER if config.RSS_HEDGE_AFTER > 0 else None
+    finished: set[FetchTask] = set()
+    try:
+        future_map: Dict[Future, FetchTask] = {
+            ex.submit(fetch_news_from_rss, url, source_name, limit): (url, source_name, limit)
+            for (url, source_name, limit) in tasks
+        }
+        pending = set(future_map)
 
-    selected_categories = categories or list(CATEGORIES.keys())
+        while pending and len(finished) < len(tasks):
+            now = time.monotonic()
+            wake_at = min(t for t in (deadline_at, hedge_at, float("inf")) if t is not None)
+            timeout = None if wake_at == float("inf") else max(0.0, wake_at - now)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
 
-    tasks: List[Tuple[str, str, str, str]] = []  # (category_key, region_key, source_name, url)
-    for category_key in selected_categories:
+            for fut in done:
+                task = future_map[fut]
+                if task in finished:
+                    continue
+                finished.add(task)
+                try:
+                    news = fut.result()
+                except Exception as e:
+                    print(f"获取 {task[1]} 新闻失败: {e}")
+                    news = []
+                yield task, news
+
+            now = time.monotonic()
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                stragglers = [f for f in pending if f.running() and future_map[f] not in finished]
+                if stragglers:
+                    hedge_ex = ThreadPoolExecutor(max_workers=min(len(stragglers), config.RSS_HEDGE_MAX_WORKERS))
+                    for fut in stragglers[: config.RSS_HEDGE_MAX_WORKERS]:
+                        url, source_name, limit = task = future_map[fut]
+                        print(f"{source_name} 响应较慢，发起对冲请求")
+                        hedged = hedge_ex.submit(fetch_news_from_rss, url, source_name, limit)
+                        future_map[hedged] = task
+                        pending.add(hedged)
+            if deadline_at is not None and now >= deadline_at:
+                break
+
+        for task in tasks:
+            if task not in finished:
+                yield task, None
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+        if hedge_ex is not None:
+            hedge_ex.shutdown(wait=False, cancel_futures=True)
+
+
+def _fetch_tasks(tasks: List[FetchTask], deadline: float | None = None) -> Iterable[Tuple[FetchTask, List[Dict] | None]]:
+    if config.RSS_FETCH_BACKEND == "async":
+        import async_fetcher
+
+        if async_fetcher.is_available():
+            return async_fetcher.fetch_tasks(tasks, deadline)
+        print("未安装 aiohttp，回退到线程池抓取")
+    return _fetch_tasks_threaded(tasks, deadline)
+
+
+def _build_feed_registry(categories: List[str], all_news: Dict[str, Dict[str, List[Dict]]]) -> Dict[str, List[FeedSlot]]:
+    """按 URL 汇总新闻源：同一 URL 出现在多个分类/地区时只抓取一次"""
+    registry: Dict[str, List[FeedSlot]] = {}
+    for category_key in categories:
         if category_key not in CATEGORIES:
             continue
         all_news[category_key] = {}
@@ -119,28 +365,156 @@ def fetch_all_news(categories: List[str] | None = None) -> Dict[str, Dict[str, L
         for region_key, sources in category_sources.items():
             all_news[category_key][region_key] = []
             for source in sources:
-                tasks.append((category_key, region_key, source["name"], source["url"]))
+                limit = int(source.get("limit", config.NEWS_PER_SOURCE))
+                registry.setdefault(source["url"], []).append((category_key, region_key, source["name"], limit))
+    return registry
 
-    with ThreadPoolExecutor(max_workers=config.RSS_MAX_WORKERS) as ex:
-        future_map = {
-            ex.submit(fetch_news_from_rss, url, source_name, config.NEWS_PER_SOURCE): (category_key, region_key, source_name)
-            for (category_key, region_key, source_name, url) in tasks
-        }
 
-        for fut in as_completed(future_map):
-            category_key, region_key, source_name = future_map[fut]
-            try:
-                news = fut.result()
-            except Exception as e:
-                print(f"获取 {source_name} 新闻失败: {e}")
-                news = []
-            all_news[category_key][region_key].extend(news)
-            print(f"从 {source_name} 获取了 {len(news)} 条新闻")
+def _distribute(all_news: NewsData, slots: List[FeedSlot], news: List[Dict] | None, log: bool = True) -> None:
+    """把一个 URL 的抓取结果分发到引用它的各个位置；news 为 None 表示未按时返回"""
+    for category_key, region_key, source_name, limit in slots:
+        if news is None:
+            all_news.report.late.append(source_name)
+            continue
+        if not news:
+            all_news.report.missing.append(source_name)
+        shared = [dict(it, source=source_name) for it in news[:limit]]
+        all_news[category_key][region_key].extend(shared)
+        if log:
+            print(f"从 {source_name} 获取了 {len(shared)} 条新闻")
+
 
+def _restore_source_order(all_news: Dict[str, Dict[str, List[Dict]]]) -> None:
+    """各地区内按配置中的源顺序排列（抓取按完成先后到达），保证相同输入得到相同的提示词"""
+    for category_key, regions in all_news.items():
+        for region_key, items in regions.items():
+            sources = config.NEWS_SOURCES.get(category_key, {}).get(region_key, [])
+            rank = {}
+            for idx, source in enumerate(sources):
+                rank.setdefault(source["name"], idx)
+            items.sort(key=lambda it: rank.get(it.get("source", ""), len(rank)))
+
+
+def _finalize_news(all_news: NewsData, only_new: bool | None) -> NewsData:
+    """排序、去重、记录到条目库，并按需过滤已发送条目"""
+    _restore_source_order(all_news)
     _dedup_in_place(all_news)
+    if config.DEDUP_GLOBAL:
+        removed = dedup_across_categories(all_news)
+        if removed:
+            print(f"跨分类去重：移除 {removed} 条重复新闻")
+
+    store = get_item_store()
+    if store is not None:
+        store.observe(_observed_items(all_news))
+        if config.ONLY_NEW_ITEMS if only_new is None else only_new:
+            all_news.report.already_sent = _drop_already_sent(all_news, store)
     return all_news
 
 
+def fetch_all_news(
+    categories: List[str] | None = None,
+    deadline: float | None = None,
+    only_new: bool | None = None,
+) -> NewsData:
+    """获取新闻源的新闻，按主题和地区分类
+
+    Args:
+        categories: 需要抓取的分类 key 列表（如 ["finance", "tech"]）。
+            为空则抓取全部分类。
+        deadline: 整体抓取时限（秒）；到时返回已完成的部分，未完成的源记入 report.late。
+            为空则使用 config.RSS_FETCH_DEADLINE（0 表示不限时）。
+        only_new: 只返回此前未发送过的新闻（依赖条目库）。为空则使用 config.ONLY_NEW_ITEMS。
+    """
+    all_news = NewsData()
+    if deadline is None:
+        deadline = config.RSS_FETCH_DEADLINE or None
+    all_news.report.deadline = deadline
+    started = time.monotonic()
+
+    selected_categories = categories or list(CATEGORIES.keys())
+    registry = _build_feed_registry(selected_categories, all_news)
+
+    # 每个 URL 按引用它的最大 limit 抓取一次，再分发到各个位置
+    tasks: List[FetchTask] = [
+        (url, slots[0][2], max(slot[3] for slot in slots)) for url, slots in registry.items()
+    ]
+
+    for (url, _source_name, _limit), news in _fetch_tasks(tasks, deadline):
+        _distribute(all_news, registry[url], news)
+
+    all_news.report.elapsed = time.monotonic() - started
+    return _finalize_news(all_news, only_new)
+
+
+def _finalize_category(all_news: NewsData, category_key: str, delivered: List[str], only_new: bool | None) -> None:
+    """流水线模式下单个分类的收尾：与 _finalize_news 相同的处理，但只改动该分类；
+    与已交付分类重复的条目从该分类中删除"""
+    view = {category_key: all_news[category_key]}
+    _restore_source_order(view)
+    _dedup_in_place(view)
+    if config.DEDUP_GLOBAL and delivered:
+        removed = dedup_across_categories(
+            {**{key: all_news[key] for key in delivered}, **view}, frozen=delivered
+        )
+        if removed:
+            print(f"跨分类去重：{CATEGORIES[category_key][0]} 移除 {removed} 条重复新闻")
+
+    store = get_item_store()
+    if store is not None:
+        store.observe(_observed_items(view))
+        if config.ONLY_NEW_ITEMS if only_new is None else only_new:
+            all_news.report.already_sent += _drop_already_sent(view, store)
+
+
+def iter_news_by_category(
+    categories: List[str] | None = None,
+    deadline: float | None = None,
+    only_new: bool | None = None,
+) -> Iterator[Tuple[str, NewsData]]:
+    """与 fetch_all_news 参数相同，但按分类逐个产出：某分类引用的源全部返回（或超过 deadline）
+    即产出 (分类 key, 抓取结果)，调用方可立即开始处理该分类，其余分类继续抓取。
+
+    每次产出的是同一个 NewsData；已产出的分类之后不再改动，全部产出后 report 完整。
+    """
+    all_news = NewsData()
+    if deadline is None:
+        deadline = config.RSS_FETCH_DEADLINE or None
+    all_news.report.deadline = deadline
+    started = time.monotonic()
+
+    selected_categories = categories or list(CATEGORIES.keys())
+    registry = _build_feed_registry(selected_categories, all_news)
+    waiting: Dict[str, set] = {key: set() for key in all_news}
+    for url, slots in registry.items():
+        for slot in slots:
+            waiting[slot[0]].add(url)
+
+    delivered: List[str] = []
+
+    def _ready() -> Iterator[Tuple[str, NewsData]]:
+        for key in [key for key, urls in waiting.items() if not urls]:
+            del waiting[key]
+            all_news.report.elapsed = time.monotonic() - started
+            _finalize_category(all_news, key, delivered, only_new)
+            delivered.append(key)
+            yield key, all_news
+
+    # 没有配置源的分类直接产出
+    yield from _ready()
+
+    tasks: List[FetchTask] = [
+        (url, slots[0][2], max(slot[3] for slot in slots)) for url, slots in registry.items()
+    ]
+    for (url, _source_name, _limit), news in _fetch_tasks(tasks, deadline):
+        _distribute(all_news, registry[url], news)
+        for category_key, *_rest in registry[url]:
+            waiting.get(category_key, set()).discard(url)
+        yield from _ready()
+
+    all_news.report.elapsed = time.monotonic() - started
+
+
 def format_news_for_summary(news_data: Dict[str, Dict[str, List[Dict]]]) -> str:
     """将新闻格式化为文本，供 AI 总结"""
     parts: List[str] = []
@@ -183,6 +557,20 @@ def count_total_news(news_data: Dict[str, Dict[str, List[Dict]]]) -> int:
     return total
 
 
+def print_fetch_report(news_data: Dict[str, Dict[str, List[Dict]]]):
+    """打印超时/缺失的新闻源"""
+    report = getattr(news_data, "report", None)
+    if report is None:
+        return
+    print(f"   ⏱️ 抓取耗时 {report.elapsed:.1f} 秒")
+    if report.late:
+        print(f"   ⚠️ 超过 {report.deadline:g} 秒未返回，已丢弃: {', '.join(report.late)}")
+    if report.missing:
+        print(f"   ⚠️ 未获取到新闻: {', '.join(report.missing)}")
+    if report.already_sent:
+        print(f"   ♻️ 已跳过 {report.already_sent} 条此前发送过的新闻")
+
+
 def print_news_stats(news_data: Dict[str, Dict[str, List[Dict]]]):
     """打印新闻统计"""
     for cat_key, (cat_name, cat_emoji) in CATEGORIES.items():
@@ -0,0 +1,233 @@
+"""
+本地重要性排序 - 在摘要之前按分数为每个地区只保留前 K 条新闻
+
+分数由四部分加权（各部分归一化到 0-1，权重见 config.RANK_WEIGHT_*）：
+- 时效：按发布时间指数衰减（半衰期 RANK_HALF_LIFE_HOURS），缺少时间的条目取 0.5
+- 来源：config.RANK_SOURCE_WEIGHTS 中的权重（未配置为 1.0），按最大权重归一化
+- 覆盖度：同一事件被多少个不同来源报道（去重时合并的来源 + 标题相近的其他条目）
+- 关键词：命中 config.RANK_KEYWORDS 的权重之和，标题中带数字/百分比/金额时额外加分
+
+只用 CPU，几千条新闻在百毫秒量级完成；每次运行的统计（各地区保留/丢弃数、分数线、
+各分项均值）可打印或追加到 RANK_STATS_PATH，便于调整 K 与权重。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Tuple
+
+import config
+from dedup import similar_pairs, tokenize
+
+_COMPONENTS = ("recency", "source", "coverage", "keyword")
+
+# 标题中的关键数据：百分比、金额、带单位的数字
+_FIGURE_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:%|percent|bn|billion|million|trillion|bp|bps)|[$€£¥]\s?\d", re.IGNORECASE)
+
+# 覆盖度达到该来源数即记满分
+_FULL_COVERAGE = 4
+
+
+@dataclass
+class RegionStats:
+    category: str
+    region: str
+    total: int
+    kept: int
+    cutoff: float | None = None  # 保留条目中的最低分
+    best_dropped: float | None = None  # 被丢弃条目中的最高分
+
+
+@dataclass
+class RankingStats:
+    """一次排序的统计"""
+    items_in: int = 0
+    items_out: int = 0
+    elapsed_ms: float = 0.0
+    means: Dict[str, float] = field(default_factory=dict)  # 各分项与总分的均值（全部条目）
+    regions: List[RegionStats] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _published_at(item: Dict) -> datetime | None:
+    value = (item.get("published") or "").strip()
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _recency(item: Dict, now: datetime) -> float:
+    dt = _published_at(item)
+    if dt is None or config.RANK_HALF_LIFE_HOURS <= 0:
+        return 0.5
+    age_hours = max(0.0, (now - dt).total_seconds() / 3600)
+    return 0.5 ** (age_hours / config.RANK_HALF_LIFE_HOURS)
+
+
+def _source(item: Dict, max_weight: float) -> float:
+    weight = config.RANK_SOURCE_WEIGHTS.get(item.get("source", ""), 1.0)
+    return weight / max_weight if max_weight > 0 else 0.0
+
+
+def _keyword(item: Dict) -> float:
+    words = set(tokenize(f"{item.get('title', '')} {item.get('summary', '')}"))
+    score = sum(weight for keyword, weight in config.RANK_KEYWORDS.items() if keyword in words)
+    if _FIGURE_RE.search(item.get("title", "")):
+        score += 1.0
+    return min(1.0, score / 3)
+
+
+def _coverage(items: List[Dict]) -> List[float]:
+    """每条新闻被多少个不同来源报道（含自身），换算为 0-1"""
+    # 转述的标题很少共享词二元组，这里按标题词集合比较
+    features = [{(tok,) for tok in tokenize(it.get("title", ""))} for it in items]
+    related: List[set] = [set() for _ in items]
+    for i, j in similar_pairs(features, config.RANK_COVERAGE_THRESHOLD):
+        related[i].add(items[j].get("source", ""))
+        related[j].add(items[i].get("source", ""))
+
+    scores = []
+    for it, sources in zip(items, related):
+        sources.discard(it.get("source", ""))
+        count = it.get("coverage", 1) + len(sources)
+        scores.append(min(1.0, math.log(count) / math.log(_FULL_COVERAGE)))
+    return scores
+
+
+def score_items(items: List[Dict]) -> List[Dict[str, float]]:
+    """计算每条新闻的各分项与总分（{"recency":…, "source":…, "coverage":…, "keyword":…, "score":…}）"""
+    now = datetime.now(timezone.utc)
+    max_weight = max([1.0, *config.RANK_SOURCE_WEIGHTS.values()])
+    weights = {
+        "recency": config.RANK_WEIGHT_RECENCY,
+        "source": config.RANK_WEIGHT_SOURCE,
+        "coverage": config.RANK_WEIGHT_COVERAGE,
+        "keyword": config.RANK_WEIGHT_KEYWORD,
+    }
+    coverage = _coverage(items)
+    scores = []
+    for it, cov in zip(items, coverage):
+        parts = {
+            "recency": _recency(it, now),
+            "source": _source(it, max_weight),
+            "coverage": cov,
+            "keyword": _keyword(it),
+        }
+        parts["score"] = sum(weights[name] * parts[name] for name in _COMPONENTS)
+        scores.append(parts)
+    return scores
+
+
+def top_k_for(category_key: str) -> int:
+    return config.RANK_TOP_K_CRYPTO if category_key == "crypto" else config.RANK_TOP_K
+
+
+def rank_news(news_data: Dict[str, Dict[str, List[Dict]]], record: bool = True) -> RankingStats:
+    """原地按分数排序各地区的新闻，并只保留前 K 条（K <= 0 表示不截断），返回统计
+
+    record: 是否把统计追加到 RANK_STATS_PATH（分多次排序时可关闭，合并后再记录）
+    """
+    started = time.perf_counter()
+    placements: List[Tuple[str, str]] = []
+    items: List[Dict] = []
+    for category_key, regions in news_data.items():
+        for region_key, region_items in regions.items():
+            for it in region_items:
+                placements.append((category_key, region_key))
+                items.append(it)
+
+    stats = RankingStats(items_in=len(items))
+    if not items:
+        return stats
+
+    scores = score_items(items)
+    for name in (*_COMPONENTS, "score"):
+        stats.means[name] = round(sum(s[name] for s in scores) / len(scores), 4)
+
+    ranked: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+    for idx, placement in enumerate(placements):
+        # 同分时保持原有顺序（源配置顺序）
+        ranked.setdefault(placement, []).append((-scores[idx]["score"], idx))
+
+    for (category_key, region_key), entries in ranked.items():
+        entries.sort()
+        k = top_k_for(category_key)
+        kept = entries[:k] if k > 0 else entries
+        dropped = entries[len(kept):]
+        news_data[category_key][region_key] = [items[idx] for _s, idx in kept]
+        stats.regions.append(RegionStats(
+            category=category_key,
+            region=region_key,
+            total=len(entries),
+            kept=len(kept),
+            cutoff=round(-kept[-1][0], 4) if kept else None,
+            best_dropped=round(-dropped[0][0], 4) if dropped else None,
+        ))
+        stats.items_out += len(kept)
+
+    stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if record:
+        record_ranking_stats(stats)
+    return stats
+
+
+def merge_ranking_stats(parts: List[RankingStats]) -> RankingStats:
+    """合并分多次（如按分类）排序的统计；均值按条目数加权"""
+    merged = RankingStats()
+    for part in parts:
+        merged.items_in += part.items_in
+        merged.items_out += part.items_out
+        merged.elapsed_ms = round(merged.elapsed_ms + part.elapsed_ms, 1)
+        merged.regions.extend(part.regions)
+        for name, value in part.means.items():
+            merged.means[name] = merged.means.get(name, 0.0) + value * part.items_in
+    if merged.items_in:
+        merged.means = {name: round(total / merged.items_in, 4) for name, total in merged.means.items()}
+    return merged
+
+
+def record_ranking_stats(stats: RankingStats) -> None:
+    path = config.RANK_STATS_PATH
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"time": time.time(), **stats.as_dict()}, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"写入排序统计失败: {e}")
+
+
+def print_ranking_stats(stats: RankingStats) -> None:
+    """打印排序统计"""
+    means = ", ".join(f"{name} {value:.2f}" for name, value in stats.means.items())
+    print(f"   🏅 重要性排序：保留 {stats.items_out}/{stats.items_in} 条，耗时 {stats.elapsed_ms:.0f} ms")
+    if means:
+        print(f"      均值：{means}")
+    for region in stats.regions:
+        if region.best_dropped is None:
+            continue
+        print(
+            f"      {region.category}/{region.region}: 保留 {region.kept}/{region.total}，"
+            f"分数线 {region.cutoff:.2f}，落选最高 {region.best_dropped:.2f}"
+        )
@@ -0,0 +1,168 @@
+"""
+新闻源健康度 - 持久化每个 RSS URL 的延迟与失败记录，用于熔断与自适应超时
+
+- 最近若干次成功下载完整内容的耗时（计算 p50 / p95；304 响应很快，不计入，以免压低自适应超时）
+- 连续失败次数、最近成功/失败时间、最近错误
+- 熔断：连续失败达到阈值后跳过该源；冷却期（随失败次数指数增长）过后放行一次探测请求
+  （不重试、使用最短超时），成功即恢复
+- 自适应超时：样本足够时取 p95 × 系数，限制在 [RSS_TIMEOUT_MIN, RSS_TIMEOUT] 之间
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import config
+
+# 保留的延迟样本数
+_MAX_SAMPLES = 20
+# 样本少于此数时不做自适应，直接使用 RSS_TIMEOUT
+_MIN_SAMPLES = 5
+
+
+@dataclass(frozen=True)
+class FetchPlan:
+    skip: bool
+    probe: bool
+    timeout: float
+    max_retries: int
+    failure_streak: int = 0
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _default_plan() -> FetchPlan:
+    return FetchPlan(skip=False, probe=False, timeout=config.RSS_TIMEOUT, max_retries=config.RSS_MAX_RETRIES)
+
+
+class SourceHealth:
+    """线程安全的健康度记录（单个 JSON 文件，写入时原子替换）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"读取新闻源健康记录失败，将重新建立: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_locked(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._records, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"写入新闻源健康记录失败: {e}")
+
+    def _record(self, url: str) -> Dict:
+        return self._records.setdefault(url, {
+            "latencies": [],
+            "failure_streak": 0,
+            "last_success": 0.0,
+            "last_failure": 0.0,
+            "last_error": "",
+        })
+
+    def cooldown(self, failure_streak: int) -> float:
+        """熔断冷却时间：达到阈值后每多失败一次翻倍，上限 CIRCUIT_MAX_COOLDOWN"""
+        excess = max(0, failure_streak - config.CIRCUIT_FAILURE_THRESHOLD)
+        return min(config.CIRCUIT_COOLDOWN_SECONDS * (2 ** excess), config.CIRCUIT_MAX_COOLDOWN_SECONDS)
+
+    def timeout_for(self, url: str) -> float:
+        with self._lock:
+            samples = list(self._records.get(url, {}).get("latencies", []))
+        if len(samples) < _MIN_SAMPLES:
+            return float(config.RSS_TIMEOUT)
+        adaptive = _percentile(samples, 95) * config.RSS_TIMEOUT_FACTOR
+        return max(config.RSS_TIMEOUT_MIN, min(float(config.RSS_TIMEOUT), adaptive))
+
+    def plan(self, url: str) -> FetchPlan:
+        timeout = self.timeout_for(url)
+        with self._lock:
+            rec = self._records.get(url)
+            streak = rec["failure_streak"] if rec else 0
+            last_failure = rec["last_failure"] if rec else 0.0
+
+        if streak < config.CIRCUIT_FAILURE_THRESHOLD:
+            return FetchPlan(skip=False, probe=False, timeout=timeout, max_retries=config.RSS_MAX_RETRIES, failure_streak=streak)
+        if time.time() - last_failure < self.cooldown(streak):
+            return FetchPlan(skip=True, probe=False, timeout=timeout, max_retries=0, failure_streak=streak)
+        # 半开：冷却结束，放行一次快速探测
+        return FetchPlan(skip=False, probe=True, timeout=min(timeout, config.RSS_TIMEOUT_MIN * 2), max_retries=0, failure_streak=streak)
+
+    def record_success(self, url: str, latency: float | None) -> None:
+        """latency 为 None 时（如 304 未修改，没有下载正文）只记录成功，不计入延迟样本"""
+        with self._lock:
+            rec = self._record(url)
+            if latency is not None:
+                rec["latencies"] = (rec["latencies"] + [round(latency, 3)])[-_MAX_SAMPLES:]
+                rec["p50"] = round(_percentile(rec["latencies"], 50), 3)
+                rec["p95"] = round(_percentile(rec["latencies"], 95), 3)
+            rec["failure_streak"] = 0
+            rec["last_success"] = time.time()
+            self._save_locked()
+
+    def record_failure(self, url: str, error: Exception | str) -> None:
+        with self._lock:
+            rec = self._record(url)
+            rec["failure_streak"] += 1
+            rec["last_failure"] = time.time()
+            rec["last_error"] = str(error)[:300]
+            self._save_locked()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return json.loads(json.dumps(self._records))
+
+
+_health: SourceHealth | None = None
+_health_lock = threading.Lock()
+
+
+def get_source_health() -> SourceHealth | None:
+    """返回进程内共享的健康度实例；未启用时返回 None"""
+    global _health
+    if not config.SOURCE_HEALTH_ENABLED:
+        return None
+    with _health_lock:
+        if _health is None or _health.path != config.SOURCE_HEALTH_PATH:
+            _health = SourceHealth(config.SOURCE_HEALTH_PATH)
+        return _health
+
+
+def plan_fetch(url: str) -> FetchPlan:
+    health = get_source_health()
+    return health.plan(url) if health is not None else _default_plan()
+
+
+def record_success(url: str, latency: float | None) -> None:
+    health = get_source_health()
+    if health is not None:
+        health.record_success(url, latency)
+
+
+def record_failure(url: str, error: Exception | str) -> None:
+    health = get_source_health()
+    if health is not None:
+        health.record_failure(url, error)
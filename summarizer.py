@@ -4,11 +4,27 @@ AI 摘要模块 - 使用 DeepSeek API 生成中文新闻摘要
 
 from __future__ import annotations
 
+from typing import Any, Callable, Dict, List, Tuple
+
 from openai import OpenAI
 import config
+import key_points
+import llm_cache
+import llm_metrics
+import llm_scheduler
+import summary_schema
+import token_budget
+import translation_memory
+from llm_client import get_client
+from llm_scheduler import LLMResult
+from token_budget import BudgetPlan, CallBudget
+from translation_memory import Translation
+import threading
 import time
 import re
 
+SYSTEM_PROMPT = "你是一位专业的双语新闻编辑，擅长将英文新闻翻译总结成简洁的中文。对金融市场、国际政治、科技发展和加密货币领域都有深入了解。"
+
 CATEGORY_TITLES = {
     "finance": "金融财经",
     "politics": "国际政治",
@@ -25,37 +41,233 @@ CATEGORY_HEADERS = {
     "other": "## 📰 其他要闻",
 }
 
+CATEGORY_KEYS = ["finance", "politics", "tech", "crypto", "other"]
 
-def create_client():
-    """创建 DeepSeek API 客户端"""
-    return OpenAI(
-        api_key=config.DEEPSEEK_API_KEY,
-        base_url=config.DEEPSEEK_BASE_URL,
-        timeout=config.SUMMARY_TIMEOUT
-    )
+# 各分类下按顺序输出的地区（币圈不分地区，对应抓取结果中的 "global"）
+REGION_HEADERS = {
+    "usa": "### 🇺🇸 美国",
+    "europe": "### 🇪🇺 欧洲",
+    "japan_korea": "### 🇯🇵🇰🇷 日韩",
+    "aunz": "### 🇦🇺🇳🇿 澳新",
+}
 
+EMPTY_TEXT = "暂无重要新闻。"
 
-def _call_llm(client: OpenAI, prompt: str) -> str:
-    max_retries = config.SUMMARY_MAX_RETRIES
-    for attempt in range(max_retries):
-        try:
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": "你是一位专业的双语新闻编辑，擅长将英文新闻翻译总结成简洁的中文。对金融市场、国际政治、科技发展和加密货币领域都有深入了解。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=config.SUMMARY_TEMPERATURE,
-                max_tokens=config.SUMMARY_MAX_TOKENS
-            )
-            content = response.choices[0].message.content or ""
-            return content.strip()
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"API 调用失败，{5 * (attempt + 1)} 秒后重试... ({attempt + 1}/{max_retries})")
-                time.sleep(5 * (attempt + 1))
-            else:
-                return f"生成摘要失败: {e}"
+# 分类摘要失败、改用本地抽取的重要标题时放在段落开头的说明
+FALLBACK_NOTE = "⚠️ 本分类摘要生成失败，以下为排名靠前的新闻原文。"
+# 分类摘要中个别没有译文的条目（模型漏掉）在摘要前加的标记
+UNTRANSLATED_MARK = "（未翻译）"
+
+KEY_POINTS_HEADER = "## 📌 今日要点"
+
+# 提示词一律按“固定说明与输出格式在前、新闻内容在后”排列：前缀逐字节不变，
+# 可命中 DeepSeek 的上下文缓存（按前缀匹配，命中部分计费更低、预填充更快），实际命中数见预算报告
+
+# JSON 模式下提示词中给出的输出结构
+_ITEM_SHAPE = '{"title": "中文标题", "summary": "中文摘要"}'
+_REGIONS_SHAPE = f'{{"usa": [{_ITEM_SHAPE}], "europe": [], "japan_korea": [], "aunz": []}}'
+_KEY_POINTS_SHAPE = "{" + ", ".join(f'"{name}": "一句话总结"' for name in summary_schema.KEY_POINT_FIELDS) + "}"
+
+
+def create_client():
+    """获取 DeepSeek API 客户端（共享连接池，使用摘要的超时设置；重试由 llm_scheduler 负责）"""
+    return get_client(timeout=config.SUMMARY_TIMEOUT, max_retries=0)
+
+
+# 流式输出时每完成一个 "## " 段落就回调一次（分块总结时可能在多个线程中并发调用）
+SectionCallback = Callable[[str], None]
+
+
+class _SectionGate:
+    """某分类的段落回调：该分类交付（含超时后的本地兜底）后 close()，之后仍在后台完成的请求不会再交付一次"""
+
+    def __init__(self, on_section: SectionCallback | None):
+        self._on_section = on_section
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __call__(self, section: str) -> None:
+        with self._lock:
+            if not self._closed and self._on_section is not None:
+                self._on_section(section)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+
+
+class _SectionSplitter:
+    """把流式输出按行首 "## " 标题切分，某段的下一个标题到达时该段即完整"""
+
+    def __init__(self, on_section: SectionCallback | None = None):
+        self.on_section = on_section
+        self.completed: List[str] = []
+        self._buf = ""
+
+    def feed(self, delta: str) -> None:
+        self._buf += delta
+        while True:
+            idx = self._buf.find("\n## ", 1)
+            if idx == -1:
+                return
+            self._emit(self._buf[:idx])
+            self._buf = self._buf[idx + 1 :]
+
+    def close(self) -> None:
+        self._emit(self._buf)
+        self._buf = ""
+
+    def _emit(self, text: str) -> None:
+        section = text.strip()
+        if not section:
+            return
+        self.completed.append(section)
+        if self.on_section is not None:
+            self.on_section(section)
+
+
+def _response_format(json_mode: bool) -> dict:
+    """JSON 模式下要求模型只输出一个 JSON 对象"""
+    return {"response_format": {"type": "json_object"}} if json_mode else {}
+
+
+def _stream_completion(
+    client: OpenAI,
+    messages: list,
+    splitter: _SectionSplitter,
+    max_tokens: int,
+    json_mode: bool = False,
+    timeout: float | None = None,
+) -> LLMResult:
+    """流式请求；总耗时超过 timeout（缺省 SUMMARY_TIMEOUT）时抛出 TimeoutError（已完成的段落保留在 splitter 中）"""
+    limit = timeout if timeout is not None else config.SUMMARY_TIMEOUT
+    deadline = time.monotonic() + limit
+    stream = client.chat.completions.create(
+        model="deepseek-chat",
+        messages=messages,
+        temperature=config.SUMMARY_TEMPERATURE,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+        **_response_format(json_mode),
+        **_timeout_option(timeout),
+    )
+    parts: List[str] = []
+    usage = None
+    first_token_at = None
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(chunk.choices[0].delta.content)
+                splitter.feed(chunk.choices[0].delta.content)
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"流式输出超过 {limit:g} 秒")
+    finally:
+        stream.close()
+    splitter.close()
+    return LLMResult("".join(parts).strip(), usage, first_token_at=first_token_at)
+
+
+def _timeout_option(timeout: float | None) -> dict:
+    """单次请求的超时（覆盖客户端的 SUMMARY_TIMEOUT）"""
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+def _request_once(
+    client: OpenAI,
+    messages: list,
+    on_section: SectionCallback | None,
+    max_tokens: int,
+    json_mode: bool = False,
+    timeout: float | None = None,
+) -> LLMResult:
+    """一次请求尝试（由 llm_scheduler 调度与重试）"""
+    splitter = _SectionSplitter(on_section)
+    try:
+        if config.SUMMARY_STREAM:
+            return _stream_completion(client, messages, splitter, max_tokens, json_mode, timeout)
+        response = client.chat.completions.create(
+            model="deepseek-chat",
+            messages=messages,
+            temperature=config.SUMMARY_TEMPERATURE,
+            max_tokens=max_tokens,
+            **_response_format(json_mode),
+            **_timeout_option(timeout),
+        )
+        content = (response.choices[0].message.content or "").strip()
+        splitter.feed(content)
+        splitter.close()
+        return LLMResult(content, response.usage)
+    except Exception as e:
+        if not splitter.completed:
+            raise
+        # 流式输出中途失败：保留已完整输出的段落，不再重试（重试会重复回调已交付的段落）
+        print(f"API 输出中断（{e}），保留已完成的 {len(splitter.completed)} 个段落")
+        return LLMResult("\n\n".join(splitter.completed), complete=False)
+
+
+def _call_llm(
+    client: OpenAI,
+    prompt: str,
+    on_section: SectionCallback | None = None,
+    label: str = "摘要",
+    budget: CallBudget | None = None,
+    json_mode: bool = False,
+    name: str = "",
+    deadline: float | None = None,
+) -> str:
+    """budget: 该请求在预算计划中的条目，决定 max_tokens 并记录实际用量
+    json_mode: 要求模型输出 JSON（此时 on_section 应为 None，段落由调用方渲染后交付）
+    name: 调用记录中的提示词名称，缺省时取 budget 的名称
+    deadline: 时限（time.monotonic() 时刻）；给出时只尝试一次，排队加请求不超过剩余时间，到时返回失败说明"""
+    max_tokens = budget.max_tokens if budget is not None else config.SUMMARY_MAX_TOKENS
+    name = name or (budget.name if budget is not None else label)
+    key = llm_cache.cache_key("deepseek-chat", SYSTEM_PROMPT, prompt, config.SUMMARY_TEMPERATURE, max_tokens)
+    cached = llm_cache.lookup(key)
+    if cached is not None:
+        llm_metrics.record_cache_hit(name, label)
+        if budget is not None:
+            budget.cached = True
+        splitter = _SectionSplitter(on_section)
+        splitter.feed(cached)
+        splitter.close()
+        return cached
+
+    attempts, timeout = config.SUMMARY_MAX_RETRIES, None
+    if deadline is not None:
+        attempts, timeout = 1, min(config.SUMMARY_TIMEOUT, deadline - time.monotonic())
+        if timeout <= 0:
+            return "生成摘要失败: 超过时限"
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    try:
+        result = llm_scheduler.call(
+            lambda: _request_once(client, messages, on_section, max_tokens, json_mode, timeout),
+            priority=llm_scheduler.PRIORITY_DIGEST,
+            tokens=token_budget.estimate_tokens(SYSTEM_PROMPT + prompt) + max_tokens,
+            attempts=attempts,
+            label=label,
+            name=name,
+            timeout=timeout,
+        )
+    except TimeoutError as e:
+        # 排队加请求超过剩余时间（请求本身仍在后台完成，结果不再使用）
+        return f"生成摘要失败: {str(e) or f'超过时限（{timeout:.0f}s）'}"
+    except Exception as e:
+        return f"生成摘要失败: {e}"
+    if budget is not None:
+        budget.record(result.usage, token_budget.raw_estimate(SYSTEM_PROMPT + prompt))
+    # 只缓存完整的输出；JSON 模式下无法解析的输出不缓存，以免重跑时重放同一个坏结果
+    if result.complete and (not json_mode or summary_schema.parse_json(result.content)[0] is not None):
+        llm_cache.store(key, result.content, "deepseek-chat")
+    return result.content
 
 
 def _split_news_by_category(news_text: str) -> dict:
@@ -69,8 +281,8 @@ def _split_news_by_category(news_text: str) -> dict:
     return sections
 
 
-def _summarize_full(client: OpenAI, news_text: str) -> str:
-    prompt = f"""你是一位专业的新闻编辑。请将以下分类新闻翻译并总结成中文。
+def _full_prompt(news_text: str) -> str:
+    return f"""你是一位专业的新闻编辑。请将文末的分类新闻翻译并总结成中文。
 
 要求：
 1. 按照金融、政治、科技、币圈、其他五个主题分类
@@ -82,9 +294,6 @@ def _summarize_full(client: OpenAI, news_text: str) -> str:
 7. 币圈新闻要特别关注价格变动、监管政策、重大项目进展
 8. 在最后添加"今日要点"，总结各领域最值得关注的事件
 
-新闻内容：
-{news_text}
-
 请严格按以下格式输出：
 
 ## 💰 金融财经
@@ -153,35 +362,118 @@ def _summarize_full(client: OpenAI, news_text: str) -> str:
 - **政治**：一句话总结
 - **科技**：一句话总结
 - **币圈**：一句话总结
+
+新闻内容：
+{news_text}
 """
-    return _call_llm(client, prompt)
 
 
-def _summarize_category(client: OpenAI, category_key: str, category_text: str) -> str:
-    category_title = CATEGORY_TITLES[category_key]
-    header = CATEGORY_HEADERS[category_key]
+def _full_json_prompt(news_text: str) -> str:
+    return f"""你是一位专业的新闻编辑。请将文末的分类新闻翻译并总结成中文，以 JSON 输出。
 
-    if not (category_text or "").strip():
-        # 尽量保持格式稳定，避免 LLM 对空输入产生“幻觉”内容
-        if category_key == "crypto":
-            return f"""{header}
+要求：
+1. 金融、政治、科技、其他四个分类按地区（usa 美国、europe 欧洲、japan_korea 日韩、aunz 澳新）分别总结
+2. 币圈新闻不分地区，直接总结
+3. 每个地区选出 2-4 条最重要的新闻，币圈选出 3-5 条；某地区没有新闻时给空数组
+4. 每条新闻用 1-2 句话概括要点，突出关键数据和影响
+5. 使用简洁专业的中文表达
+6. 币圈新闻要特别关注价格变动、监管政策、重大项目进展
+7. key_points 为“今日要点”，每个领域用一句话总结最值得关注的事件
 
-暂无重要新闻。
-""".strip()
-        return f"""{header}
+只输出一个 JSON 对象，结构如下（finance、politics、tech、other 的结构相同）：
+{{"finance": {_REGIONS_SHAPE}, "politics": {{...}}, "tech": {{...}}, "crypto": [{_ITEM_SHAPE}], "other": {{...}}, "key_points": {_KEY_POINTS_SHAPE}}}
 
-### 🇺🇸 美国
-暂无重要新闻。
+新闻内容：
+{news_text}
+"""
 
-### 🇪🇺 欧洲
-暂无重要新闻。
 
-### 🇯🇵🇰🇷 日韩
-暂无重要新闻。
+def _summarize_full(
+    client: OpenAI,
+    news_text: str,
+    on_section: SectionCallback | None = None,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> str:
+    """整篇一次请求；请求失败时返回错误说明（由调用方改为按分类生成），
+    部分分类缺失或不合格时只单独补齐这些分类"""
+    sections = _split_news_by_category(news_text)
+    texts = {key: sections.get(CATEGORY_TITLES[key], "") for key in CATEGORY_KEYS}
+    # 整篇请求最多用掉一半时间，失败后按分类生成时仍有时间
+    full_deadline = _partial_deadline(deadline, 0.5)
+    if config.SUMMARY_FORMAT != "json":
+        gate = _SectionGate(on_section)
+        content = _call_llm(
+            client, _full_prompt(news_text), gate, label="摘要", budget=budget, deadline=full_deadline
+        )
+        if content.startswith("生成摘要失败"):
+            # 超时的请求仍在后台流式输出，不再交付它的段落
+            gate.close()
+            return content
+        return _fill_missing_sections(client, content, texts, on_section, deadline)
+
+    content = _call_llm(
+        client, _full_json_prompt(news_text), label="摘要", budget=budget, json_mode=True, deadline=full_deadline
+    )
+    if content.startswith("生成摘要失败"):
+        return content
+    data, error = summary_schema.parse_json(content)
+    if not isinstance(data, dict):
+        data = {}
+        print(f"摘要输出不是合格的 JSON（{error or '不是对象'}），逐个分类重问")
+
+    # 合格的分类直接在本地渲染，不合格的分类单独重问
+    outputs: Dict[str, str] = {}
+    retry: List[str] = []
+    for key in CATEGORY_KEYS:
+        regions: Dict[str, List[Translation]] = {}
+        if texts[key].strip():
+            regions, error = summary_schema.validate_category(key, data.get(key))
+            if regions is None:
+                print(f"{CATEGORY_TITLES[key]} 不合格（{error}），单独重问")
+                retry.append(key)
+                continue
+        outputs[key] = _render_category(key, regions)
+        if on_section is not None:
+            on_section(outputs[key])
+    outputs.update(_summarize_categories(client, texts, retry, on_section, deadline))
+
+    points, error = summary_schema.validate_key_points(data.get("key_points"))
+    if points is not None:
+        key_points = _render_key_points(points)
+        if on_section is not None:
+            on_section(key_points)
+    else:
+        print(f"今日要点不合格（{error}），单独重问")
+        key_points = _finish_key_points(client, None, outputs, on_section, deadline=deadline)
+    return "\n\n".join([outputs[k] for k in CATEGORY_KEYS] + [key_points])
+
+
+def _fill_missing_sections(
+    client: OpenAI,
+    content: str,
+    texts: Dict[str, str],
+    on_section: SectionCallback | None,
+    deadline: float | None,
+) -> str:
+    """整篇 Markdown 输出中途中断时保留已完成的段落，只单独生成缺失的分类与今日要点"""
+    sections = {part.splitlines()[0].strip(): part for part in re.split(r"\n(?=## )", content) if part.strip()}
+    missing = [key for key in CATEGORY_KEYS if CATEGORY_HEADERS[key] not in sections]
+    if not missing and KEY_POINTS_HEADER in sections:
+        return content
+    if missing:
+        print(f"整篇输出缺少 {'、'.join(CATEGORY_TITLES[k] for k in missing)}，单独生成")
+    outputs = {key: sections[CATEGORY_HEADERS[key]].strip() for key in CATEGORY_KEYS if key not in missing}
+    outputs.update(_summarize_categories(client, texts, missing, on_section, deadline))
+    key_points = sections.get(KEY_POINTS_HEADER, "").strip() or _finish_key_points(
+        client, None, outputs, on_section, deadline=deadline
+    )
+    return "\n\n".join([outputs[k] for k in CATEGORY_KEYS] + [key_points])
 
-### 🇦🇺🇳🇿 澳新
-暂无重要新闻。
-""".strip()
+
+def _category_prompt(category_key: str, category_text: str) -> str:
+    category_title = CATEGORY_TITLES[category_key]
+    header = CATEGORY_HEADERS[category_key]
 
     if category_key == "crypto":
         format_block = f"""{header}
@@ -206,32 +498,294 @@ def _summarize_category(client: OpenAI, category_key: str, category_text: str) -
 """
         rules = "每个地区选出 2-4 条最重要的新闻。若某地区无内容请写“暂无重要新闻”。"
 
-    prompt = f"""你是一位专业的新闻编辑。请将以下“{category_title}”分类新闻翻译并总结成中文。
+    return f"""你是一位专业的新闻编辑。请将文末的新闻翻译并总结成中文。
 
 要求：
 1. 使用简洁专业的中文表达
 2. 每条新闻用 1-2 句话概括要点，突出关键数据和影响
 3. {rules}
 
-新闻内容：
-{category_text}
-
 请严格按以下格式输出：
 
 {format_block}
+以下是“{category_title}”分类的新闻：
+{category_text}
 """
-    return _call_llm(client, prompt)
 
 
-def _summarize_key_points(client: OpenAI, category_sections: dict) -> str:
+def _summarize_category(
+    client: OpenAI,
+    category_key: str,
+    category_text: str,
+    on_section: SectionCallback | None = None,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> str:
+    """deadline: 见 _call_llm"""
+    if not (category_text or "").strip():
+        # 尽量保持格式稳定，避免 LLM 对空输入产生“幻觉”内容
+        return _render_category(category_key, {})
+    label = CATEGORY_TITLES[category_key]
+    if config.SUMMARY_FORMAT == "json":
+        regions, error = _ask_json(
+            client,
+            _category_json_prompt(category_key, category_text),
+            lambda data: summary_schema.validate_category(category_key, data),
+            label,
+            budget,
+            deadline=deadline,
+        )
+        if regions is not None:
+            section = _render_category(category_key, regions)
+            if on_section is not None:
+                on_section(section)
+            return section
+        if error.startswith("生成摘要失败"):
+            return error
+        print(f"{label} 多次输出不合格的 JSON，改用 Markdown 格式")
+    prompt = _category_prompt(category_key, category_text)
+    return _call_llm(client, prompt, on_section, label=label, budget=budget, deadline=deadline)
+
+
+def _retry_deadline() -> float:
+    return time.monotonic() + config.SUMMARY_RETRY_BUDGET
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """距时限的秒数（不小于 0）；没有时限时为 None"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _partial_deadline(deadline: float | None, share: float) -> float | None:
+    """到时限剩余时间的前 share 部分的截止时刻"""
+    return None if deadline is None else time.monotonic() + _remaining(deadline) * share
+
+
+def _retry_failed(label: str, result: str, attempt: Callable[[], str], deadline: float | None) -> str:
+    """result 为失败说明时在时限内单独重试（最多 SUMMARY_SECTION_RETRIES 次），返回最后一次的结果；
+    attempt 应以 deadline 为时限，重试不会超出时限"""
+    for n in range(config.SUMMARY_SECTION_RETRIES):
+        if not result.startswith("生成摘要失败") or _remaining(deadline) == 0:
+            break
+        print(f"{label} {result}，单独重试 ({n + 1}/{config.SUMMARY_SECTION_RETRIES})")
+        result = attempt()
+    return result
+
+
+def _summarize_section(
+    client: OpenAI,
+    category_key: str,
+    category_text: str,
+    on_section: SectionCallback | None = None,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> str:
+    """生成一个分类的摘要：失败时在时限内单独重试，仍失败时改用本地抽取的重要标题（总是返回段落）"""
+    section = _summarize_category(client, category_key, category_text, on_section, budget, deadline)
+    section = _retry_failed(
+        CATEGORY_TITLES[category_key],
+        section,
+        lambda: _summarize_category(client, category_key, category_text, on_section, deadline=deadline),
+        deadline,
+    )
+    return _settle_section(category_key, section, _text_entries(category_key, category_text), on_section)
+
+
+def _summarize_categories(
+    client: OpenAI,
+    texts: Dict[str, str],
+    keys: List[str],
+    on_section: SectionCallback | None,
+    deadline: float | None,
+    plan: BudgetPlan | None = None,
+) -> Dict[str, str]:
+    """并发生成若干分类的摘要（实际并发与限流由 llm_scheduler 统一控制），各分类的失败互不影响"""
+    if not keys:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor
+
+    ex = ThreadPoolExecutor(max_workers=len(keys))
+    gates = {key: _SectionGate(on_section) for key in keys}
+    futures = {
+        key: ex.submit(
+            _summarize_section,
+            client,
+            key,
+            texts.get(key, ""),
+            gates[key],
+            plan.call(f"category:{key}") if plan is not None else None,
+            deadline,
+        )
+        for key in keys
+    }
+    entries = {key: _text_entries(key, texts.get(key, "")) for key in keys}
+    return _collect_sections(ex, futures, entries, on_section, deadline, gates)
+
+
+def _collect_sections(
+    executor,
+    futures: Dict[str, Any],
+    entries: Dict[str, List[Tuple[str, Dict]]],
+    on_section: SectionCallback | None,
+    deadline: float | None,
+    gates: Dict[str, _SectionGate],
+) -> Dict[str, str]:
+    """按分类等待各 Future；失败或到时限仍未完成的分类改用本地抽取的重要标题
+    （未完成的请求留在后台，结果不再使用；gates 为各分类提交时使用的回调，兜底交付前关闭）"""
+    outputs: Dict[str, str] = {}
+    timed_out = False
+    try:
+        for key, future in futures.items():
+            try:
+                outputs[key] = future.result(timeout=_remaining(deadline))
+                continue
+            except TimeoutError:
+                timed_out = True
+                error = "生成摘要失败: 超过时限"
+            except Exception as e:
+                error = f"生成摘要失败: {e}"
+            gates[key].close()
+            outputs[key] = _settle_section(key, error, entries[key], on_section)
+    finally:
+        executor.shutdown(wait=not timed_out, cancel_futures=timed_out)
+    return outputs
+
+
+def _settle_section(
+    category_key: str,
+    section: str,
+    entries: List[Tuple[str, Dict]],
+    on_section: SectionCallback | None = None,
+    translations: Dict[int, Translation] | None = None,
+) -> str:
+    """section 为失败说明时改用本地抽取的重要标题并交付，否则原样返回"""
+    if not section.startswith("生成摘要失败"):
+        return section
+    print(f"⚠️ {CATEGORY_TITLES[category_key]} {section}，改用本地抽取的重要标题")
+    fallback = _fallback_category(category_key, entries, translations)
+    if on_section is not None:
+        on_section(fallback)
+    return fallback
+
+
+def _fallback_category(
+    category_key: str,
+    entries: List[Tuple[str, Dict]],
+    translations: Dict[int, Translation] | None = None,
+) -> str:
+    """本地抽取（不请求 LLM）：各地区排在最前的 SUMMARY_FALLBACK_ITEMS 条，已有译文的用译文，
+    其余保留原文标题与摘要首句"""
+    translations = translations or {}
+    regions: Dict[str, List[Translation]] = {}
+    for region_key, item in entries:
+        rows = regions.setdefault(region_key, [])
+        if len(rows) >= config.SUMMARY_FALLBACK_ITEMS:
+            continue
+        rows.append(translations.get(id(item)) or _original_entry(item))
+    header, _sep, body = _render_category(category_key, regions).partition("\n\n")
+    return f"{header}\n\n{FALLBACK_NOTE}\n\n{body}"
+
+
+def _original_entry(item: Dict) -> Translation:
+    """没有译文的条目：原文标题与摘要首句"""
+    return item.get("title", ""), _first_sentence(item.get("summary", "")) or item.get("source", "") or "原文"
+
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def _first_sentence(text: str, limit: int = 200) -> str:
+    text = " ".join((text or "").split())
+    return _SENTENCE_BREAK.split(text, 1)[0][:limit]
+
+
+# 新闻文本中的一条的首行：N. [来源] 标题
+_SOURCE_TITLE = re.compile(r"^\s*\d+\.\s*\[(.*?)\]\s*(.*)$")
+
+
+def _text_entries(category_key: str, category_text: str) -> List[Tuple[str, Dict]]:
+    """把分类新闻文本解析回 (region_key, {source, title, summary})，供本地兜底使用"""
+    regions = {f"--- {header[4:]} ---": region_key for region_key, header in REGION_HEADERS.items()}
+    entries: List[Tuple[str, Dict]] = []
+    for header, items in _category_blocks(category_text):
+        region_key = "global" if category_key == "crypto" else regions.get(header)
+        if region_key is None:
+            continue
+        for text in items:
+            first, _sep, rest = text.partition("\n")
+            match = _SOURCE_TITLE.match(first)
+            source, title = (match.group(1), match.group(2)) if match else ("", first)
+            entries.append((region_key, {"source": source, "title": title.strip(), "summary": " ".join(rest.split())}))
+    return entries
+
+
+def _category_json_prompt(category_key: str, category_text: str) -> str:
+    category_title = CATEGORY_TITLES[category_key]
+    if category_key == "crypto":
+        rules = "币圈新闻不分地区，选出 3-5 条最重要的新闻，特别关注价格变动、监管政策、重大项目进展。"
+        shape = f'{{"items": [{_ITEM_SHAPE}]}}'
+    else:
+        rules = "按地区（usa 美国、europe 欧洲、japan_korea 日韩、aunz 澳新）分别选出 2-4 条最重要的新闻，某地区没有新闻时给空数组。"
+        shape = _REGIONS_SHAPE
+    return f"""你是一位专业的新闻编辑。请将文末的新闻翻译并总结成中文，以 JSON 输出。
+
+要求：
+1. 使用简洁专业的中文表达
+2. 每条新闻用 1-2 句话概括要点，突出关键数据和影响
+3. {rules}
+
+只输出一个 JSON 对象，结构如下：
+{shape}
+
+以下是“{category_title}”分类的新闻：
+{category_text}
+"""
+
+
+def _with_correction(prompt: str, error: str) -> str:
+    """重问时附上上次输出的问题（提示词随之改变，也不会命中上次结果的缓存）"""
+    return f"{prompt}\n上一次的输出不符合要求（{error}），请只输出符合上述结构的 JSON 对象。\n"
+
+
+def _ask_json(
+    client: OpenAI,
+    prompt: str,
+    validate: Callable[[Any], Tuple[Any, str]],
+    label: str,
+    budget: CallBudget | None = None,
+    name: str = "",
+    deadline: float | None = None,
+) -> Tuple[Any, str]:
+    """JSON 模式请求并校验，不合格时附上错误说明重问（最多 SUMMARY_JSON_REASKS 次）
+
+    返回 (校验后的值, 错误说明)；请求本身失败时错误说明以“生成摘要失败”开头。
+    """
+    name = name or (budget.name if budget is not None else label)
+    content = _call_llm(client, prompt, label=label, budget=budget, json_mode=True, name=name, deadline=deadline)
+    error = ""
+    for attempt in range(config.SUMMARY_JSON_REASKS + 1):
+        if content.startswith("生成摘要失败"):
+            return None, content
+        data, error = summary_schema.parse_json(content)
+        if data is not None:
+            value, error = validate(data)
+            if value is not None:
+                return value, ""
+        if attempt == config.SUMMARY_JSON_REASKS:
+            break
+        print(f"{label} 输出不合格（{error}），重问 ({attempt + 1}/{config.SUMMARY_JSON_REASKS})")
+        content = _call_llm(
+            client, _with_correction(prompt, error), label=label, json_mode=True, name=f"{name}:reask", deadline=deadline
+        )
+    return None, error
+
+
+def _key_points_prompt(category_sections: dict) -> str:
     digest = "\n\n".join(
-        category_sections.get(k, "") for k in ["finance", "politics", "tech", "crypto", "other"]
+        category_sections.get(k, "") for k in CATEGORY_KEYS
     ).strip()
 
-    prompt = f"""请根据以下新闻摘要，生成“今日要点”部分（只输出今日要点，不要重复其他内容）。
-
-摘要内容：
-{digest}
+    return f"""请根据文末的新闻摘要，生成“今日要点”部分（只输出今日要点，不要重复其他内容）。
 
 请严格按以下格式输出：
 
@@ -241,43 +795,701 @@ def _summarize_key_points(client: OpenAI, category_sections: dict) -> str:
 - **政治**：一句话总结
 - **科技**：一句话总结
 - **币圈**：一句话总结
+
+摘要内容：
+{digest}
 """
-    return _call_llm(client, prompt)
 
 
-def generate_summary(news_text: str) -> str:
-    """使用 DeepSeek 生成中文新闻摘要"""
-    client = create_client()
+def _summarize_key_points(
+    client: OpenAI,
+    category_sections: dict,
+    on_section: SectionCallback | None = None,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> str:
+    if config.SUMMARY_FORMAT == "json":
+        points, error = _ask_json(
+            client,
+            _key_points_json_prompt(category_sections),
+            summary_schema.validate_key_points,
+            "今日要点",
+            budget,
+            deadline=deadline,
+        )
+        if points is not None:
+            section = _render_key_points(points)
+            if on_section is not None:
+                on_section(section)
+            return section
+        if error.startswith("生成摘要失败"):
+            return error
+        print("今日要点多次输出不合格的 JSON，改用 Markdown 格式")
+    return _call_llm(
+        client, _key_points_prompt(category_sections), on_section, label="今日要点", budget=budget, deadline=deadline
+    )
 
-    if len(news_text) <= config.SUMMARY_MAX_INPUT_CHARS:
-        return _summarize_full(client, news_text)
 
-    print("新闻内容较长，启用分块总结...")
-    sections = _split_news_by_category(news_text)
-    category_keys = ["finance", "politics", "tech", "crypto", "other"]
-    category_outputs = {}
+def _key_points_json_prompt(category_sections: dict) -> str:
+    digest = "\n\n".join(
+        category_sections.get(k, "") for k in CATEGORY_KEYS
+    ).strip()
 
-    # 并发总结各分类，减少等待时间
+    return f"""请根据文末的新闻摘要，生成“今日要点”：每个领域用一句话总结最值得关注的事件，以 JSON 输出。
+
+只输出一个 JSON 对象，结构如下：
+{_KEY_POINTS_SHAPE}
+
+摘要内容：
+{digest}
+"""
+
+
+def _render_key_points(points: List[Tuple[str, str]]) -> str:
+    lines = "\n".join(f"- **{name}**：{text}" for name, text in points)
+    return f"{KEY_POINTS_HEADER}\n\n{lines}"
+
+
+def _headline_key_points_prompt(headlines: Dict[str, List[str]]) -> str:
+    blocks = "\n\n".join(
+        f"【{name}】\n" + ("\n".join(headlines.get(key) or []) or "（暂无新闻）")
+        for name, key in key_points.POINT_CATEGORIES.items()
+    )
+    if config.SUMMARY_FORMAT == "json":
+        task = "每个领域用一句话中文总结最值得关注的事件，以 JSON 输出"
+        output = f"只输出一个 JSON 对象，结构如下：\n{_KEY_POINTS_SHAPE}"
+    else:
+        task = "每个领域用一句话中文总结最值得关注的事件"
+        output = f"""请严格按以下格式输出（只输出今日要点）：
+
+{KEY_POINTS_HEADER}
+
+""" + "\n".join(f"- **{name}**：一句话总结" for name in key_points.POINT_CATEGORIES)
+    return f"""请根据文末各领域排名靠前的新闻标题（按重要性排序），生成“今日要点”：{task}。优先选择排在前面的新闻，不要编造标题中没有的信息。
+
+{output}
+
+新闻标题：
+{blocks}
+"""
+
+
+def _text_headlines(category_key: str, category_text: str) -> List[str]:
+    """从分类新闻文本中取各地区排在前面的标题行（条数与提示词要求选出的条数一致）"""
+    picks = _PICKS_CRYPTO if category_key == "crypto" else _PICKS_PER_REGION
+    return [
+        item.splitlines()[0].strip()
+        for _header, items in _category_blocks(category_text)
+        for item in items[:picks]
+    ]
+
+
+def _item_headlines(category_key: str, entries: List[Tuple[str, Dict]]) -> List[str]:
+    picks = _PICKS_CRYPTO if category_key == "crypto" else _PICKS_PER_REGION
+    taken: Dict[str, int] = {}
+    lines: List[str] = []
+    for region_key, item in entries:
+        taken[region_key] = taken.get(region_key, 0) + 1
+        if taken[region_key] <= picks:
+            lines.append(f"[{item.get('source', '')}] {item.get('title', '')}")
+    return lines
+
+
+# 调用记录中预生成今日要点的名称（预算计划中与非预生成的今日要点同名）
+_SPECULATIVE_NAME = "key_points:speculative"
+
+
+def _speculative_budget(headlines: Dict[str, List[str]]) -> CallBudget:
+    prompt_tokens = token_budget.estimate_tokens(SYSTEM_PROMPT + _headline_key_points_prompt(headlines))
+    return CallBudget("key_points", prompt_tokens, _KEY_POINTS_TOKENS)
+
+
+def _speculate_key_points(
+    client: OpenAI,
+    headlines: Dict[str, List[str]],
+    budget: CallBudget | None = None,
+) -> List[key_points.Point] | None:
+    """直接根据标题生成今日要点（不等分类摘要）；失败或格式不合格时返回 None"""
+    prompt = _headline_key_points_prompt(headlines)
+    label = "今日要点（预生成）"
+    if config.SUMMARY_FORMAT == "json":
+        points, _error = _ask_json(client, prompt, summary_schema.validate_key_points, label, budget, _SPECULATIVE_NAME)
+        return points
+    content = _call_llm(client, prompt, label=label, budget=budget, name=_SPECULATIVE_NAME)
+    if content.startswith("生成摘要失败"):
+        return None
+    return key_points.parse_points(content)
+
+
+def _start_key_points(client: OpenAI, headlines: Dict[str, List[str]], budget: CallBudget | None):
+    """在后台线程中预生成今日要点，与分类摘要并发，返回 Future"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    ex = ThreadPoolExecutor(max_workers=1, thread_name_prefix="key-points")
+    future = ex.submit(_speculate_key_points, client, headlines, budget)
+    ex.shutdown(wait=False)
+    return future
+
+
+def _finish_key_points(
+    client: OpenAI,
+    speculation,
+    category_sections: dict,
+    on_section: SectionCallback | None = None,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> str:
+    """生成今日要点：有预生成结果时在本地与分类摘要核对，否则（或预生成失败时）根据分类摘要生成；
+    请求失败或超过时限 deadline 时改用各分类的首条新闻"""
+    points = None
+    if speculation is not None:
+        try:
+            points = speculation.result(timeout=_remaining(deadline))
+        except TimeoutError:
+            print("今日要点预生成超过时限")
+    if points is None:
+        if speculation is not None:
+            print("今日要点预生成失败，改为根据分类摘要生成")
+            budget = None
+        section = _summarize_key_points(client, category_sections, on_section, budget, deadline)
+        if not section.startswith("生成摘要失败"):
+            return section
+        print(f"⚠️ 今日要点{section}，改用各分类的首条新闻")
+        points = []
+
+    points, replaced = key_points.reconcile(points, category_sections)
+    if replaced and len(replaced) < len(key_points.POINT_CATEGORIES):
+        print(f"今日要点预生成：{'、'.join(replaced)} 与分类摘要不一致，改用该分类的首条新闻")
+    section = _render_key_points(points)
+    if on_section is not None:
+        on_section(section)
+    return section
+
+
+def _render_items(items: List[Translation]) -> str:
+    if not items:
+        return EMPTY_TEXT
+    return "\n".join(f"{i}. **{title}** - {summary}" for i, (title, summary) in enumerate(items, 1))
+
+
+def _render_category(category_key: str, regions: Dict[str, List[Translation]]) -> str:
+    """按现有 Markdown 版式在本地拼装一个分类段落"""
+    header = CATEGORY_HEADERS[category_key]
+    if category_key == "crypto":
+        return f"{header}\n\n{_render_items(regions.get('global', []))}"
+    blocks = [f"{region_header}\n{_render_items(regions.get(region_key, []))}" for region_key, region_header in REGION_HEADERS.items()]
+    return f"{header}\n\n" + "\n\n".join(blocks)
+
+
+def _category_items(news_data: dict, category_key: str) -> List[Tuple[str, Dict]]:
+    """按输出顺序列出某分类的 (region_key, item)"""
+    regions = news_data.get(category_key, {})
+    region_keys = ["global"] if category_key == "crypto" else list(REGION_HEADERS)
+    return [(region_key, item) for region_key in region_keys for item in regions.get(region_key, [])]
+
+
+# 预计输出：今日要点的 token 数、每个分类/地区标题的 token 数
+_KEY_POINTS_TOKENS = 200
+_HEADER_TOKENS = 15
+# 各地区预计被选出的条数（与提示词中的 2-4 条 / 币圈 3-5 条一致）
+_PICKS_PER_REGION = 4
+_PICKS_CRYPTO = 5
+
+# 新闻文本中的一条：N. [来源] 标题
+_ITEM_LINE = re.compile(r"^\d+\. ")
+
+# 翻译结果的一行：[编号] 中文标题 | 中文摘要
+_TRANSLATION_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.+?)\s*[|｜]\s*(.+?)\s*$", re.MULTILINE)
+
+
+def _translation_line(idx: int, item: Dict) -> str:
+    line = f"[{idx}] [{item.get('source', '')}] {item.get('title', '')}"
+    if item.get("summary"):
+        line += f"\n    {item['summary']}"
+    return line
+
+
+def _translation_prompt(items: List[Dict]) -> str:
+    news = "\n".join(_translation_line(i, item) for i, item in enumerate(items, 1))
+    return f"""请将以下英文新闻逐条翻译并概括成中文。
+
+要求：
+1. 每条输出一行，格式为：[编号] 中文标题 | 中文摘要
+2. 中文摘要用 1-2 句话概括要点，突出关键数据和影响
+3. 使用简洁专业的中文表达
+4. 按编号逐条输出，不要遗漏、合并或增加条目，不要输出其他内容
+
+新闻内容：
+{news}
+"""
+
+
+def _translate_batch(
+    client: OpenAI,
+    items: List[Dict],
+    label: str,
+    budget: CallBudget | None = None,
+    deadline: float | None = None,
+) -> Dict[int, Translation]:
+    """把一批条目逐条翻译成 (中文标题, 中文摘要)，返回 {序号: 译文}；请求失败时抛出 RuntimeError"""
+    content = _call_llm(client, _translation_prompt(items), label=label, budget=budget, deadline=deadline)
+    if content.startswith("生成摘要失败"):
+        raise RuntimeError(content)
+
+    translations: Dict[int, Translation] = {}
+    for match in _TRANSLATION_LINE.finditer(content):
+        idx = int(match.group(1))
+        title = match.group(2).strip().strip("*").strip()
+        summary = match.group(3).strip()
+        if 1 <= idx <= len(items) and title and summary:
+            translations[idx] = (title, summary)
+    return translations
+
+
+def _key_points_budget(expected_digest_tokens: int) -> CallBudget:
+    overhead = token_budget.estimate_tokens(SYSTEM_PROMPT + _key_points_prompt({}))
+    return CallBudget("key_points", overhead + expected_digest_tokens, _KEY_POINTS_TOKENS)
+
+
+def _split_cached(entries: Dict[str, List[Tuple[str, Dict]]]) -> Tuple[Dict[int, Translation], Dict[str, List[Dict]]]:
+    """查译文记忆，返回 (命中的译文 {id(item): 译文}, 各分类未命中的条目)"""
+    cached = translation_memory.lookup([item for items in entries.values() for _region, item in items])
+    translations: Dict[int, Translation] = {}
+    misses: Dict[str, List[Dict]] = {}
+    for key, items in entries.items():
+        misses[key] = []
+        for _region, item in items:
+            hit = cached.get(translation_memory.item_key(item))
+            if hit is not None:
+                translations[id(item)] = hit
+            else:
+                misses[key].append(item)
+    return translations, misses
+
+
+def _translation_batches(
+    misses: Dict[str, List[Dict]],
+    slots: int | None = None,
+) -> List[Tuple[str, List[Dict], CallBudget]]:
+    """按估算的 token 数切批：在 slots 个并发槽位（默认 LLM_MAX_CONCURRENCY）内权衡预计耗时与请求数"""
+    sizes = {
+        key: [token_budget.estimate_tokens(_translation_line(i, item)) for i, item in enumerate(items, 1)]
+        for key, items in misses.items()
+    }
+    overhead = token_budget.estimate_tokens(SYSTEM_PROMPT + _translation_prompt([]))
+    layout = token_budget.split_batches(
+        sizes,
+        overhead,
+        config.SUMMARY_TOKENS_PER_ITEM,
+        config.TRANSLATION_BATCH_SIZE,
+        config.TRANSLATION_MIN_BATCH_SIZE,
+        slots,
+    )
+    batches: List[Tuple[str, List[Dict], CallBudget]] = []
+    for key in CATEGORY_KEYS:
+        for n, (start, end) in enumerate(layout.get(key, []), 1):
+            budget = CallBudget(
+                f"translate:{key}#{n}",
+                overhead + sum(sizes[key][start:end]),
+                config.SUMMARY_TOKENS_PER_ITEM * (end - start),
+            )
+            batches.append((key, misses[key][start:end], budget))
+    return batches
+
+
+def _translate_isolated(
+    client: OpenAI,
+    items: List[Dict],
+    label: str,
+    budget: CallBudget | None,
+    deadline: float | None,
+) -> Dict[int, Translation] | None:
+    """翻译一批；失败时在时限内单独重试（最多 SUMMARY_SECTION_RETRIES 次），仍失败时返回 None"""
+    try:
+        return _translate_batch(client, items, label, budget)
+    except RuntimeError as e:
+        error = str(e)
+    for n in range(config.SUMMARY_SECTION_RETRIES):
+        if _remaining(deadline) == 0:
+            break
+        print(f"{label} {error}，单独重试 ({n + 1}/{config.SUMMARY_SECTION_RETRIES})")
+        try:
+            return _translate_batch(client, items, label, deadline=deadline)
+        except RuntimeError as e:
+            error = str(e)
+    print(f"⚠️ {label} {error}")
+    return None
+
+
+def _translate_batches(
+    client: OpenAI,
+    batches: List[Tuple[str, List[Dict], CallBudget]],
+    translations: Dict[int, Translation],
+    on_done: Callable[[str, bool], None],
+    deadline: float | None,
+) -> None:
+    """并发翻译各批（实际并发与限流由 llm_scheduler 统一控制），译文写入 translations 与译文记忆；
+    某分类的批次全部完成即调用 on_done(分类, 是否全部成功)，失败的批次不影响其他分类"""
+    if not batches:
+        return
     from concurrent.futures import ThreadPoolExecutor, as_completed
 
-    def _summarize_one(key):
-        title = CATEGORY_TITLES[key]
-        category_text = sections.get(title, "")
-        return key, _summarize_category(client, key, category_text)
+    pending: Dict[str, int] = {}
+    failed: set[str] = set()
+    for key, _batch, _budget in batches:
+        pending[key] = pending.get(key, 0) + 1
+    ex = ThreadPoolExecutor(max_workers=len(batches))
+    futures = {
+        ex.submit(_translate_isolated, client, batch, f"{CATEGORY_TITLES[key]} 翻译", budget, deadline): (key, batch)
+        for key, batch, budget in batches
+    }
+    timed_out = False
+    try:
+        for fut in as_completed(futures, timeout=_remaining(deadline)):
+            key, batch = futures[fut]
+            result = fut.result()
+            if result is None:
+                failed.add(key)
+                result = {}
+            rows = [(batch[idx - 1], translated) for idx, translated in result.items()]
+            translation_memory.store(rows)
+            for item, translated in rows:
+                translations[id(item)] = translated
+            if result and len(result) < len(batch):
+                print(f"{CATEGORY_TITLES[key]} 翻译缺少 {len(batch) - len(result)} 条，保留原文")
+            pending[key] -= 1
+            if not pending[key]:
+                on_done(key, key not in failed)
+    except TimeoutError:
+        # 到时限仍未完成的批次留在后台，结果不再使用，所在分类按失败交付
+        timed_out = True
+        for key, count in pending.items():
+            if count:
+                on_done(key, False)
+    finally:
+        ex.shutdown(wait=not timed_out, cancel_futures=timed_out)
+
+
+def _render_translated(category_key: str, entries: List[Tuple[str, Dict]], translations: Dict[int, Translation]) -> str:
+    regions: Dict[str, List[Translation]] = {}
+    for region_key, item in entries:
+        translated = translations.get(id(item))
+        if translated is None:
+            # 模型漏掉的条目：保留原文标题与摘要首句并标明未翻译，下次运行重新翻译
+            title, summary = _original_entry(item)
+            translated = (title, UNTRANSLATED_MARK + summary)
+        regions.setdefault(region_key, []).append(translated)
+    return _render_category(category_key, regions)
+
+
+def _summarize_items(
+    client: OpenAI,
+    news_data: dict,
+    on_section: SectionCallback | None = None,
+    deadline: float | None = None,
+) -> str:
+    """按条目生成摘要：译文记忆命中的条目本地拼装，只把未见过的条目分批发给 LLM 翻译；
+    某分类有批次失败时该分类改用本地抽取的重要标题"""
+    entries = {key: _category_items(news_data, key) for key in CATEGORY_KEYS}
+    translations, misses = _split_cached(entries)
+    batches = _translation_batches(misses)
+    all_count = sum(len(items) for items in entries.values())
+    calls = [budget for _k, _b, budget in batches]
+    speculation = None
+    if config.KEY_POINTS_SPECULATIVE:
+        headlines = {key: _item_headlines(key, entries[key]) for key in CATEGORY_KEYS}
+        key_points_budget = _speculative_budget(headlines)
+        speculation = _start_key_points(client, headlines, key_points_budget)
+        plan = BudgetPlan("items", [calls + [key_points_budget]])
+    else:
+        key_points_budget = _key_points_budget(all_count * config.SUMMARY_TOKENS_PER_ITEM)
+        plan = BudgetPlan("items", [calls, [key_points_budget]])
+
+    miss_count = sum(len(batch) for _key, batch, _budget in batches)
+    print(f"译文记忆：命中 {all_count - miss_count} 条，需翻译 {miss_count} 条（{len(batches)} 批）")
+
+    category_outputs: Dict[str, str] = {}
+
+    def _finish(key: str, ok: bool = True) -> None:
+        if not ok:
+            category_outputs[key] = _settle_section(key, "生成摘要失败", entries[key], on_section, translations)
+            return
+        category_outputs[key] = _render_translated(key, entries[key], translations)
+        if on_section is not None:
+            on_section(category_outputs[key])
+
+    translating = {key for key, _b, _budget in batches}
+    for key in CATEGORY_KEYS:
+        if key not in translating:
+            _finish(key)
+
+    try:
+        _translate_batches(client, batches, translations, _finish, deadline)
+        points = _finish_key_points(client, speculation, category_outputs, on_section, key_points_budget, deadline)
+        return "\n\n".join([category_outputs[k] for k in CATEGORY_KEYS] + [points])
+    finally:
+        plan.report()
+
+
+def _summarize_category_items(
+    client: OpenAI,
+    category_key: str,
+    regions: Dict[str, List[Dict]],
+    on_section: SectionCallback | None = None,
+    deadline: float | None = None,
+) -> Tuple[str, List[CallBudget]]:
+    """单个分类的按条目摘要（流水线模式），返回 (段落, 各批的预算条目)；有批次失败时改用本地抽取的重要标题"""
+    entries = {category_key: _category_items({category_key: regions}, category_key)}
+    translations, misses = _split_cached(entries)
+    # 各分类同时在翻译，共用 LLM_MAX_CONCURRENCY 个槽位
+    batches = _translation_batches(misses, max(1, round(config.LLM_MAX_CONCURRENCY / len(CATEGORY_KEYS))))
+    budgets = [budget for _k, _b, budget in batches]
+    miss_count = sum(len(batch) for _key, batch, _budget in batches)
+    print(
+        f"{CATEGORY_TITLES[category_key]} 译文记忆：命中 {len(entries[category_key]) - miss_count} 条，"
+        f"需翻译 {miss_count} 条（{len(batches)} 批）"
+    )
 
-    with ThreadPoolExecutor(max_workers=len(category_keys)) as ex:
-        futures = {ex.submit(_summarize_one, k): k for k in category_keys}
-        for fut in as_completed(futures):
-            key, result = fut.result()
-            category_outputs[key] = result
+    results: Dict[str, bool] = {}
+    _translate_batches(client, batches, translations, results.__setitem__, deadline)
+    if not results.get(category_key, True):
+        return _settle_section(category_key, "生成摘要失败", entries[category_key], on_section, translations), budgets
+    section = _render_translated(category_key, entries[category_key], translations)
+    if on_section is not None:
+        on_section(section)
+    return section, budgets
+
+
+def _category_blocks(category_text: str) -> List[Tuple[str, List[str]]]:
+    """把分类文本切成 [(地区标题行, [条目文本, ...]), ...]；币圈没有地区标题，标题行为空"""
+    blocks: List[Tuple[str, List[str]]] = [("", [])]
+    for line in category_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("--- "):
+            blocks.append((stripped, []))
+        elif _ITEM_LINE.match(stripped):
+            blocks[-1][1].append(line)
+        elif stripped and blocks[-1][1]:
+            blocks[-1][1][-1] += "\n" + line
+    return [block for block in blocks if block[0] or block[1]]
+
+
+def _trim_category(category_key: str, category_text: str) -> Tuple[str, int]:
+    """分类文本超出单次请求的输入预算时按地区水位分配，截掉各地区排在最后的条目，返回 (文本, 截掉条数)"""
+    overhead = token_budget.estimate_tokens(SYSTEM_PROMPT + _category_prompt(category_key, ""))
+    blocks = _category_blocks(category_text)
+    groups = {
+        str(i): [token_budget.estimate_tokens(item) for item in items]
+        for i, (_header, items) in enumerate(blocks)
+    }
+    headers = sum(token_budget.estimate_tokens(header) for header, _items in blocks)
+    if overhead + headers + sum(sum(sizes) for sizes in groups.values()) <= config.SUMMARY_MAX_INPUT_TOKENS:
+        return category_text, 0
+
+    keep = token_budget.allocate(groups, config.SUMMARY_MAX_INPUT_TOKENS - overhead - headers)
+    parts: List[str] = []
+    dropped = 0
+    for i, (header, items) in enumerate(blocks):
+        dropped += len(items) - keep[str(i)]
+        if header:
+            parts.append(header)
+        parts.extend(f"{item}\n" for item in items[: keep[str(i)]])
+    return "\n".join(parts).strip(), dropped
+
+
+def _expected_output(category_key: str, category_text: str) -> int:
+    """预计输出 token 数：各地区按提示词要求选出的条数 × 每条 token 数，加上标题"""
+    if not category_text.strip():
+        return 0
+    picks = _PICKS_CRYPTO if category_key == "crypto" else _PICKS_PER_REGION
+    regions = 1 if category_key == "crypto" else len(REGION_HEADERS)
+    total = _HEADER_TOKENS * (regions + 1)
+    for _header, items in _category_blocks(category_text):
+        total += min(len(items), picks) * config.SUMMARY_TOKENS_PER_ITEM
+    return total
+
+
+def _text_headlines_by_category(texts: Dict[str, str]) -> Dict[str, List[str]]:
+    return {key: _text_headlines(key, texts.get(key, "")) for key in CATEGORY_KEYS}
+
+
+def _category_budget(category_key: str, category_text: str) -> CallBudget:
+    prompt_tokens = token_budget.estimate_tokens(SYSTEM_PROMPT + _category_prompt(category_key, category_text))
+    return CallBudget(f"category:{category_key}", prompt_tokens, _expected_output(category_key, category_text))
+
+
+def _plan_text(news_text: str) -> Tuple[BudgetPlan, Dict[str, str]]:
+    """在“整篇一次请求”与“按分类并发 + 今日要点”之间按预计耗时与费用选择，返回 (计划, 各分类文本)"""
+    sections = _split_news_by_category(news_text)
+    texts: Dict[str, str] = {}
+    expected: Dict[str, int] = {}
+    trimmed: Dict[str, int] = {}
+    for key in CATEGORY_KEYS:
+        text = sections.get(CATEGORY_TITLES[key], "")
+        if text.strip():
+            text, dropped = _trim_category(key, text)
+            if dropped:
+                trimmed[CATEGORY_TITLES[key]] = dropped
+        texts[key] = text
+        expected[key] = _expected_output(key, text)
+
+    digest_tokens = sum(expected.values())
+    full = BudgetPlan("full", [[CallBudget(
+        "full",
+        token_budget.estimate_tokens(SYSTEM_PROMPT + _full_prompt(news_text)),
+        digest_tokens + _KEY_POINTS_TOKENS,
+    )]])
+    categories = [_category_budget(key, texts[key]) for key in CATEGORY_KEYS if texts[key].strip()]
+    if config.KEY_POINTS_SPECULATIVE:
+        # 今日要点根据标题预生成，与各分类并发
+        stages = [categories + [_speculative_budget(_text_headlines_by_category(texts))]]
+    else:
+        stages = [categories, [_key_points_budget(digest_tokens)]]
+    chunked = BudgetPlan("chunked", stages, trimmed=trimmed)
+    return token_budget.choose_plan([full, chunked]), texts
+
+
+def _summarize_chunked(
+    client: OpenAI,
+    texts: Dict[str, str],
+    plan: BudgetPlan,
+    on_section: SectionCallback | None = None,
+    deadline: float | None = None,
+) -> str:
+    speculation = None
+    if config.KEY_POINTS_SPECULATIVE:
+        speculation = _start_key_points(client, _text_headlines_by_category(texts), plan.call("key_points"))
 
-    key_points = _summarize_key_points(client, category_outputs)
+    # 并发总结各分类，减少等待时间
+    category_outputs = _summarize_categories(client, texts, CATEGORY_KEYS, on_section, deadline, plan)
+
+    key_points = _finish_key_points(
+        client, speculation, category_outputs, on_section, plan.call("key_points"), deadline
+    )
 
     return "\n\n".join([
-        category_outputs[k] for k in category_keys
+        category_outputs[k] for k in CATEGORY_KEYS
     ] + [key_points])
 
 
+class PipelinedSummary:
+    """流水线摘要：某分类的新闻就绪即 submit()，在后台开始生成该分类的摘要；
+    全部提交后 finish() 按固定分类顺序拼装，再生成今日要点。
+
+    整篇一次请求需要等全部新闻，这里总是按分类请求（启用译文记忆时逐条翻译）。
+    """
+
+    def __init__(self, on_section: SectionCallback | None = None):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.client = create_client()
+        self.on_section = on_section
+        self._executor = ThreadPoolExecutor(max_workers=len(CATEGORY_KEYS), thread_name_prefix="summary")
+        self._futures: Dict[str, Any] = {}
+        self._budgets: Dict[str, List[CallBudget]] = {}
+        self._digest_tokens: Dict[str, int] = {}  # 各分类段落的预计 token 数（今日要点的输入）
+        self._trimmed: Dict[str, int] = {}
+        self._headlines: Dict[str, List[str]] = {}
+        self._speculation = None
+        self._key_points_budget: CallBudget | None = None
+        self._entries: Dict[str, List[Tuple[str, Dict]]] = {}  # 各分类的条目（失败时本地兜底用）
+        self._gates: Dict[str, _SectionGate] = {}
+        self._deadline = _retry_deadline()
+
+    def submit(self, category_key: str, regions: Dict[str, List[Dict]], category_text: str) -> None:
+        """提交一个分类：regions 为该分类的 {地区: [条目]}，category_text 为其格式化后的新闻文本"""
+        self._entries[category_key] = _category_items({category_key: regions}, category_key)
+        self._gates[category_key] = _SectionGate(self.on_section)
+        self._futures[category_key] = self._executor.submit(self._summarize, category_key, regions, category_text)
+        if config.KEY_POINTS_SPECULATIVE and self._speculation is None:
+            self._headlines[category_key] = _item_headlines(category_key, _category_items({category_key: regions}, category_key))
+            # 今日要点涉及的分类都已就绪即开始预生成，不等它们的摘要
+            if all(key in self._headlines for key in key_points.POINT_CATEGORIES.values()):
+                self._key_points_budget = _speculative_budget(self._headlines)
+                self._speculation = _start_key_points(self.client, self._headlines, self._key_points_budget)
+
+    def _summarize(self, category_key: str, regions: Dict[str, List[Dict]], category_text: str) -> str:
+        if config.TRANSLATION_MEMORY_ENABLED:
+            count = sum(len(items) for items in regions.values())
+            self._digest_tokens[category_key] = count * config.SUMMARY_TOKENS_PER_ITEM
+            section, self._budgets[category_key] = _summarize_category_items(
+                self.client, category_key, regions, self._gates[category_key], self._deadline
+            )
+            return section
+        budget = None
+        if category_text.strip():
+            category_text, dropped = _trim_category(category_key, category_text)
+            if dropped:
+                self._trimmed[CATEGORY_TITLES[category_key]] = dropped
+            budget = _category_budget(category_key, category_text)
+            self._budgets[category_key] = [budget]
+            self._digest_tokens[category_key] = budget.output_tokens
+        return _summarize_section(
+            self.client, category_key, category_text, self._gates[category_key], budget, self._deadline
+        )
+
+    def cancel(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def finish(self) -> str:
+        """等待各分类完成并生成今日要点；失败或到 SUMMARY_RETRY_BUDGET 时限仍未完成的分类改用本地抽取的重要标题，
+        不影响其他分类（未完成的请求留在后台，结果不再使用）"""
+        futures = {key: self._futures[key] for key in CATEGORY_KEYS if key in self._futures}
+        outputs = _collect_sections(
+            self._executor, futures, self._entries, self.on_section, self._deadline, self._gates
+        )
+        for key in CATEGORY_KEYS:
+            outputs.setdefault(key, _render_category(key, {}))
+
+        calls = [budget for key in CATEGORY_KEYS for budget in self._budgets.get(key, [])]
+        if self._speculation is not None:
+            key_points_budget = self._key_points_budget
+            plan = BudgetPlan("pipelined", [calls + [key_points_budget]], trimmed=self._trimmed)
+        else:
+            key_points_budget = _key_points_budget(sum(self._digest_tokens.values()))
+            plan = BudgetPlan("pipelined", [calls, [key_points_budget]], trimmed=self._trimmed)
+        try:
+            points = _finish_key_points(
+                self.client, self._speculation, outputs, self.on_section, key_points_budget, self._deadline
+            )
+            return "\n\n".join([outputs[k] for k in CATEGORY_KEYS] + [points])
+        finally:
+            plan.report()
+
+
+def generate_summary(
+    news_text: str,
+    on_section: SectionCallback | None = None,
+    news_data: dict | None = None,
+) -> str:
+    """使用 DeepSeek 生成中文新闻摘要
+
+    on_section: 每完成一个 "## " 分类段落即回调（流式输出时边生成边交付，可提前渲染/记录）
+    news_data: fetch_all_news 的结果；提供且启用译文记忆时按条目翻译，已翻译过的条目直接复用
+
+    整篇一次请求还是按分类分块由 token 预算决定（见 token_budget），结束时打印计划与实际用量。
+    某个分类失败时只重试该分类，仍失败时该分类改用本地抽取的重要标题，其余分类照常输出。
+    """
+    client = create_client()
+    deadline = _retry_deadline()
+
+    if news_data is not None and config.TRANSLATION_MEMORY_ENABLED:
+        return _summarize_items(client, news_data, on_section, deadline)
+
+    plan, texts = _plan_text(news_text)
+    try:
+        if plan.mode == "full":
+            summary = _summarize_full(client, news_text, on_section, plan.call("full"), deadline)
+            if not summary.startswith("生成摘要失败"):
+                return summary
+            print(f"⚠️ 整篇请求{summary}，改为按分类分别生成")
+        else:
+            print(f"启用分块总结（预计 {plan.latency:.0f} 秒）...")
+        return _summarize_chunked(client, texts, plan, on_section, deadline)
+    finally:
+        plan.report()
+
+
 if __name__ == "__main__":
     test_news = """
     === 金融财经 ===
@@ -0,0 +1,79 @@
+"""
+结构化摘要 - 解析并校验模型返回的 JSON（分类 → 地区 → [{title, summary}]）
+
+校验按分类进行：某个分类不合格只需单独重问该分类，不必重跑整篇。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+# 非币圈分类的地区 key（与 news_fetcher.REGIONS 一致）；币圈直接是条目数组
+REGION_KEYS = ["usa", "europe", "japan_korea", "aunz"]
+KEY_POINT_FIELDS = ["金融", "政治", "科技", "币圈"]
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# (中文标题, 中文摘要)
+Item = Tuple[str, str]
+
+
+def parse_json(content: str) -> Tuple[Any, str]:
+    """解析模型输出的 JSON（容忍 ``` 代码块与前后多余文字），返回 (数据, 错误说明)"""
+    text = _FENCE_RE.sub("", (content or "").strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None, "没有找到 JSON 对象"
+    try:
+        return json.loads(text[start : end + 1]), ""
+    except ValueError as e:
+        return None, f"JSON 无法解析: {e}"
+
+
+def validate_items(value: Any, where: str) -> Tuple[List[Item] | None, str]:
+    if not isinstance(value, list):
+        return None, f"{where} 应为数组"
+    items: List[Item] = []
+    for i, entry in enumerate(value, 1):
+        if not isinstance(entry, dict):
+            return None, f"{where} 第 {i} 条应为对象"
+        title = entry.get("title")
+        summary = entry.get("summary")
+        if not isinstance(title, str) or not isinstance(summary, str) or not title.strip() or not summary.strip():
+            return None, f"{where} 第 {i} 条缺少 title 或 summary"
+        items.append((title.strip().strip("*").strip(), summary.strip()))
+    return items, ""
+
+
+def validate_category(category_key: str, value: Any) -> Tuple[Dict[str, List[Item]] | None, str]:
+    """校验一个分类，返回 ({region_key: [条目]}, 错误说明)；币圈的条目放在 "global" 下"""
+    if category_key == "crypto":
+        if isinstance(value, dict):
+            value = value.get("items")
+        items, error = validate_items(value, "crypto")
+        return ({"global": items} if items is not None else None), error
+
+    if not isinstance(value, dict):
+        return None, f"{category_key} 应为对象"
+    regions: Dict[str, List[Item]] = {}
+    for region_key in REGION_KEYS:
+        items, error = validate_items(value.get(region_key, []), f"{category_key}.{region_key}")
+        if items is None:
+            return None, error
+        regions[region_key] = items
+    return regions, ""
+
+
+def validate_key_points(value: Any) -> Tuple[List[Item] | None, str]:
+    """校验今日要点，返回 [(领域, 一句话总结)]"""
+    if not isinstance(value, dict):
+        return None, "key_points 应为对象"
+    points: List[Item] = []
+    for name in KEY_POINT_FIELDS:
+        text = value.get(name)
+        if not isinstance(text, str) or not text.strip():
+            return None, f"key_points 缺少“{name}”"
+        points.append((name, text.strip()))
+    return points, ""
@@ -0,0 +1,59 @@
+"""晨读短文：不合格的模型输出不写入 LLM 响应缓存"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import morning_article
+from morning_article import NewsItem
+
+
+class _FakeClient:
+    """依次返回给定的输出，记录请求次数"""
+
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **_kwargs):
+        self.requests += 1
+        content = self.outputs[min(self.requests, len(self.outputs)) - 1]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "LLM_CACHE_BYPASS", False)
+    monkeypatch.setattr(config, "LLM_CACHE_DIR", str(tmp_path / "llm"))
+    monkeypatch.setattr(config, "LLM_METRICS_PATH", "")
+    monkeypatch.setattr(config, "MORNING_ARTICLE_MAX_RETRIES", 1)
+
+
+def _items():
+    return [NewsItem(f"F{i}", "finance", "usa", "Reuters", f"Title {i}", "Summary.", f"https://x/{i}") for i in range(5)]
+
+
+def test_invalid_plan_is_not_cached():
+    client = _FakeClient(["not json", '{"topic": "t", "supporting_ids": ["F1"]}'])
+    with pytest.raises(ValueError):
+        morning_article._plan_topic_and_outline(client, _items())
+    plan = morning_article._plan_topic_and_outline(client, _items())
+    assert plan["supporting_ids"] == ["F1"]
+    assert client.requests == 2
+
+    # 合格的结果已缓存，再次调用不发请求
+    assert morning_article._plan_topic_and_outline(client, _items()) == plan
+    assert client.requests == 2
+
+
+def test_article_without_sections_is_not_cached():
+    client = _FakeClient(["just text", "# T\n\n## 30秒导语\n..."])
+    plan = {"topic": "t", "supporting_ids": ["F1"]}
+    items_by_id = {x.id: x for x in _items()}
+    with pytest.raises(ValueError):
+        morning_article._write_article(client, plan, items_by_id)
+    assert morning_article._write_article(client, plan, items_by_id).startswith("# T")
+    assert client.requests == 2
@@ -0,0 +1,307 @@
+"""
+Token 预算 - 估算提示词 token 数、规划摘要请求，并对照 API usage 报告计划与实际用量
+
+- 估算：按 DeepSeek 的换算（英文约 0.3 token/字符，中日韩文字约 0.6 token/字符，其他符号按 1 计），
+  每次拿到 usage 后用 实际/估算 的滑动平均校准之后的估算
+- 耗时/费用模型：基础延迟 + 输入/预填充速率 + 输出/解码速率；费用按每百万 token 单价，
+  并发请求按 LLM_MAX_CONCURRENCY 个槽位估算总耗时
+- 规划：在可行方案（单次请求的输入不超过 SUMMARY_MAX_INPUT_TOKENS、输出不超过 SUMMARY_MAX_TOKENS）
+  中取 预计耗时 + 费用折算秒数（SUMMARY_PLAN_SECONDS_PER_CENT）+ 每个请求的固定折算秒数最小者
+- 分配：某个请求的输入超出预算时按地区水位分配（每个地区从排在最前的条目开始保留）；
+  每个请求的 max_tokens 按预计输出条数分配
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import config
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# 分配 max_tokens 时在预计输出之上留的余量
+_OUTPUT_MARGIN = 1.5
+_OUTPUT_SLACK = 100
+
+_calibration = 1.0
+_calibration_lock = threading.Lock()
+
+
+def raw_estimate(text: str) -> float:
+    """未校准的 token 估算"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    cjk_chars = len(_CJK_RE.findall(text))
+    other = len(text) - ascii_chars - cjk_chars
+    return ascii_chars * 0.3 + cjk_chars * 0.6 + other
+
+
+def estimate_tokens(text: str) -> int:
+    """校准后的 token 估算"""
+    return int(raw_estimate(text) * _calibration) + 1
+
+
+def calibrate(raw: float, actual: int) -> None:
+    """用一次请求的实际 prompt_tokens 更新校准系数（滑动平均，限制在 0.5-2 之间）"""
+    global _calibration
+    if raw <= 0 or actual <= 0:
+        return
+    with _calibration_lock:
+        ratio = min(2.0, max(0.5, actual / raw))
+        _calibration = _calibration * 0.7 + ratio * 0.3
+
+
+def output_budget(expected_tokens: int) -> int:
+    """按预计输出分配 max_tokens（留余量，不超过 SUMMARY_MAX_TOKENS）"""
+    return min(config.SUMMARY_MAX_TOKENS, int(expected_tokens * _OUTPUT_MARGIN) + _OUTPUT_SLACK)
+
+
+def call_latency(input_tokens: int, output_tokens: int) -> float:
+    return (
+        config.LLM_EST_LATENCY
+        + input_tokens / config.LLM_EST_PREFILL_TPS
+        + output_tokens / config.LLM_EST_DECODE_TPS
+    )
+
+
+def call_cost(input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """费用（美元）；cached_tokens 为输入中命中上下文缓存的部分"""
+    cached_tokens = min(cached_tokens, input_tokens)
+    return (
+        (input_tokens - cached_tokens) * config.LLM_PRICE_INPUT
+        + cached_tokens * config.LLM_PRICE_INPUT_CACHED
+        + output_tokens * config.LLM_PRICE_OUTPUT
+    ) / 1_000_000
+
+
+def cache_hit_tokens(usage) -> int | None:
+    """usage 中命中服务端上下文缓存的 prompt token 数（DeepSeek 为 prompt_cache_hit_tokens，
+    其他 OpenAI 兼容服务为 prompt_tokens_details.cached_tokens）；未返回时为 None"""
+    hit = getattr(usage, "prompt_cache_hit_tokens", None)
+    if hit is None:
+        hit = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+    if hit is None and isinstance(getattr(usage, "model_extra", None), dict):
+        hit = usage.model_extra.get("prompt_cache_hit_tokens")
+    return int(hit) if hit is not None else None
+
+
+def makespan(latencies: Sequence[float], slots: int | None = None) -> float:
+    """并发执行一组请求的预计总耗时（最长者优先分配到最早空闲的槽位）"""
+    slots = max(1, slots or config.LLM_MAX_CONCURRENCY)
+    finish = [0.0] * min(slots, max(1, len(latencies)))
+    for latency in sorted(latencies, reverse=True):
+        heapq.heapreplace(finish, finish[0] + latency)
+    return max(finish)
+
+
+def request_overhead() -> float:
+    """每个请求额外折算的秒数：LLM_EST_REQUEST_OVERHEAD，限流时再加上占用的 LLM_RPM 配额（60 / LLM_RPM 秒）"""
+    rpm = config.LLM_RPM
+    return config.LLM_EST_REQUEST_OVERHEAD + (60 / rpm if rpm > 0 else 0.0)
+
+
+def _objective(latency: float, cost: float, requests: int = 0) -> float:
+    return latency + cost * 100 * config.SUMMARY_PLAN_SECONDS_PER_CENT + requests * request_overhead()
+
+
+def allocate(groups: Dict[str, List[int]], budget: int) -> Dict[str, int]:
+    """水位分配：把 budget 个 token 分给各组（组内条目按重要性排好序），返回每组保留的前几条
+
+    每轮把剩余预算平分给仍有条目的组，用不完的份额留给下一轮，直到预算用尽或条目全部放下。
+    """
+    keep = {name: 0 for name in groups}
+    remaining = max(0, budget)
+    active = [name for name, sizes in groups.items() if sizes]
+    while active and remaining > 0:
+        share = remaining // len(active)
+        progressed = False
+        for name in list(active):
+            sizes = groups[name]
+            used = 0
+            while keep[name] < len(sizes) and used + sizes[keep[name]] <= max(share, 1):
+                used += sizes[keep[name]]
+                keep[name] += 1
+            if used:
+                progressed = True
+                remaining -= used
+            if keep[name] >= len(sizes) or not used:
+                active.remove(name)
+        if not progressed:
+            break
+    return keep
+
+
+@dataclass
+class CallBudget:
+    """一次请求的计划与实际用量"""
+    name: str
+    input_tokens: int
+    output_tokens: int  # 计划输出（预计值）
+    max_tokens: int = 0  # 分配给请求的 max_tokens
+    actual_input: int | None = None
+    actual_output: int | None = None
+    actual_cached: int | None = None  # 实际输入中命中服务端上下文缓存的 token 数
+    cached: bool = False  # 命中本地响应缓存（没有发出请求）
+
+    def __post_init__(self):
+        if not self.max_tokens:
+            self.max_tokens = output_budget(self.output_tokens)
+
+    @property
+    def latency(self) -> float:
+        return call_latency(self.input_tokens, self.output_tokens)
+
+    @property
+    def cost(self) -> float:
+        return call_cost(self.input_tokens, self.output_tokens)
+
+    @property
+    def actual_cost(self) -> float | None:
+        if self.actual_input is None:
+            return None
+        return call_cost(self.actual_input, self.actual_output or 0, self.actual_cached or 0)
+
+    def record(self, usage, prompt_raw: float = 0.0) -> None:
+        """记录 API 返回的 usage；prompt_raw 为提示词的未校准估算，用于校准"""
+        if usage is None:
+            return
+        self.actual_input = getattr(usage, "prompt_tokens", None)
+        self.actual_output = getattr(usage, "completion_tokens", None)
+        self.actual_cached = cache_hit_tokens(usage)
+        if self.actual_input:
+            calibrate(prompt_raw, self.actual_input)
+
+
+@dataclass
+class BudgetPlan:
+    """一次摘要的调用计划；stages 为串行的阶段，每个阶段内的请求并发执行"""
+    mode: str
+    stages: List[List[CallBudget]]
+    trimmed: Dict[str, int] = field(default_factory=dict)  # 分类 → 因输入预算截掉的条目数
+    _by_name: Dict[str, CallBudget] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._by_name = {call.name: call for stage in self.stages for call in stage}
+
+    @property
+    def calls(self) -> List[CallBudget]:
+        return [call for stage in self.stages for call in stage]
+
+    def call(self, name: str) -> CallBudget | None:
+        return self._by_name.get(name)
+
+    @property
+    def latency(self) -> float:
+        return sum(makespan([call.latency for call in stage]) for stage in self.stages if stage)
+
+    @property
+    def cost(self) -> float:
+        return sum(call.cost for call in self.calls)
+
+    @property
+    def objective(self) -> float:
+        return _objective(self.latency, self.cost, len(self.calls))
+
+    def report(self) -> None:
+        """打印计划与实际用量（缓存命中的请求没有 usage，不计入实际）"""
+        calls = self.calls
+        planned_in = sum(c.input_tokens for c in calls)
+        planned_out = sum(c.output_tokens for c in calls)
+        measured = [c for c in calls if c.actual_input is not None]
+        cached = sum(1 for c in calls if c.cached)
+        print(
+            f"📐 Token 预算（{self.mode}，{len(calls)} 个请求，预计 {self.latency:.1f}s / ${self.cost:.4f}）："
+            f"计划 prompt {planned_in} / completion {planned_out}"
+        )
+        if measured:
+            actual_in = sum(c.actual_input or 0 for c in measured)
+            actual_out = sum(c.actual_output or 0 for c in measured)
+            plan_in = sum(c.input_tokens for c in measured)
+            plan_out = sum(c.output_tokens for c in measured)
+            print(
+                f"   实际 prompt {actual_in} / completion {actual_out}"
+                f"（{len(measured)} 个请求，对应计划 {plan_in} / {plan_out}，"
+                f"prompt 估算偏差 {_deviation(plan_in, actual_in)}）"
+            )
+            hits = [c.actual_cached for c in measured if c.actual_cached is not None]
+            if hits:
+                hit = sum(hits)
+                print(
+                    f"   上下文缓存命中 {hit}/{actual_in} prompt tokens（{hit / actual_in * 100 if actual_in else 0:.0f}%），"
+                    f"实际费用 ${sum(c.actual_cost or 0 for c in measured):.4f}"
+                )
+        if cached:
+            print(f"   {cached} 个请求命中缓存")
+        for category, count in self.trimmed.items():
+            print(f"   ✂️ {category} 超出输入预算，截掉 {count} 条排名靠后的新闻")
+
+
+def _deviation(planned: int, actual: int) -> str:
+    if not planned:
+        return "-"
+    return f"{(actual - planned) / planned * 100:+.0f}%"
+
+
+def choose_plan(candidates: List[BudgetPlan]) -> BudgetPlan:
+    """在可行方案中取目标值最小者；都不可行时取最后一个（调用方放在最后的兜底方案）"""
+    feasible = [plan for plan in candidates if is_feasible(plan)]
+    if not feasible:
+        return candidates[-1]
+    return min(feasible, key=lambda plan: plan.objective)
+
+
+def is_feasible(plan: BudgetPlan) -> bool:
+    return all(
+        call.input_tokens <= config.SUMMARY_MAX_INPUT_TOKENS and call.output_tokens <= config.SUMMARY_MAX_TOKENS
+        for call in plan.calls
+    )
+
+
+def split_batches(
+    groups: Dict[str, List[int]],
+    overhead: int,
+    output_per_item: int,
+    max_items: int,
+    min_items: int = 1,
+    slots: int | None = None,
+) -> Dict[str, List[Tuple[int, int]]]:
+    """把各组条目切成若干批（每批一个请求），返回 {组: [(起始下标, 结束下标), ...]}
+
+    枚举每批条数上限 min_items..max_items：每组按上限切成尽量均匀的批次，超出输入预算时继续细分，
+    再按 slots 个并发槽位（默认 LLM_MAX_CONCURRENCY）估算总耗时、费用与请求数，取目标值最小的切法。
+    """
+    max_items = max(1, max_items)
+    best: Tuple[float, Dict[str, List[Tuple[int, int]]]] | None = None
+    for size in range(max(1, min(min_items, max_items)), max_items + 1):
+        layout: Dict[str, List[Tuple[int, int]]] = {}
+        latencies: List[float] = []
+        cost = 0.0
+        for name, sizes in groups.items():
+            ranges = _even_ranges(sizes, size, overhead)
+            layout[name] = ranges
+            for start, end in ranges:
+                input_tokens = overhead + sum(sizes[start:end])
+                output_tokens = output_per_item * (end - start)
+                latencies.append(call_latency(input_tokens, output_tokens))
+                cost += call_cost(input_tokens, output_tokens)
+        score = _objective(makespan(latencies, slots), cost, len(latencies))
+        if best is None or score < best[0]:
+            best = (score, layout)
+    return best[1] if best else {name: [] for name in groups}
+
+
+def _even_ranges(sizes: List[int], max_items: int, overhead: int) -> List[Tuple[int, int]]:
+    if not sizes:
+        return []
+    count = math.ceil(len(sizes) / max_items)
+    while True:
+        per = math.ceil(len(sizes) / count)
+        ranges = [(i, min(i + per, len(sizes))) for i in range(0, len(sizes), per)]
+        too_big = any(overhead + sum(sizes[s:e]) > config.SUMMARY_MAX_INPUT_TOKENS for s, e in ranges)
+        if not too_big or per == 1:
+            return ranges
+        count += 1
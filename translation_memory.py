@@ -0,0 +1,155 @@
+"""
+译文记忆 - 本地 SQLite 保存每条新闻的中文标题与 1-2 句中文摘要
+
+key 为规范化后的链接（dedup.normalize_url；没有链接时用标题），并记录原文
+（标题 + 摘要）的内容哈希：同一链接的内容有更新时哈希不匹配，视为未命中并重新翻译。
+每天的 feed 与上次运行大量重叠，命中的条目直接在本地拼装，只把新条目发给 LLM。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import config
+from dedup import normalize_url
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used);
+"""
+
+_BATCH = 500
+
+# (key, content_hash)
+ItemRef = Tuple[str, str]
+# (中文标题, 中文摘要)
+Translation = Tuple[str, str]
+
+
+def item_key(item: Dict) -> str:
+    link = normalize_url(item.get("link", ""))
+    if link:
+        return f"link:{link}"
+    return f"title:{(item.get('title') or '').strip().lower()}"
+
+
+def content_hash(item: Dict) -> str:
+    payload = f"{item.get('title', '')}\n{item.get('summary', '')}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def item_ref(item: Dict) -> ItemRef:
+    return item_key(item), content_hash(item)
+
+
+class TranslationMemory:
+    """线程安全的 SQLite 译文记忆"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, refs: Iterable[ItemRef]) -> Dict[str, Translation]:
+        """返回内容哈希仍然匹配的译文 {key: (title, summary)}，并刷新其 last_used"""
+        wanted = dict(refs)
+        keys = list(wanted)
+        found: Dict[str, Translation] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i : i + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                cur = self._conn.execute(
+                    f"SELECT key, content_hash, title, summary FROM translations WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, digest, title, summary in cur:
+                    if wanted.get(key) == digest:
+                        found[key] = (title, summary)
+            if found:
+                self._conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, rows: Iterable[Tuple[ItemRef, Translation]]) -> None:
+        now = time.time()
+        values = [(key, digest, title, summary, now, now) for (key, digest), (title, summary) in rows]
+        if not values:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO translations (key, content_hash, title, summary, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    title = excluded.title,
+                    summary = excluded.summary,
+                    created = excluded.created,
+                    last_used = excluded.last_used
+                """,
+                values,
+            )
+            if config.TRANSLATION_MEMORY_RETENTION_DAYS > 0:
+                cutoff = now - config.TRANSLATION_MEMORY_RETENTION_DAYS * 86400
+                self._conn.execute("DELETE FROM translations WHERE last_used < ?", (cutoff,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        return {"total": total}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_memory: TranslationMemory | None = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory | None:
+    """返回进程内共享的译文记忆；未启用时返回 None"""
+    global _memory
+    if not config.TRANSLATION_MEMORY_ENABLED:
+        return None
+    with _memory_lock:
+        if _memory is None or _memory.path != config.TRANSLATION_MEMORY_PATH:
+            _memory = TranslationMemory(config.TRANSLATION_MEMORY_PATH)
+        return _memory
+
+
+def lookup(items: List[Dict]) -> Dict[str, Translation]:
+    """按条目查译文记忆；未启用或 LLM_CACHE_BYPASS 时总是未命中"""
+    memory = get_translation_memory()
+    if memory is None or config.LLM_CACHE_BYPASS:
+        return {}
+    return memory.get_many(item_ref(it) for it in items)
+
+
+def store(rows: Iterable[Tuple[Dict, Translation]]) -> None:
+    memory = get_translation_memory()
+    if memory is not None:
+        memory.put_many((item_ref(it), translation) for it, translation in rows)